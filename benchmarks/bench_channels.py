@@ -0,0 +1,100 @@
+# channels.yaml load / add benchmark on a synthetic subscriptions list
+#   python3 -m benchmarks.bench_channels -n 20000
+#   python3 -m benchmarks.bench_channels --file ~/.config/pytfeeder/channels.yaml
+import argparse
+import json
+from pathlib import Path
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable
+
+import yaml
+
+from pytfeeder.channels_file import dump_channels_yaml, load_channels
+from pytfeeder.config import Config
+from pytfeeder.models import Channel
+from tests.fake_server import fake_channel_id
+
+
+def synthetic_channels(count: int) -> list[Channel]:
+    return [
+        Channel(
+            title=f"Channel: #{n} 'quoted'" if n % 10 == 0 else f"Channel {n}",
+            channel_id=fake_channel_id(n),
+            hidden=n % 7 == 0,
+            tags=["music", "live"] if n % 3 == 0 else [],
+        )
+        for n in range(count)
+    ]
+
+
+def measure(name: str, fn: Callable[[], Any], runs: int) -> dict[str, Any]:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _ = fn()
+        times.append(time.perf_counter() - start)
+    return {
+        "name": name,
+        "runs": runs,
+        "min": min(times),
+        "median": statistics.median(times),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--file",
+        type=Path,
+        metavar="PATH",
+        help="channels.yaml to copy (default: synthetic)",
+    )
+    parser.add_argument("-n", "--channels", type=int, default=10000)
+    parser.add_argument("-r", "--runs", type=int, default=3)
+    parser.add_argument(
+        "--json", type=Path, metavar="PATH", help="Write results as json to PATH"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "channels.yaml"
+        if args.file:
+            _ = shutil.copyfile(args.file, path)
+        else:
+            _ = path.write_text(dump_channels_yaml(synthetic_channels(args.channels)))
+        config = Config(channels_filepath=path)
+        new_channel = Channel(title="New channel", channel_id=fake_channel_id(10**9))
+
+        def add_channel() -> None:
+            config.add_channels([new_channel])
+
+        def toggle_hidden() -> None:
+            channel = config.all_channels[len(config.all_channels) // 2]
+            channel.hidden ^= True
+            config.update_channels([channel])
+
+        results = [
+            measure(
+                "safe_load",
+                lambda: [Channel(**c) for c in yaml.safe_load(path.read_text())],
+                args.runs,
+            ),
+            measure("load_channels", lambda: load_channels(path), args.runs),
+            measure("dump_channels", config.dump_channels, args.runs),
+            measure("update_channels", toggle_hidden, args.runs),
+            measure("add_channels", add_channel, args.runs),
+        ]
+        for r in results:
+            r["channels"] = len(config.all_channels)
+            print(f"{r['name']:<16} {r['median'] * 1000:10.3f}ms", file=sys.stderr)
+
+    if args.json:
+        _ = args.json.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Feed parser backends benchmark over a corpus of recorded (or synthetic) feeds
+#   python3 -m benchmarks.bench_parser --corpus ~/.local/share/pytfeeder/raw_feeds
+#   python3 -m benchmarks.bench_parser -n 500 --json results.json
+import argparse
+import json
+import logging
+from pathlib import Path
+import statistics
+import sys
+import time
+from typing import Any
+
+from pytfeeder.archive import ARCHIVE_SUFFIX, FeedArchive
+from pytfeeder.parser import BACKENDS, YTFeedParser, lxml_available
+from tests.fake_server import fake_channel_id
+from tests.mocks import yt_feed
+
+
+def load_corpus(path: Path) -> list[bytes]:
+    # plain *.xml files or a raw feeds archive (<channel_id>/*.xml.gz)
+    return [p.read_bytes() for p in sorted(path.glob("*.xml"))] + [
+        FeedArchive.read(p) for p in sorted(path.glob(f"*/*{ARCHIVE_SUFFIX}"))
+    ]
+
+
+def synthetic_corpus(feeds_count: int, entries_count: int) -> list[bytes]:
+    return [
+        yt_feed(fake_channel_id(n), entries_count, shorts_every=5).encode()
+        for n in range(feeds_count)
+    ]
+
+
+def measure(corpus: list[bytes], backend: str | None, runs: int) -> dict[str, Any]:
+    times = []
+    entries = 0
+    for _ in range(runs):
+        entries = 0
+        start = time.perf_counter()
+        for raw in corpus:
+            entries += len(YTFeedParser(raw, backend=backend).entries)
+        times.append(time.perf_counter() - start)
+    median = statistics.median(times)
+    return {
+        "backend": backend or "auto",
+        "runs": runs,
+        "feeds": len(corpus),
+        "entries": entries,
+        "min": min(times),
+        "median": median,
+        "feeds_per_sec": len(corpus) / median,
+        "entries_per_sec": entries / median,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        metavar="DIR",
+        help="Directory with recorded *.xml feeds or a raw feeds archive (default: synthetic feeds)",
+    )
+    parser.add_argument("-n", "--feeds", type=int, default=200)
+    parser.add_argument("-e", "--entries", type=int, default=15)
+    parser.add_argument("-r", "--runs", type=int, default=5)
+    parser.add_argument(
+        "--json", type=Path, metavar="PATH", help="Write results as json to PATH"
+    )
+    args = parser.parse_args()
+    # invalid entries in recorded feeds are expected, don't flood the output
+    logging.disable(logging.ERROR)
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+        if not corpus:
+            print(f"Error: no feeds in {args.corpus}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        corpus = synthetic_corpus(args.feeds, args.entries)
+
+    # etree goes first, speedups are relative to it
+    backends = sorted(BACKENDS, key=lambda b: b != "etree")
+    if not lxml_available():
+        backends.remove("lxml")
+    results = []
+    for backend in [*backends, None]:
+        r = measure(corpus, backend, args.runs)
+        results.append(r)
+        r["speedup"] = results[0]["median"] / r["median"]
+        print(
+            f"{r['backend']:<6} {r['median'] * 1000:10.3f}ms "
+            f"{r['entries_per_sec']:12.0f} entries/s x{r['speedup']:.2f}",
+            file=sys.stderr,
+        )
+
+    if args.json:
+        _ = args.json.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# Storage/Feeder queries benchmark on a synthetic database
+#   python3 -m benchmarks.bench_storage -c 500 -e 200 --json results.json
+#   python3 -m benchmarks.bench_storage --baseline results.json
+import argparse
+import json
+import logging
+from pathlib import Path
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable
+
+from pytfeeder import __version__
+from pytfeeder.config import Config
+from pytfeeder.feeder import Feeder
+from pytfeeder.models import Channel, Entry
+from pytfeeder.storage import Storage
+from .gen_db import generate_db
+
+Bench = Callable[[Feeder], Any]
+
+
+def read_benchmarks(channels: list[Channel]) -> dict[str, Bench]:
+    c_id = channels[len(channels) // 2].channel_id
+    return {
+        "select_entries": lambda f: f.stor.select_entries(),
+        "select_entries(limit=100)": lambda f: f.stor.select_entries(limit=100),
+        "select_entries(unwatched_first, limit=100)": lambda f: f.stor.select_entries(
+            unwatched_first=True, limit=100
+        ),
+        "select_entries(channel_id)": lambda f: f.stor.select_entries(channel_id=c_id),
+        "select_entries(in_channels)": lambda f: f.stor.select_entries(
+            in_channels=channels
+        ),
+        "select_entries(offset=1000, limit=100)": lambda f: f.stor.select_entries(
+            limit=100, offset=1000
+        ),
+        "select_channels_stats": lambda f: f.stor.select_channels_stats(),
+        "select_stats": lambda f: f.stor.select_stats(),
+        "select_global_stats": lambda f: f.global_stats(),
+        "select_channels_sync_state": lambda f: f.stor.select_channels_sync_state(),
+        "select_channels_with_deleted": lambda f: f.stor.select_channels_with_deleted(),
+        "select_channels_deleted_entries": lambda f: f.stor.select_channels_deleted_entries(
+            c_id
+        ),
+        "total_entries_count": lambda f: f.total_entries_count(),
+        "total_entries_count(exclude_hidden)": lambda f: f.total_entries_count(
+            exclude_hidden=True
+        ),
+        "unwatched_count": lambda f: f.unwatched_count(),
+        "unwatched_count(channel_id)": lambda f: f.unwatched_count(c_id),
+        "deleted_count": lambda f: f.deleted_count(),
+        "feeder.feed": lambda f: f.feed(),
+        "feeder.refresh_channels_stats": lambda f: f.refresh_channels_stats(),
+        "feeder.due_channels": lambda f: f.due_channels(),
+    }
+
+
+def write_benchmarks(channels: list[Channel]) -> dict[str, Bench]:
+    c_id = channels[len(channels) // 2].channel_id
+    new_entries = [
+        Entry(id=f"new{i:08d}", title=f"New entry {i}", channel_id=c_id)
+        for i in range(100)
+    ]
+    # ids as generated by gen_db, spread over the channels
+    ids = [f"{n:06d}{i:05d}" for n in range(len(channels)) for i in range(5)]
+    return {
+        "insert_entries(100)": lambda f: f.stor.insert_entries(new_entries),
+        "add_entries(100)": lambda f: f.stor.add_entries(new_entries),
+        "mark_channel_entries_as_watched": lambda f: f.mark_as_watched(channel_id=c_id),
+        "mark_all_entries_as_watched": lambda f: f.mark_as_watched(),
+        "mark_all_entries_as_watched(unwatched)": lambda f: f.mark_as_watched(
+            unwatched=True
+        ),
+        "mark_channel_entries_as_deleted": lambda f: f.mark_channel_as_deleted(c_id),
+        "mark_entries(100)": lambda f: f.mark_entries(ids[:100], watched=True),
+        "mark_entries(5000)": lambda f: f.mark_entries(ids[:5000], watched=True),
+        "delete_old_entries": lambda f: f.stor.delete_old_entries(),
+        "execute_vacuum": lambda f: f.stor.execute_vacuum(),
+    }
+
+
+def measure(fn: Callable[[], Any], runs: int) -> list[float]:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _ = fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def summary(name: str, times: list[float]) -> dict[str, Any]:
+    return {
+        "name": name,
+        "runs": len(times),
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "max": max(times),
+    }
+
+
+def make_feeder(db_file: Path, channels: list[Channel], tmp_path: Path) -> Feeder:
+    config = Config(
+        channels=channels,
+        storage_path=db_file,
+        lock_file=tmp_path / "pytfeeder_update.lock",
+    )
+    return Feeder(config, Storage(db_file))
+
+
+def run(args: argparse.Namespace, tmp_path: Path) -> list[dict[str, Any]]:
+    template = tmp_path / "template.db"
+    channels = generate_db(
+        template,
+        channels_count=args.channels,
+        entries_per_channel=args.entries,
+        watched_ratio=args.watched,
+        deleted_ratio=args.deleted,
+    )
+    results = []
+    only = set(args.only or [])
+
+    db_file = tmp_path / "read.db"
+    _ = shutil.copyfile(template, db_file)
+    feeder = make_feeder(db_file, channels, tmp_path)
+    for name, bench in read_benchmarks(channels).items():
+        if only and name not in only:
+            continue
+        _ = bench(feeder)  # warm up page cache
+        results.append(summary(name, measure(lambda: bench(feeder), args.runs)))
+        log_result(results[-1])
+
+    # writes run on a fresh copy every time, copying is not measured
+    for name, bench in write_benchmarks(channels).items():
+        if only and name not in only:
+            continue
+        times = []
+        for i in range(args.runs):
+            db_file = tmp_path / f"write{i}.db"
+            _ = shutil.copyfile(template, db_file)
+            feeder = make_feeder(db_file, channels, tmp_path)
+            times += measure(lambda: bench(feeder), 1)
+            db_file.unlink()
+        results.append(summary(name, times))
+        log_result(results[-1])
+    return results
+
+
+def log_result(r: dict[str, Any], baseline: dict[str, Any] | None = None) -> None:
+    line = f"{r['name']:<45} {r['median'] * 1000:10.3f}ms (min {r['min'] * 1000:.3f}ms)"
+    if baseline:
+        line += f" x{r['median'] / baseline['median']:.2f} vs baseline"
+    print(line, file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-c", "--channels", type=int, default=200)
+    parser.add_argument("-e", "--entries", type=int, default=100)
+    parser.add_argument("--watched", type=float, default=0.8)
+    parser.add_argument("--deleted", type=float, default=0.1)
+    parser.add_argument("-r", "--runs", type=int, default=5)
+    parser.add_argument("--only", nargs="+", metavar="NAME")
+    parser.add_argument(
+        "--json", type=Path, metavar="PATH", help="Write results as json to PATH"
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        metavar="PATH",
+        help="Compare medians with results from previous --json output",
+    )
+    args = parser.parse_args()
+    logging.getLogger().addHandler(logging.NullHandler())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = run(args, Path(tmp_dir))
+
+    output = {
+        "benchmark": "storage",
+        "version": __version__,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "params": {
+            k: getattr(args, k)
+            for k in ("channels", "entries", "watched", "deleted", "runs")
+        },
+        "results": results,
+    }
+
+    if args.baseline:
+        baseline = {
+            r["name"]: r for r in json.loads(args.baseline.read_text())["results"]
+        }
+        print(f"{' compared to ' + str(args.baseline) + ' ':-^80}", file=sys.stderr)
+        for r in results:
+            log_result(r, baseline.get(r["name"]))
+
+    if args.json:
+        args.json.write_text(json.dumps(output, indent=2) + "\n")
+    else:
+        print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# Offline sync load test against a local fake feed server
+#   python3 -m benchmarks.bench_sync -n 100 1000 10000 --latency 0.05 --json out.json
+import argparse
+import asyncio
+import json
+import logging
+from pathlib import Path
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any
+
+from pytfeeder.config import Config
+from pytfeeder.feeder import Feeder
+from pytfeeder.models import Channel, SyncStatus
+from pytfeeder.storage import Storage
+from tests.fake_server import FakeFeedServer
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-n",
+        "--channels",
+        nargs="+",
+        type=int,
+        default=[100, 1000, 10000],
+        metavar="N",
+        help="Channels count per run (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="Server latency in seconds"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.02, help="Random extra latency in seconds"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--not-modified-rate",
+        type=float,
+        default=0.0,
+        help="Chance a feed is unchanged since the last fetch, answered with 304 "
+        "to conditional requests. A priming sync runs first if set",
+    )
+    parser.add_argument(
+        "--entries", type=int, default=15, help="Entries per feed (default: 15)"
+    )
+    parser.add_argument(
+        "--title-size", type=int, default=40, help="Entry title size (default: 40)"
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Parse feeds in N processes (default: 0, a thread)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Sharded sync across N processes (default: 0, in process)",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="Trace python heap peak (slows down the sync)",
+    )
+    parser.add_argument(
+        "--json", type=Path, metavar="PATH", help="Write results as json to PATH"
+    )
+    return parser.parse_args()
+
+
+def percentile(values: list[float], p: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+def run(args: argparse.Namespace, channels_count: int) -> dict[str, Any]:
+    server = FakeFeedServer(
+        channels_count,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        not_modified_rate=args.not_modified_rate,
+        entries_count=args.entries,
+        title_size=args.title_size,
+    )
+    with server.serve_in_thread(), tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        db_file = tmp_path / "pytfeeder.db"
+        config = Config(
+            channels=[
+                Channel(title=c_id, channel_id=c_id) for c_id in server.channel_ids
+            ],
+            storage_path=db_file,
+            lock_file=tmp_path / "pytfeeder_update.lock",
+        )
+        config.parse_workers = args.parse_workers
+        feeder = Feeder(config, Storage(db_file))
+        feeder.feed_url = server.feed_url
+
+        if args.not_modified_rate > 0:
+            # stores the validators for the conditional requests
+            _ = asyncio.run(feeder.sync_entries(workers=args.workers))
+        requests_before = sum(server.requests.values())
+
+        if args.tracemalloc:
+            tracemalloc.start()
+        start = time.perf_counter()
+        report = asyncio.run(feeder.sync_entries(workers=args.workers))
+        elapsed = time.perf_counter() - start
+        heap_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+        tracemalloc.stop()
+        db_size = db_file.stat().st_size
+
+    ok = report.with_status(SyncStatus.OK, SyncStatus.NOT_MODIFIED)
+    latencies = sorted(r.latency for r in ok)
+    return {
+        "channels": channels_count,
+        "ok": len(ok),
+        "failed": len(report.failed),
+        "new": report.new,
+        "requests": sum(server.requests.values()) - requests_before,
+        "elapsed": round(elapsed, 3),
+        "channels_per_sec": round(channels_count / elapsed, 1),
+        "bytes": sum(r.bytes for r in report.channels),
+        "latency_p50": round(percentile(latencies, 50), 4),
+        "latency_p95": round(percentile(latencies, 95), 4),
+        "latency_p99": round(percentile(latencies, 99), 4),
+        "latency_max": round(latencies[-1] if latencies else 0.0, 4),
+        "parse_time": round(sum(r.parse_time for r in report.channels), 3),
+        "db_time": round(sum(r.db_time for r in report.channels), 3),
+        "db_size": db_size,
+        "http": report.http.to_dict() if report.http else None,
+        # ru_maxrss is in KiB on linux, monotonic for the process
+        "maxrss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "heap_peak": heap_peak,
+    }
+
+
+def main():
+    args = parse_args()
+    logging.getLogger().addHandler(logging.NullHandler())
+
+    results = []
+    for n in sorted(args.channels):
+        result = run(args, n)
+        results.append(result)
+        print(
+            "{channels:>6} channels: {elapsed:8.3f}s {channels_per_sec:>8} ch/s, "
+            "latency p50/p95/p99/max {latency_p50}/{latency_p95}/{latency_p99}/{latency_max}s, "
+            "{failed} failed, maxrss {maxrss_kib} KiB".format(**result),
+            file=sys.stderr,
+        )
+
+    output = {
+        "benchmark": "sync",
+        "params": {
+            k: v for k, v in vars(args).items() if k not in ("channels", "json")
+        },
+        "results": results,
+    }
+    if args.json:
+        args.json.write_text(json.dumps(output, indent=2) + "\n")
+    else:
+        print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
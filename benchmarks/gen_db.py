@@ -0,0 +1,116 @@
+# Synthetic pytfeeder.db generator
+#   python3 -m benchmarks.gen_db /tmp/pytfeeder.db -c 500 -e 200 --watched 0.8 --deleted 0.1
+import argparse
+import datetime as dt
+from pathlib import Path
+import random
+import sqlite3
+
+import yaml
+
+from pytfeeder.models import Channel
+from pytfeeder.storage import Storage, TB_ENTRIES, TB_CHANNELS_SYNC
+
+WORDS = (
+    "how to build review first look vs best worst new live stream tutorial "
+    "update news guide tips part episode full setup test fast slow"
+).split()
+
+
+def fake_channels(count: int) -> list[Channel]:
+    return [
+        Channel(title=f"Channel {n}", channel_id=f"UC{n:022d}") for n in range(count)
+    ]
+
+
+def generate_db(
+    db_file: Path,
+    channels_count: int = 100,
+    entries_per_channel: int = 100,
+    watched_ratio: float = 0.8,
+    deleted_ratio: float = 0.1,
+    seed: int = 0,
+) -> list[Channel]:
+    rnd = random.Random(seed)
+    _ = Storage(db_file)  # creates tables by migrations
+    channels = fake_channels(channels_count)
+    now = dt.datetime.now(dt.timezone.utc).replace(microsecond=0)
+
+    conn = sqlite3.connect(db_file)
+    try:
+        for n, c in enumerate(channels):
+            # uploads every ~hour..~month, newest first
+            upload_interval = dt.timedelta(hours=rnd.uniform(1, 24 * 30))
+            published = now - upload_interval * rnd.random()
+            rows = []
+            for i in range(entries_per_channel):
+                title = " ".join(rnd.choices(WORDS, k=rnd.randint(3, 12)))
+                # older entries are more likely to be watched/deleted
+                age = i / max(entries_per_channel - 1, 1)
+                rows.append(
+                    (
+                        f"{n:06d}{i:05d}",
+                        title.capitalize(),
+                        published.replace(microsecond=0).isoformat(),
+                        c.channel_id,
+                        int(rnd.random() < watched_ratio * (0.5 + age)),
+                        int(rnd.random() < deleted_ratio * (0.5 + age)),
+                    )
+                )
+                published -= upload_interval * rnd.uniform(0.5, 1.5)
+            conn.executemany(
+                f"INSERT INTO {TB_ENTRIES} (id, title, published, channel_id, is_viewed, is_deleted) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        conn.executemany(
+            f"INSERT INTO {TB_CHANNELS_SYNC} (channel_id, last_fetch) VALUES (?, ?)",
+            [(c.channel_id, now.isoformat()) for c in channels],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return channels
+
+
+def dump_channels(channels: list[Channel], file: Path) -> None:
+    file.write_text(
+        yaml.safe_dump(
+            [{"channel_id": c.channel_id, "title": c.title} for c in channels],
+            default_flow_style=None,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("db_file", type=Path, metavar="PATH")
+    parser.add_argument("-c", "--channels", type=int, default=100)
+    parser.add_argument("-e", "--entries", type=int, default=100)
+    parser.add_argument("--watched", type=float, default=0.8)
+    parser.add_argument("--deleted", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--channels-file",
+        type=Path,
+        metavar="PATH",
+        help="Also write channels.yaml for the generated channels",
+    )
+    args = parser.parse_args()
+    if args.db_file.exists():
+        parser.error(f"{args.db_file} already exists")
+
+    channels = generate_db(
+        args.db_file,
+        channels_count=args.channels,
+        entries_per_channel=args.entries,
+        watched_ratio=args.watched,
+        deleted_ratio=args.deleted,
+        seed=args.seed,
+    )
+    if args.channels_file:
+        dump_channels(channels, args.channels_file)
+    print(f"{args.channels * args.entries} entries written to {args.db_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -377,11 +377,15 @@ def main():
     if args.sync:
         import asyncio
 
-        new, err = asyncio.run(feeder.sync_entries())
-        if err:
-            printer.print_error(f"ERR: {err}")
-        elif new > 0:
-            printer.print_message(f"{new} new entries")
+        report = asyncio.run(feeder.sync_entries())
+        if report.error and not report.is_partial:
+            printer.print_error(f"ERR: {report.error}")
+        elif failed := report.failed:
+            printer.print_message(
+                f"{report.new} new entries, {len(failed)} channels failed"
+            )
+        elif report.new > 0:
+            printer.print_message(f"{report.new} new entries")
         else:
             printer.print_message("No updates")
 
@@ -36,6 +36,7 @@ def run(channels_filepath: Path | None = None) -> int:
         sys.exit(0)
     icons = ["󰄱", "\033[1;32m󰱒"]
     index = 0
+    toggled = set()
 
     while True:
         all_channels_str = "\n".join(
@@ -68,7 +69,10 @@ def run(channels_filepath: Path | None = None) -> int:
             return res.returncode
 
         if res.stdout.startswith(SAVE_KB):
-            config.dump_channels()
+            # only the lines of the toggled channels are rewritten
+            config.update_channels(
+                [c for c in config.all_channels if c.channel_id in toggled]
+            )
             print(f"Changes saved to {config.channels_filepath}")
             return 0
 
@@ -76,6 +80,7 @@ def run(channels_filepath: Path | None = None) -> int:
         if index not in range(len(config.all_channels)):
             return 1
         config.all_channels[index].hidden ^= True
+        toggled ^= {config.all_channels[index].channel_id}
 
 
 def main() -> int:
@@ -1,7 +1,26 @@
 __version__ = "0.4.0"
 
-from .config import Config
-from .feeder import Feeder
-from .storage import Storage
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .config import Config
+    from .feeder import Feeder
+    from .storage import Storage
 
 __all__ = ["Config", "Feeder", "Storage"]
+
+_LAZY_IMPORTS = {
+    "Config": ".config",
+    "Feeder": ".feeder",
+    "Storage": ".storage",
+}
+
+
+def __getattr__(name: str):
+    if module_name := _LAZY_IMPORTS.get(name):
+        from importlib import import_module
+
+        attr = getattr(import_module(module_name, __name__), name)
+        globals()[name] = attr
+        return attr
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
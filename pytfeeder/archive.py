@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+import gzip
+import logging
+import os
+from pathlib import Path
+import time
+from typing import Any, Iterator
+
+ARCHIVE_DIRNAME = "raw_feeds"
+ARCHIVE_SUFFIX = ".xml.gz"
+
+
+@dataclass
+class RawArchiveConfig:
+    enabled: bool = False
+    keep: int = 3
+    max_size_mb: int = 100
+
+    def update(self, kwargs: dict[str, Any]) -> None:
+        for k, v in kwargs.items():
+            if k in vars(self) and v is not None:
+                setattr(self, k, type(getattr(self, k))(v))
+
+
+class FeedArchive:
+    # compressed raw feed responses, <dir>/<channel_id>/<unix time ms>.xml.gz,
+    # rotated per channel (keep) and capped in total size (max_bytes)
+    def __init__(
+        self,
+        path: Path,
+        keep: int = 3,
+        max_bytes: int = 100 * 1024 * 1024,
+        log: logging.Logger | None = None,
+    ) -> None:
+        self.path = path
+        self.keep = max(1, keep)
+        self.max_bytes = max_bytes
+        self.log = log or logging.getLogger()
+
+    def add(self, channel_id: str, raw: bytes) -> Path:
+        channel_dir = self.path / channel_id
+        channel_dir.mkdir(parents=True, exist_ok=True)
+        ts = time.time_ns() // 1_000_000
+        if files := self.channel_files(channel_id):
+            # keeps names unique and ordered within the same millisecond
+            ts = max(ts, int(files[-1].name.removesuffix(ARCHIVE_SUFFIX)) + 1)
+        file = channel_dir / f"{ts}{ARCHIVE_SUFFIX}"
+        tmp = file.with_name(f".{file.name}.tmp")
+        _ = tmp.write_bytes(gzip.compress(raw, compresslevel=5))
+        os.replace(tmp, file)
+
+        for old in self.channel_files(channel_id)[: -self.keep]:
+            old.unlink(missing_ok=True)
+        return file
+
+    def channel_files(self, channel_id: str) -> list[Path]:
+        # oldest first
+        channel_dir = self.path / channel_id
+        if not channel_dir.is_dir():
+            return []
+        return sorted(
+            channel_dir.glob(f"*{ARCHIVE_SUFFIX}"),
+            key=lambda p: int(p.name.removesuffix(ARCHIVE_SUFFIX)),
+        )
+
+    def channel_ids(self) -> list[str]:
+        if not self.path.is_dir():
+            return []
+        return sorted(p.name for p in self.path.iterdir() if p.is_dir())
+
+    def iter_files(self, latest_only: bool = True) -> Iterator[tuple[str, Path]]:
+        for channel_id in self.channel_ids():
+            files = self.channel_files(channel_id)
+            for file in files[-1:] if latest_only else files:
+                yield channel_id, file
+
+    @staticmethod
+    def read(file: Path) -> bytes:
+        return gzip.decompress(file.read_bytes())
+
+    def prune(self) -> int:
+        # drops the oldest responses across all channels until under max_bytes
+        files = []
+        total = 0
+        for _, file in self.iter_files(latest_only=False):
+            size = file.stat().st_size
+            files.append((int(file.name.removesuffix(ARCHIVE_SUFFIX)), size, file))
+            total += size
+
+        removed = 0
+        for _, size, file in sorted(files):
+            if total <= self.max_bytes:
+                break
+            file.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        if removed:
+            self.log.debug(f"pruned {removed} archived feeds, {total} bytes left")
+        return removed
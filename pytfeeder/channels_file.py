@@ -0,0 +1,163 @@
+import os
+from pathlib import Path
+import re
+import tempfile
+from typing import Any
+
+import yaml
+
+from .models import Channel, ChannelDumper
+
+# the LibYAML based loader is several times faster, when available
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# the C emitter doesn't accept float("inf")
+DUMP_WIDTH = 2**31 - 1
+
+ChannelDumper.add_representer(Channel, Channel.to_yaml)
+
+# a channel line exactly as dumped by ChannelDumper (keys are sorted), with
+# a plain or single quoted title
+rx_channel_line = re.compile(
+    r"- \{channel_id: ([-_0-9a-zA-Z]{24})"
+    r"(, hidden: true)?"
+    r"(?:, tags: \[([\w.+/-]+(?:, [\w.+/-]+)*)?\])?"
+    r""", title: (?:'((?:[^']|'')*)'|([^\s'"\[\]{},#&*!|>%@`?:-][^\[\]{},]*))\}"""
+)
+rx_plain_tag = re.compile(r"[A-Za-z_][\w.+/-]*")
+# resolves plain scalars the way the loaders do (null, bool, int, float, dates)
+resolver = yaml.resolver.Resolver()
+
+
+def _is_plain_str(value: str) -> bool:
+    tag = resolver.resolve(yaml.ScalarNode, value, (True, False))
+    return tag == resolver.DEFAULT_SCALAR_TAG
+
+
+def _channel_fields(line: str) -> dict[str, Any] | None:
+    if (m := rx_channel_line.fullmatch(line)) is None:
+        return None
+    channel_id, hidden, tags, quoted_title, title = m.groups()
+    if title is not None:
+        title = title.rstrip(" ")
+        if ": " in title or " #" in title or title.endswith(":") or "\t" in title:
+            return None
+        # anything else might be resolved by yaml as a number, bool, date or null
+        if not _is_plain_str(title):
+            return None
+    else:
+        title = quoted_title.replace("''", "'")
+    d: dict[str, Any] = {"channel_id": channel_id, "title": title}
+    if hidden:
+        d["hidden"] = True
+    if tags:
+        d["tags"] = tags.split(", ")
+        if not all(rx_plain_tag.fullmatch(t) and _is_plain_str(t) for t in d["tags"]):
+            return None
+    return d
+
+
+def _load_lines(text: str) -> list[dict[str, Any]] | None:
+    # one channel per line, as the channels files are dumped. Lines of other
+    # flow mappings are loaded one by one, anything else gives up
+    items: list[dict[str, Any]] = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line:
+            continue
+        if (d := _channel_fields(line)) is not None:
+            items.append(d)
+            continue
+        if not (line.startswith("- {") and line.endswith("}")):
+            return None
+        try:
+            d = yaml.load(line[2:], Loader=SafeLoader)
+        except yaml.YAMLError:
+            return None
+        if not isinstance(d, dict):
+            return None
+        items.append(d)
+    return items
+
+
+def load_channels(file: Path) -> list[Channel]:
+    text = file.read_text()
+    if (items := _load_lines(text)) is None:
+        items = yaml.load(text, Loader=SafeLoader)
+        if items is None:
+            return []
+        if not isinstance(items, list):
+            raise ValueError(
+                f"Unexpected channels file yaml format ({type(items)}), should be collection of channels"
+            )
+    return [Channel(**c) for c in items]
+
+
+def dump_channels_yaml(channels: list[Channel]) -> str:
+    return yaml.dump(
+        channels, Dumper=ChannelDumper, allow_unicode=True, width=DUMP_WIDTH
+    )
+
+
+def write_atomic(file: Path, data: bytes) -> None:
+    # the file is either the old or the new one, even on a crash midway
+    file = Path(os.path.realpath(file))  # keeps symlinked dotfiles as links
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{file.name}.", dir=file.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            _ = f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if file.exists():
+            os.chmod(tmp_name, file.stat().st_mode & 0o7777)
+        os.replace(tmp_name, file)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+    dir_fd = os.open(file.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def dump_channels(file: Path, channels: list[Channel]) -> None:
+    write_atomic(file, dump_channels_yaml(channels).encode())
+
+
+def append_channels(file: Path, channels: list[Channel]) -> bool:
+    # appends to a block sequence without dumping the existing channels again,
+    # returns False when the file has to be rewritten instead. Still replaced
+    # atomically, as a crash midway would leave a broken last line
+    data = file.read_bytes()
+    head = data[:64].lstrip()
+    if head and not head.startswith(b"-"):
+        return False
+    if head and not data.endswith(b"\n"):
+        return False
+    write_atomic(file, data + dump_channels_yaml(channels).encode())
+    return True
+
+
+def update_channels(file: Path, channels: list[Channel]) -> bool:
+    # replaces the lines of the changed channels only, instead of dumping all
+    # of them again. Returns False when some line isn't found or is ambiguous
+    if not channels:
+        return True
+    prefixes = {f"- {{channel_id: {c.channel_id},": c for c in channels}
+    lines = file.read_text().splitlines(keepends=True)
+    found: set[str] = set()
+    for i, line in enumerate(lines):
+        if not line.startswith("- {channel_id: "):
+            continue
+        prefix = line[: line.find(",") + 1]
+        if (c := prefixes.get(prefix)) is None:
+            continue
+        if c.channel_id in found or not line.rstrip().endswith("}"):
+            return False
+        found.add(c.channel_id)
+        lines[i] = dump_channels_yaml([c])
+    if len(found) != len(prefixes):
+        return False
+    write_atomic(file, "".join(lines).encode())
+    return True
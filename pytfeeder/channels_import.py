@@ -0,0 +1,149 @@
+import asyncio
+from contextlib import asynccontextmanager
+import csv
+from dataclasses import dataclass, field
+import logging
+from pathlib import Path
+import re
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable
+from xml.etree.ElementTree import XML
+
+from .models import Channel
+from .utils import CHANNEL_INFO_CACHE_FILENAME, ChannelInfoCache, resolve_channel_info
+
+if TYPE_CHECKING:
+    from .network import HttpClient
+
+IMPORT_CONCURRENCY = 16
+
+rx_feed_channel_id = re.compile(r"[?&]channel_id=(UC[-_0-9a-zA-Z]{22})")
+rx_bare_channel_id = re.compile(r"^UC[-_0-9a-zA-Z]{22}$")
+rx_url_channel_id = re.compile(r"/channel/(UC[-_0-9a-zA-Z]{22})")
+
+# a channel known from the import file itself or an url to resolve
+ImportItem = Channel | str
+
+
+@dataclass
+class ImportReport:
+    added: list[Channel] = field(default_factory=list)
+    existing: list[Channel] = field(default_factory=list)
+    failed: list[tuple[str, str]] = field(default_factory=list)
+
+
+def parse_opml(raw: str) -> list[ImportItem]:
+    items: list[ImportItem] = []
+    for outline in XML(raw).iter("outline"):
+        xml_url = outline.get("xmlUrl", "")
+        title = outline.get("title") or outline.get("text")
+        if title and (m := rx_feed_channel_id.search(xml_url)):
+            items.append(Channel(title=title, channel_id=m[1]))
+        elif url := outline.get("htmlUrl") or xml_url:
+            items.append(url)
+    return items
+
+
+def parse_csv(raw: str) -> list[ImportItem]:
+    # YouTube takeout subscriptions.csv: Channel Id,Channel Url,Channel Title
+    items: list[ImportItem] = []
+    for row in csv.reader(raw.splitlines()):
+        if len(row) < 3 or not rx_bare_channel_id.match(row[0].strip()):
+            continue
+        channel_id, url, title = (v.strip() for v in row[:3])
+        items.append(Channel(title=title, channel_id=channel_id) if title else url)
+    return items
+
+
+def parse_urls(raw: str) -> list[ImportItem]:
+    items: list[ImportItem] = []
+    for line in raw.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if rx_bare_channel_id.match(line):
+            line = f"https://www.youtube.com/channel/{line}"
+        items.append(line)
+    return items
+
+
+def parse_import_file(path: Path) -> list[ImportItem]:
+    raw = path.read_text()
+    if raw.lstrip().startswith("<"):
+        return parse_opml(raw)
+    if path.suffix.lower() == ".csv":
+        return parse_csv(raw)
+    return parse_urls(raw)
+
+
+@asynccontextmanager
+async def channel_resolver(
+    http: "HttpClient", data_dir: Path
+) -> AsyncIterator[Callable[[str], Awaitable[Channel]]]:
+    cache = ChannelInfoCache(data_dir / CHANNEL_INFO_CACHE_FILENAME)
+    try:
+        yield lambda url: resolve_channel_info(http, url, cache)
+    finally:
+        cache.save()
+
+
+async def import_channels(
+    items: list[ImportItem],
+    known: list[Channel],
+    *,
+    resolve: Callable[[str], Awaitable[Channel]],
+    concurrency: int = IMPORT_CONCURRENCY,
+    on_done: Callable[[str], None] | None = None,
+    log: logging.Logger | None = None,
+) -> ImportReport:
+    # urls are resolved concurrently, the results keep the order of the items
+    log = log or logging.getLogger()
+    channels = {c.channel_id: c for c in known}
+    # no need to resolve urls of already known channels
+    items = [
+        (
+            channels.get(m[1], i)
+            if isinstance(i, str) and (m := rx_url_channel_id.search(i))
+            else i
+        )
+        for i in items
+    ]
+    urls = list(dict.fromkeys(i for i in items if isinstance(i, str)))
+    resolved: dict[str, Channel | Exception] = {}
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve_url(url: str) -> None:
+        async with semaphore:
+            try:
+                resolved[url] = await resolve(url)
+            except Exception as e:
+                log.error(f"can't resolve channel by url {url!r}: {e!r}")
+                resolved[url] = e
+        if on_done is not None:
+            on_done(url)
+
+    _ = await asyncio.gather(*(resolve_url(url) for url in urls))
+
+    report = ImportReport()
+    added_ids: set[str] = set()
+    for item in items:
+        if isinstance(item, str):
+            if item not in resolved:
+                # duplicated url, already handled
+                continue
+            channel = resolved.pop(item)
+            if isinstance(channel, Exception):
+                report.failed.append((item, str(channel) or repr(channel)))
+                continue
+        else:
+            channel = item
+
+        if existing := channels.get(channel.channel_id):
+            # duplicates within the import are not reported
+            if channel.channel_id not in added_ids:
+                report.existing.append(existing)
+            continue
+        added_ids.add(channel.channel_id)
+        channels[channel.channel_id] = channel
+        report.added.append(channel)
+    return report
@@ -0,0 +1,46 @@
+import json
+from pathlib import Path
+import socket
+from typing import Any, Iterator
+
+
+class ClientError(Exception):
+    pass
+
+
+def _connect(socket_path: Path, timeout: float | None) -> socket.socket:
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.settimeout(timeout)
+    try:
+        s.connect(str(socket_path))
+    except OSError as e:
+        s.close()
+        raise ClientError(f"Can't connect to {socket_path}: {e}")
+    return s
+
+
+def _parse_response(line: bytes) -> Any:
+    if not line:
+        raise ClientError("Connection closed by server")
+    resp = json.loads(line)
+    if not resp.get("ok"):
+        raise ClientError(resp.get("error", "Unknown error"))
+    return resp.get("result")
+
+
+def request(socket_path: Path, cmd: str, timeout: float = 60, **params: Any) -> Any:
+    req = json.dumps({"cmd": cmd, **params}).encode() + b"\n"
+    with _connect(socket_path, timeout) as s:
+        s.sendall(req)
+        with s.makefile("rb") as f:
+            line = f.readline()
+    return _parse_response(line)
+
+
+def subscribe(socket_path: Path) -> Iterator[dict[str, Any]]:
+    with _connect(socket_path, None) as s:
+        s.sendall(b'{"cmd": "subscribe"}\n')
+        with s.makefile("rb") as f:
+            _ = _parse_response(f.readline())
+            for line in f:
+                yield json.loads(line)
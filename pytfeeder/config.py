@@ -1,20 +1,20 @@
 import dataclasses as dc
-import os
 from pathlib import Path
-import tempfile
-import shutil
 
 import yaml
 
+from . import channels_file
+from .archive import RawArchiveConfig
 from .defaults import (
     default_data_path,
     default_channels_filepath,
     default_lockfile_path,
 )
 from .logger import LoggerConfig, LogLevel
-from .models import Channel, ChannelDumper
+from .models import Channel
+from .network import NetworkConfig
 from .utils import expand_path
-from pytfeeder.tui import ConfigTUI
+from .tui.config import ConfigTUI
 
 
 STORAGE_FILENAME = "pytfeeder.db"
@@ -30,6 +30,10 @@ class Config:
     tui: ConfigTUI
     lock_file: Path
     update_interval: int = DEFAULT_UPDATE_INTERVAL_MINS
+    sync_timeout: int = 0
+    parse_workers: int = 0
+    network: NetworkConfig = dc.field(default_factory=NetworkConfig)
+    raw_archive: RawArchiveConfig = dc.field(default_factory=RawArchiveConfig)
     __channels: list[Channel] = dc.field(default_factory=list, repr=False, kw_only=True)
     __visible_channels: list[Channel] = dc.field(
         default_factory=list, repr=False, kw_only=True
@@ -62,6 +66,8 @@ class Config:
         self.lock_file = lock_file or default_lockfile_path()
         self.logger = logger_config or LoggerConfig()
         self.tui = tui or ConfigTUI()
+        self.network = NetworkConfig()
+        self.raw_archive = RawArchiveConfig()
         self.skip_shorts = skip_shorts
 
         self.__is_data_dir_set = False
@@ -121,12 +127,24 @@ class Config:
             self.logger.update(logger_object)
         if tui_object := config_dict.get("tui"):
             self.tui.update(tui_object)
+        if network_object := config_dict.get("network"):
+            self.network.update(network_object)
+        if raw_archive_object := config_dict.get("raw_archive"):
+            self.raw_archive.update(raw_archive_object)
         if (skip_shorts := config_dict.get("skip_shorts")) is not None:
             self.skip_shorts = bool(skip_shorts)
         if (
             update_interval := config_dict.get("update_interval")
         ) is not None and update_interval >= 0:
             self.update_interval = update_interval
+        if (
+            sync_timeout := config_dict.get("sync_timeout")
+        ) is not None and sync_timeout >= 0:
+            self.sync_timeout = sync_timeout
+        if (
+            parse_workers := config_dict.get("parse_workers")
+        ) is not None and parse_workers >= 0:
+            self.parse_workers = parse_workers
 
     def _set_data_paths(
         self,
@@ -145,41 +163,35 @@ class Config:
 
     def _load_channels_from_file(self, file: Path) -> list[Channel]:
         try:
-            with file.open() as f:
-                channels_list = yaml.safe_load(f)
-                if channels_list is None:
-                    return []
-                if not isinstance(channels_list, list):
-                    raise ValueError(
-                        f"Unexpected channels file yaml format ({type(channels_list)}), should be collection of channels"
-                    )
-                channels_ = [Channel(**c) for c in channels_list]
-                return channels_
+            return channels_file.load_channels(file)
         except Exception as e:
             raise Exception(f"Error while loading channels: {e!r}")
 
-    def dump_channels(self) -> None:
-        ChannelDumper.add_representer(Channel, Channel.to_yaml)
-
-        fd, tmp_name = tempfile.mkstemp(prefix="channels", suffix=".yaml")
-        os.close(fd)
+    def add_channels(self, channels_: list[Channel]) -> None:
+        self.__channels.extend(channels_)
+        visible = [c for c in channels_ if not c.hidden]
+        self.__visible_channels.extend(visible)
+        self.__original_channels.extend(visible)
+        # appending keeps the rest of a big file untouched
+        if not channels_file.append_channels(self.channels_filepath, channels_):
+            self.dump_channels()
+
+    def update_channels(self, channels_: list[Channel]) -> None:
+        # saves changes (hidden, tags, title) of the given channels only
+        self.__visible_channels = [c for c in self.__channels if not c.hidden]
+        self.__original_channels = self.__visible_channels.copy()
+        try:
+            if channels_file.update_channels(self.channels_filepath, channels_):
+                return
+        except Exception as e:
+            raise Exception(f"Error while dumping channels: {e!s}")
+        self.dump_channels()
 
+    def dump_channels(self) -> None:
         try:
-            _ = shutil.copyfile(self.channels_filepath, tmp_name)
-            with self.channels_filepath.open("w") as f:
-                yaml.dump(
-                    self.all_channels,
-                    f,
-                    Dumper=ChannelDumper,
-                    allow_unicode=True,
-                    width=float("inf"),
-                )
+            channels_file.dump_channels(self.channels_filepath, self.all_channels)
         except Exception as e:
-            raise Exception(
-                f"Error while dumping channels: {e!s}\nBackup copied to {tmp_name}"
-            )
-        else:
-            os.remove(tmp_name)
+            raise Exception(f"Error while dumping channels: {e!s}")
 
     def dump(self) -> str:
         strtag = "tag:yaml.org,2002:str"
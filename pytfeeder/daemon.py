@@ -0,0 +1,97 @@
+import asyncio
+import json
+import logging
+from pathlib import Path
+import signal
+
+from . import metrics
+from .feeder import Feeder
+from .models import Entry, SyncReport
+from .server import Server
+
+
+class Daemon(Server):
+    def __init__(
+        self,
+        feeder: Feeder,
+        socket_path: Path,
+        hook_cmd: str | None = None,
+        metrics_file: Path | None = None,
+        log: logging.Logger | None = None,
+    ) -> None:
+        super().__init__(feeder, socket_path, log=log)
+        self.hook_cmd = hook_cmd
+        self.metrics_file = metrics_file
+        self.interval = max(1, self.feeder.config.update_interval) * 60
+        self._new_entries: list[Entry] = []
+        self.feeder.on_new_entries = self._new_entries.extend
+
+    async def run(self) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+
+        self.feeder.stor.open()
+        try:
+            await self.start()
+            # one pooled http session for all the sync cycles
+            async with self.feeder.http:
+                while True:
+                    _ = await self.sync(only_due=True)
+                    self.write_metrics()
+                    await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            self.log.info("daemon stopped")
+        finally:
+            await self.close()
+            self.feeder.stor.close()
+
+    async def sync(self, **kwargs) -> SyncReport:
+        report = await super().sync(**kwargs)
+        if report.error:
+            self.log.error(
+                f"sync failed ({len(report.failed)} channels failed): {report.error}"
+            )
+        if self._new_entries:
+            entries = self._new_entries.copy()
+            self._new_entries.clear()
+            await self.emit(entries)
+        return report
+
+    def write_metrics(self) -> None:
+        if self.metrics_file is None:
+            return
+        try:
+            metrics.REGISTRY.write(self.metrics_file)
+        except Exception as e:
+            self.log.error(f"can't write metrics to {self.metrics_file}: {e!r}")
+
+    async def emit(self, entries: list[Entry]) -> None:
+        rows = []
+        for e in entries:
+            row = e.to_dict()
+            row["channel_title"] = self.feeder.channel_title(e.channel_id)
+            rows.append(row)
+        self.log.info(f"{len(rows)} new entries")
+
+        await self.broadcast({"event": "new_entries", "entries": rows})
+
+        if not self.hook_cmd:
+            return
+        # only {count} is replaced, other braces are literal (jq, awk, ${VAR})
+        cmd = self.hook_cmd.replace("{count}", str(len(rows)))
+        self.log.info(f"executing {cmd!r}")
+        try:
+            proc = await asyncio.create_subprocess_shell(
+                cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            ndjson = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows)
+            _ = await proc.communicate(ndjson.encode())
+        except Exception as e:
+            self.log.error(f"hook {cmd!r} failed: {e!r}")
+            return
+        if proc.returncode != 0:
+            self.log.error(f"hook {cmd!r} exited with {proc.returncode}")
@@ -29,3 +29,9 @@ def default_data_path() -> Path:
 
 def default_lockfile_path() -> Path:
     return Path(gettempdir()) / "pytfeeder_update.lock"
+
+
+def default_socket_path() -> Path:
+    if xdg_runtime_dir := getenv("XDG_RUNTIME_DIR"):
+        return Path(xdg_runtime_dir) / "pytfeeder.sock"
+    return Path(gettempdir()) / "pytfeeder.sock"
@@ -1,10 +1,13 @@
 import argparse
-import asyncio
 from pathlib import Path
 import sys
+from typing import Any, Iterator
 
 from pytfeeder import Config, Feeder, Storage, utils, defaults, __version__
 from pytfeeder.logger import LogLevel, init_logger
+from pytfeeder.models import Channel
+from pytfeeder.output import OutputFormat, write_object, write_rows
+from pytfeeder.profiler import DEFAULT_SLOW_QUERY_MS, profile_storage
 
 STATS_FMT_KEYS = """
 stats-fmt keys:
@@ -32,22 +35,85 @@ def parse_args() -> argparse.Namespace:
         type=Path,
         help="Location of config file (default: %(default)s)",
     )
+    parser.add_argument(
+        "--channel-id",
+        metavar="ID",
+        help="Limit --feed output to single channel",
+    )
+    parser.add_argument(
+        "--channels",
+        action="store_true",
+        help="Prints channels stats",
+    )
     parser.add_argument(
         "--clean-cache",
         action="store_true",
         help="Remove old entries from database that was marked as deleted and execute VACUUM",
     )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Run sync loop every `update_interval` minutes and serve queries like --serve",
+    )
     parser.add_argument(
         "--delete-inactive",
         action="store_true",
         help="Remove entries with channel_id that unknown to channels.yaml and execute VACUUM",
     )
+    parser.add_argument(
+        "--due",
+        action="store_true",
+        help="Sync only channels that are due by adaptive per-channel schedule",
+    )
+    parser.add_argument(
+        "--feed",
+        action="store_true",
+        help="Prints feed entries (excluding hidden channels)",
+    )
+    parser.add_argument(
+        "--hook",
+        metavar="CMD",
+        help="Command executed by --daemon on new entries, gets entries as ndjson on stdin, {count} is replaced with the number of entries",
+    )
     parser.add_argument(
         "-H",
         "--ignore-hidden",
         action="store_true",
         help="Excludes updates count of hidden channels on --sync",
     )
+    parser.add_argument(
+        "-i",
+        "--import",
+        dest="import_file",
+        metavar="FILE",
+        type=Path,
+        help="Add channels to channels config from OPML, YouTube takeout CSV or a file with urls (one per line)",
+    )
+    output_group = parser.add_mutually_exclusive_group()
+    output_group.add_argument(
+        "-j",
+        "--json",
+        action="store_true",
+        help="Print --feed, --channels, --tags, --quarantined and --sync output as json",
+    )
+    output_group.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Print --feed, --channels, --tags, --quarantined and --sync output as newline delimited json",
+    )
+    parser.add_argument(
+        "-l",
+        "--limit",
+        type=int,
+        metavar="INT",
+        help="Limit --feed output entries count",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        type=Path,
+        help="Write metrics to PATH on exit (after each cycle with --daemon), json if PATH ends with .json, otherwise prometheus text format",
+    )
     parser.add_argument(
         "-p",
         "--dump-config",
@@ -57,15 +123,62 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "-f", "--stats-fmt", metavar="STR", help="Print formatted stats"
     )
+    parser.add_argument(
+        "--profile-sql",
+        nargs="?",
+        const=DEFAULT_SLOW_QUERY_MS,
+        type=float,
+        metavar="MS",
+        help="Log queries slower than MS (default: %(const)s) and print queries stats on exit",
+    )
+    parser.add_argument(
+        "-q",
+        "--quarantined",
+        action="store_true",
+        help="Prints channels skipped on sync after repeated failures",
+    )
+    parser.add_argument(
+        "--release",
+        nargs="*",
+        metavar="ID",
+        help="Release quarantined channels by channel id (all if no ids given)",
+    )
+    parser.add_argument(
+        "--replay",
+        nargs="?",
+        const="latest",
+        choices=("latest", "all"),
+        help="Parse and store archived raw feeds (see raw_archive in config) instead of fetching, latest per channel (default) or all",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Serve queries over unix socket (see pytfeeder-client)",
+    )
+    parser.add_argument(
+        "--socket",
+        default=defaults.default_socket_path(),
+        metavar="PATH",
+        type=Path,
+        help="Location of server socket (default: %(default)s)",
+    )
     parser.add_argument(
         "-s",
         "--sync",
         action="store_true",
-        help="Updates all feeds and prints new entries count",
+        help="Updates all feeds and prints new entries count (full per-channel report with --json/--ndjson)",
     )
     parser.add_argument(
         "-S", "--storage-stats", action="store_true", help="Prints storage stats"
     )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        metavar="SECS",
+        help="Time budget for --sync, overrides `sync_timeout` from config",
+    )
+    parser.add_argument("--tags", action="store_true", help="Prints tags stats")
     parser.add_argument(
         "-u", "--unwatched", action="store_true", help="Prints unwatched entries count"
     )
@@ -82,6 +195,14 @@ def parse_args() -> argparse.Namespace:
         action="version",
         version=f"%(prog)s {__version__}",
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Splits --sync across N processes, for very large subscription lists",
+    )
 
     return parser.parse_args()
 
@@ -91,11 +212,12 @@ def storage_stats(feeder: Feeder) -> str:
     max_title_len = max(max_title_len, 24)
     channels_map = {c.channel_id: c.title for c in feeder.config.all_channels}
     stats = feeder.stor.select_stats()
+    global_stats = feeder.global_stats()
 
-    total_total = feeder.stor.select_entries_count()
-    total_count = feeder.total_entries_count()
-    total_deleted = feeder.deleted_count()
-    total_new = feeder.unwatched_count()
+    total_total = global_stats.total
+    total_count = global_stats.count
+    total_deleted = global_stats.deleted
+    total_new = global_stats.unwatched
 
     c1, c2, c3, c4 = (
         max(len(str(total_count)), len("count")),
@@ -132,6 +254,40 @@ def storage_stats(feeder: Feeder) -> str:
     return f"{header}\n{channels_stats_str}{unknown_section}{total_stats_footer}\n"
 
 
+def feed_rows(
+    feeder: Feeder, channel_id: str | None = None, limit: int | None = None
+) -> Iterator[dict[str, Any]]:
+    for e in feeder.iter_feed(channel_id=channel_id, limit=limit):
+        row = e.to_dict()
+        row["channel_title"] = feeder.channel_title(e.channel_id)
+        yield row
+
+
+def channels_rows(feeder: Feeder) -> Iterator[dict[str, Any]]:
+    for channel_id, total, count, new, deleted in feeder.stor.iter_stats():
+        c = feeder.channel(channel_id)
+        yield {
+            "channel_id": channel_id,
+            "title": c.title if c else None,
+            "hidden": c.hidden if c else None,
+            "count": count,
+            "new": new,
+            "deleted": deleted,
+            "total": total,
+        }
+
+
+def quarantined_rows(feeder: Feeder) -> Iterator[dict[str, Any]]:
+    for c, st in feeder.quarantined_channels():
+        yield {
+            "channel_id": c.channel_id,
+            "title": c.title,
+            "fails": st.fails,
+            "last_fail": st.last_fail.isoformat() if st.last_fail else None,
+            "last_error": st.last_error,
+        }
+
+
 def storage_file_stats(storage_path: Path) -> str:
     from datetime import datetime
     import pwd
@@ -153,14 +309,12 @@ def stats_fmt_str(feeder: Feeder, fmt: str) -> str:
     last_update = ""
     channels_with_updates = ""
 
-    if "{count" in fmt:
-        count = feeder.total_entries_count()
-    if "{total" in fmt:
-        total = feeder.stor.select_entries_count()
-    if "{unwatched" in fmt:
-        unwatched = feeder.unwatched_count()
-    if "{deleted" in fmt:
-        deleted = feeder.deleted_count()
+    if any(f"{{{k}" in fmt for k in ("count", "total", "unwatched", "deleted")):
+        stats = feeder.global_stats()
+        count = stats.count
+        total = stats.total
+        unwatched = stats.unwatched
+        deleted = stats.deleted
     if "{last_update" in fmt:
         import re
 
@@ -191,6 +345,70 @@ def stats_fmt_str(feeder: Feeder, fmt: str) -> str:
     )
 
 
+def resolve_channel(config: Config, url: str) -> Channel:
+    import asyncio
+    from pytfeeder.channels_import import channel_resolver
+    from pytfeeder.network import HttpClient
+
+    async def run() -> Channel:
+        async with HttpClient(config.network) as http:
+            async with channel_resolver(http, config.data_dir) as resolve:
+                return await resolve(url)
+
+    return asyncio.run(run())
+
+
+def import_channels(config: Config, path: Path, verbose: bool = False) -> None:
+    import asyncio
+    from pytfeeder import channels_import
+    from pytfeeder.network import HttpClient
+
+    try:
+        items = channels_import.parse_import_file(path)
+    except Exception as e:
+        print(f"Error: can't read {path!s}: {e}")
+        sys.exit(1)
+
+    done = 0
+
+    def print_progress(_):
+        nonlocal done
+        done += 1
+        print(f"\033[0GResolving {done}/{urls_count}", end="", flush=True)
+
+    async def run() -> channels_import.ImportReport:
+        async with HttpClient(config.network) as http:
+            async with channels_import.channel_resolver(
+                http, config.data_dir
+            ) as resolve:
+                return await channels_import.import_channels(
+                    items,
+                    config.all_channels,
+                    resolve=resolve,
+                    on_done=print_progress if verbose and urls_count > 0 else None,
+                )
+
+    urls_count = sum(isinstance(i, str) for i in items)
+    report = asyncio.run(run())
+    if verbose and urls_count > 0:
+        print()
+    for url, error in report.failed:
+        print(f"Error: {url}: {error}", file=sys.stderr)
+
+    if report.added:
+        config.add_channels(report.added)
+    print(
+        f"{len(report.added)} channels added, {len(report.existing)} already exist, {len(report.failed)} failed"
+    )
+
+
+def write_metrics_at_exit(path: Path) -> None:
+    import atexit
+    from pytfeeder import metrics
+
+    atexit.register(metrics.REGISTRY.write, path)
+
+
 def main():
     args = parse_args()
     config = Config(config_file=args.config)
@@ -208,8 +426,7 @@ def main():
         config.logger.level = LogLevel.DEBUG
     init_logger(config.logger)
 
-    if args.add:
-        channel_url = args.add
+    if args.add or args.import_file:
         if not config.channels_filepath.exists():
             answ = input(
                 f"Channels file {config.channels_filepath} not exists,\ncreate it?: "
@@ -218,8 +435,14 @@ def main():
                 sys.exit(0)
             config.channels_filepath.touch(0o644, exist_ok=False)
 
+    if args.import_file:
+        import_channels(config, args.import_file, verbose=args.verbose > 0)
+        sys.exit(0)
+
+    if args.add:
+        channel_url = args.add
         try:
-            new_channel = utils.fetch_channel_info(channel_url)
+            new_channel = resolve_channel(config, channel_url)
         except Exception as e:
             print(f"Error: {e}")
             sys.exit(1)
@@ -231,12 +454,15 @@ def main():
                 f"Channel {channel.title!r} ({channel.channel_id = }) already exists in {config.channels_filepath!s}"
             )
             sys.exit(1)
-        config.all_channels.append(new_channel)
-        config.dump_channels()
+        config.add_channels([new_channel])
         print(f"{new_channel.title!r} just added")
         sys.exit(0)
 
     feeder = Feeder(config, Storage(config.storage_path))
+    if args.profile_sql is not None:
+        _ = profile_storage(feeder.stor, args.profile_sql)
+    if args.metrics and not args.daemon:
+        write_metrics_at_exit(args.metrics)
 
     if args.storage_stats:
         print(storage_stats(feeder))
@@ -247,6 +473,53 @@ def main():
         print(stats_fmt_str(feeder, args.stats_fmt))
         sys.exit(0)
 
+    output_format = OutputFormat.TEXT
+    if args.json:
+        output_format = OutputFormat.JSON
+    elif args.ndjson:
+        output_format = OutputFormat.NDJSON
+
+    if args.feed:
+        _ = write_rows(feed_rows(feeder, args.channel_id, args.limit), output_format)
+        sys.exit(0)
+
+    if args.channels:
+        _ = write_rows(channels_rows(feeder), output_format)
+        sys.exit(0)
+
+    if args.tags:
+        _ = write_rows((t.to_dict() for t in feeder.tags_map.values()), output_format)
+        sys.exit(0)
+
+    if args.quarantined:
+        _ = write_rows(quarantined_rows(feeder), output_format)
+        sys.exit(0)
+
+    if args.release is not None:
+        count = feeder.release_quarantine(args.release or None)
+        print(f"{count} channels were released")
+        sys.exit(0)
+
+    if args.daemon or args.serve:
+        import asyncio
+        from pytfeeder.daemon import Daemon
+        from pytfeeder.server import Server
+
+        if args.daemon:
+            coro = Daemon(
+                feeder, args.socket, hook_cmd=args.hook, metrics_file=args.metrics
+            ).run()
+        else:
+            coro = Server(feeder, args.socket).serve_forever()
+        try:
+            asyncio.run(coro)
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        sys.exit(0)
+
     if args.clean_cache:
         count = feeder.clean_cache()
         print(f"{count} entries were deleted")
@@ -256,17 +529,39 @@ def main():
         print(f"{count} entries were deleted")
         sys.exit(0)
 
+    if args.replay:
+        report = feeder.replay_archive(latest_only=args.replay == "latest")
+        if output_format is not OutputFormat.TEXT:
+            write_object(report.to_dict(), output_format)
+        elif report.error and not report.is_partial:
+            print(f"Error: {report.error}")
+        else:
+            print(report.new)
+            for r in report.failed:
+                print(f"Error: {r.channel_id}: {r.error}", file=sys.stderr)
+        sys.exit(0)
+
     if args.sync:
-        (new, err) = asyncio.run(
+        import asyncio
+
+        report = asyncio.run(
             feeder.sync_entries(
                 verbose=args.verbose > 0,
                 report_hidden=not args.ignore_hidden,
+                only_due=args.due,
+                timeout=args.timeout,
+                workers=args.workers,
             )
         )
-        if err:
-            print(f"Error: {err}")
+        if output_format is not OutputFormat.TEXT:
+            write_object(report.to_dict(), output_format)
+        elif report.error and not report.is_partial:
+            print(f"Error: {report.error}")
         else:
-            print(new)
+            print(report.new)
+            for r in report.failed:
+                title = feeder.channel_title(r.channel_id)
+                print(f"Error: {title!r} ({r.channel_id}): {r.error}", file=sys.stderr)
 
     elif args.unwatched:
         print(feeder.unwatched_count())
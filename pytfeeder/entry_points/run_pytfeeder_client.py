@@ -0,0 +1,126 @@
+import argparse
+import json
+from pathlib import Path
+import sys
+from typing import Any
+
+from pytfeeder import client, defaults, __version__
+
+COMMANDS = (
+    "ping",
+    "stats",
+    "channels",
+    "feed",
+    "mark_watched",
+    "mark_entries",
+    "sync",
+    "metrics",
+    "subscribe",
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Thin client for `pytfeeder --serve`",
+        epilog="example: %(prog)s -f '{title}' feed limit=10 unwatched_first=true",
+    )
+    parser.add_argument("cmd", choices=COMMANDS, help="Server command")
+    parser.add_argument(
+        "params",
+        nargs="*",
+        metavar="KEY=VALUE",
+        help="Command params, values parsed as json if possible",
+    )
+    parser.add_argument(
+        "-f",
+        "--fmt",
+        metavar="STR",
+        help="Format result object (or each object of result list) with format keys",
+    )
+    parser.add_argument(
+        "-s",
+        "--socket",
+        default=defaults.default_socket_path(),
+        metavar="PATH",
+        type=Path,
+        help="Server socket path (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        default=60,
+        metavar="SEC",
+        type=float,
+        help="Response timeout (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-V",
+        "--version",
+        action="version",
+        version=f"%(prog)s {__version__}",
+    )
+    return parser.parse_args()
+
+
+def parse_params(params: list[str]) -> dict[str, Any]:
+    d: dict[str, Any] = {}
+    for p in params:
+        k, sep, v = p.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid param {p!r}, should be KEY=VALUE")
+        try:
+            d[k] = json.loads(v)
+        except json.JSONDecodeError:
+            d[k] = v
+    return d
+
+
+def format_result(result: Any, fmt: str) -> str:
+    def format_obj(obj: dict[str, Any]) -> str:
+        return fmt.format(
+            **{k: "\n".join(v) if isinstance(v, list) else v for k, v in obj.items()}
+        )
+
+    if isinstance(result, dict):
+        return format_obj(result)
+    if isinstance(result, list):
+        return "\n".join(format_obj(r) for r in result)
+    return str(result)
+
+
+def print_events(args: argparse.Namespace) -> None:
+    for event in client.subscribe(args.socket):
+        if args.fmt:
+            print(format_result(event.get("entries", []), args.fmt), flush=True)
+        else:
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+
+
+def main():
+    args = parse_args()
+    if args.cmd == "subscribe":
+        try:
+            print_events(args)
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        sys.exit(0)
+
+    try:
+        result = client.request(
+            args.socket, args.cmd, timeout=args.timeout, **parse_params(args.params)
+        )
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.fmt:
+        print(format_result(result, args.fmt))
+    else:
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
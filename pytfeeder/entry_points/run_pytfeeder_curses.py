@@ -4,7 +4,7 @@ from enum import Enum, IntEnum, auto
 import re
 import sys
 
-from pytfeeder import Config, Feeder, Storage, __version__
+from pytfeeder import Config, Feeder, Storage, __version__, metrics
 from pytfeeder.logger import init_logger, LogLevel
 from pytfeeder.models import Channel, Entry, Tag
 from pytfeeder.tui import args as tui_args, ConfigTUI
@@ -59,6 +59,7 @@ class Key(IntEnum):
     s = ord("s")
     t = ord("t")
     u = ord("u")
+    x = ord("x")
     F1 = 265
     F2 = 266
     F3 = 267
@@ -135,7 +136,10 @@ class App(TuiApp):
         self.scroll_top = 0
 
     def start(self) -> None:
-        curses.wrapper(self._start)
+        try:
+            curses.wrapper(self._start)
+        finally:
+            self.close()
 
     def _start(self, screen: curses.window) -> None:
         self.config_curses()
@@ -144,6 +148,20 @@ class App(TuiApp):
         except KeyboardInterrupt:
             pass
 
+    async def sync_and_reload_cancelable(self, screen: curses.window) -> None:
+        task = asyncio.create_task(self.sync_and_reload())
+        screen.nodelay(True)
+        try:
+            while not task.done():
+                if screen.getch() == Key.ESC:
+                    self.cancel_sync()
+                    self.status_msg = "cancelling..."
+                    self.draw(screen)
+                await asyncio.sleep(0.05)
+        finally:
+            screen.nodelay(False)
+        await task
+
     def config_curses(self) -> None:
         curses.curs_set(0)
         if curses.has_colors():
@@ -197,9 +215,9 @@ class App(TuiApp):
                 case Key.r:
                     if self.page_state == PageState.RESTORING:
                         continue
-                    self.status_msg = "updating..."
+                    self.status_msg = "updating... (Esc to cancel)"
                     self.draw(screen)
-                    asyncio.run(self.sync_and_reload())
+                    self.run_async(self.sync_and_reload_cancelable(screen))
                 case curses.KEY_HOME:
                     self.move_top()
                 case Key.g:
@@ -271,7 +289,18 @@ class App(TuiApp):
                             )
                         )
                     )
+                case Key.x:
+                    self.toggle_selected()
                 case Key.CTRL_X | curses.KEY_DC:
+                    if (
+                        len(selected := self.selected_entries) > 1
+                        and not self.handle_input(
+                            screen,
+                            CLIType.CONFIRM,
+                            prefix=f"Delete {len(selected)} selected entries (y/N)?",
+                        )
+                    ):
+                        continue
                     if self.mark_as_deleted():
                         screen.clear()
                         if len(self.lines) == 0:
@@ -385,6 +414,10 @@ class App(TuiApp):
                         sys.exit(0)
 
     def draw(self, screen: curses.window) -> None:
+        with metrics.TUI_DRAW_SECONDS.time():
+            self._draw(screen)
+
+    def _draw(self, screen: curses.window) -> None:
         x = 0  # y = 0
         max_y, max_x = screen.getmaxyx()
         max_rows = max_y - self.statusbar_height
@@ -407,6 +440,8 @@ class App(TuiApp):
                 ):
                     attr = curses.A_DIM | curses.A_ITALIC
                 highlight = not line.data.is_viewed
+                if line.data.id in self.selected_ids:
+                    attr = curses.A_REVERSE
                 published = line.data.published.strftime(self.c.datetime_fmt)
                 text = self.current_entry_format.format(
                     index=index,
@@ -831,6 +866,15 @@ def main():
     init_logger(config.logger)
 
     feeder = Feeder(config, Storage(config.storage_path))
+    if args.profile_sql is not None:
+        from pytfeeder.profiler import profile_storage
+
+        _ = profile_storage(feeder.stor, args.profile_sql)
+    if args.metrics:
+        import atexit
+
+        atexit.register(metrics.REGISTRY.write, args.metrics)
+
     if len(feeder.channels) == 0:
         print(f"No channels configured in {feeder.config.channels_filepath}")
         sys.exit(0)
@@ -1,16 +1,41 @@
-import asyncio
+from dataclasses import replace
+import datetime as dt
 from functools import lru_cache, cached_property
 import logging
+import random
+import time
+from typing import TYPE_CHECKING, Any, Callable, Iterator
 
-from aiohttp import ClientSession, ClientTimeout
-
+from . import metrics
+from .archive import ARCHIVE_DIRNAME, FeedArchive
 from .config import Config
-from .models import Channel, Entry, Tag
+from .models import (
+    Channel,
+    ChannelSyncResult,
+    ChannelSyncState,
+    Entry,
+    GlobalStats,
+    SyncReport,
+    SyncStatus,
+    Tag,
+)
+from .network import HttpClient
 from .parser import YTFeedParser
+from .scheduler import Scheduler
 from .storage import Storage
 from .updater import Updater
 
+if TYPE_CHECKING:
+    import asyncio
+    from asyncio import Event
+    from aiohttp import ClientSession
+    from .pipeline import SyncPipeline
+    from .sharding import ShardPipeline
+
 YT_FEED_URL = "https://www.youtube.com/feeds/videos.xml?channel_id=%s"
+FETCH_MAX_ATTEMPTS = 3
+FETCH_BACKOFF_SECS = 0.5
+FETCH_RETRY_STATUSES = (404, 429, 500, 502, 503, 504)
 
 
 class Feeder:
@@ -19,14 +44,23 @@ class Feeder:
         config: Config,
         storage: Storage,
         log: logging.Logger | None = None,
+        on_new_entries: Callable[[list[Entry]], None] | None = None,
     ) -> None:
         self.stor = storage
+        self.on_new_entries = on_new_entries
         self.config = config
+        self.log = log or logging.getLogger()
         self.updater = Updater(
             lock_file=self.config.lock_file,
             update_interval=self.config.update_interval,
+            log=self.log,
         )
-        self.log = log or logging.getLogger()
+        self.scheduler = Scheduler(min_interval=self.config.update_interval)
+        self.feed_url = YT_FEED_URL
+        self.http = HttpClient(self.config.network, log=self.log)
+        self.archive: FeedArchive | None = None
+        if self.config.raw_archive.enabled:
+            self.archive = self.open_archive()
         self.__channels_map = {c.channel_id: c for c in self.config.all_channels}
 
     @cached_property
@@ -35,17 +69,18 @@ class Feeder:
         return self.config.channels
 
     def refresh_channels_stats(self) -> None:
-        stats = self.stor.select_channels_stats()
-        for c in self.config.channels:
-            stat = stats.get(c.channel_id)
-            if stat is None:
-                self.log.warning(f"No stats for {c!r} in db")
-                continue
-            count, unwatched = stat
-            c.entries_count = count
-            c.have_updates = bool(unwatched)
-            c.unwatched_count = unwatched
-        self._reset_tags()
+        with metrics.REFRESH_STATS_SECONDS.time():
+            stats = self.stor.select_channels_stats()
+            for c in self.config.channels:
+                stat = stats.get(c.channel_id)
+                if stat is None:
+                    self.log.warning(f"No stats for {c!r} in db")
+                    continue
+                count, unwatched = stat
+                c.entries_count = count
+                c.have_updates = bool(unwatched)
+                c.unwatched_count = unwatched
+            self._reset_tags()
 
     def _reset_channels(self) -> None:
         try:
@@ -81,11 +116,13 @@ class Feeder:
         channel_id: str,
         limit: int | None = None,
         unwatched_first: bool | None = None,
+        offset: int | None = None,
     ) -> list[Entry]:
         return self.stor.select_entries(
             channel_id=channel_id,
             limit=limit,
             unwatched_first=unwatched_first,
+            offset=offset,
         )
 
     def feed(
@@ -93,11 +130,26 @@ class Feeder:
         limit: int | None = None,
         unwatched_first: bool | None = None,
         include_unknown: bool = False,
+        offset: int | None = None,
     ) -> list[Entry]:
         return self.stor.select_entries(
             limit=limit,
             unwatched_first=unwatched_first,
             in_channels=None if include_unknown else self.config.channels,
+            offset=offset,
+        )
+
+    def iter_feed(
+        self,
+        channel_id: str | None = None,
+        limit: int | None = None,
+        unwatched_first: bool | None = None,
+    ) -> Iterator[Entry]:
+        return self.stor.iter_entries(
+            channel_id=channel_id,
+            limit=limit,
+            unwatched_first=unwatched_first,
+            in_channels=None if channel_id else self.config.channels,
         )
 
     @cached_property
@@ -137,6 +189,15 @@ class Feeder:
     def mark_entry_as_deleted(self, id: str) -> bool:
         return self.stor.mark_entry_as_deleted(id)
 
+    def mark_entries(
+        self,
+        ids: list[str],
+        *,
+        watched: bool | None = None,
+        deleted: bool | None = None,
+    ) -> int:
+        return self.stor.mark_entries(ids, watched=watched, deleted=deleted)
+
     def mark_channel_as_deleted(self, channel_id: str) -> int:
         return self.stor.mark_channel_entries_as_deleted(channel_id)
 
@@ -157,6 +218,9 @@ class Feeder:
             in_channels=None if channel_id else self.config.channels,
         )
 
+    def global_stats(self) -> GlobalStats:
+        return self.stor.select_global_stats(in_channels=self.config.channels)
+
     def restore_channel(self, c: Channel) -> int:
         return self.stor.restore_channel(c)
 
@@ -195,22 +259,144 @@ class Feeder:
         self,
         verbose: bool = False,
         report_hidden: bool = True,
-    ) -> tuple[int, Exception | None]:
-        failed = False
+        only_due: bool = False,
+        session: "ClientSession | None" = None,
+        timeout: float | None = None,
+        cancel: "Event | None" = None,
+        workers: int = 0,
+    ) -> SyncReport:
+        if not self.updater.lock():
+            self.log.info("another sync is running, waiting for its result")
+            if (result := await self.updater.wait_for_result()) is not None:
+                return SyncReport.from_dict(result)
+
+        report = SyncReport()
+        start = time.perf_counter()
         try:
-            self.log.debug(f"sync start: {verbose=!r}, {report_hidden=!r}")
-            r = await self._sync_entries(verbose=verbose, report_hidden=report_hidden)
+            self.log.debug(
+                f"sync start: {verbose=!r}, {report_hidden=!r}, {only_due=!r}"
+            )
+            states = self.stor.select_channels_sync_state()
+            if only_due:
+                channels = self.scheduler.due_channels(self.config.all_channels, states)
+            else:
+                channels = self.scheduler.active_channels(
+                    self.config.all_channels, states
+                )
+            self.log.debug(f"{len(channels)}/{len(self.config.all_channels)} to sync")
+            await self._sync_entries(
+                channels,
+                report,
+                states=states,
+                verbose=verbose,
+                report_hidden=report_hidden,
+                session=session,
+                timeout=timeout or self.config.sync_timeout or None,
+                cancel=cancel,
+                workers=workers,
+            )
+
+            synced = {r.channel_id for r in report.channels}
+            for c in self.config.all_channels:
+                if c.channel_id in synced:
+                    continue
+                status = SyncStatus.SKIPPED
+                if self.scheduler.is_quarantined(states.get(c.channel_id)):
+                    status = SyncStatus.QUARANTINED
+                report.channels.append(ChannelSyncResult(c.channel_id, status=status))
+            order = {c.channel_id: i for i, c in enumerate(self.config.all_channels)}
+            report.channels.sort(key=lambda r: order.get(r.channel_id, len(order)))
         except Exception as e:
-            failed = True
-            return 0, e
-        else:
-            return r, None
+            report.error = e
         finally:
-            self.updater.update_lock_file(failed)
+            report.duration = time.perf_counter() - start
+            metrics.SYNC_SECONDS.observe(report.duration)
+            for r in report.channels:
+                metrics.SYNC_CHANNELS.inc(status=r.status.name.lower())
+            try:
+                # unfinished channels go first on the next regular update,
+                # a timeboxed run is not a failed one
+                self.updater.update_lock_file(report.error is not None)
+            finally:
+                self.updater.unlock(report.to_dict())
+        return report
+
+    def open_archive(self) -> FeedArchive:
+        c = self.config.raw_archive
+        return FeedArchive(
+            self.config.data_dir / ARCHIVE_DIRNAME,
+            keep=c.keep,
+            max_bytes=c.max_size_mb * 1024 * 1024,
+            log=self.log,
+        )
+
+    def replay_archive(self, latest_only: bool = True) -> SyncReport:
+        # parses and stores archived responses instead of fetching them
+        archive = self.archive or self.open_archive()
+        channels = {c.channel_id for c in self.config.all_channels}
+        report = SyncReport()
+        start = time.perf_counter()
+        for channel_id, file in archive.iter_files(latest_only):
+            if channel_id not in channels:
+                continue
+            result = ChannelSyncResult(channel_id)
+            try:
+                raw = archive.read(file)
+                result.bytes = len(raw)
+                t = time.perf_counter()
+                parser = YTFeedParser(
+                    raw, skip_shorts=self.config.skip_shorts, log=self.log
+                )
+                result.parse_time = time.perf_counter() - t
+                t = time.perf_counter()
+                result.new = self.stor.add_entries(parser.entries)
+                result.db_time = time.perf_counter() - t
+            except Exception as e:
+                self.log.error(f"can't replay {file}: {e!r}")
+                result.status = SyncStatus.FAILED
+                result.error = str(e) or repr(e)
+                report.error = report.error or e
+            report.new += result.new
+            report.channels.append(result)
+        report.duration = time.perf_counter() - start
+        return report
+
+    def due_channels(self) -> list[Channel]:
+        return self.scheduler.due_channels(
+            self.config.all_channels, self.stor.select_channels_sync_state()
+        )
+
+    def quarantined_channels(self) -> list[tuple[Channel, ChannelSyncState]]:
+        states = self.stor.select_channels_sync_state()
+        return [
+            (c, st)
+            for c in self.config.all_channels
+            if self.scheduler.is_quarantined(st := states.get(c.channel_id))
+            and st is not None
+        ]
 
-    async def _sync_entries(self, *, verbose: bool, report_hidden: bool) -> int:
+    def release_quarantine(self, channel_ids: list[str] | None = None) -> int:
+        return self.stor.reset_channels_fails(channel_ids)
+
+    async def _sync_entries(
+        self,
+        channels: list[Channel],
+        report: SyncReport,
+        *,
+        states: dict[str, ChannelSyncState] | None = None,
+        verbose: bool,
+        report_hidden: bool,
+        session: "ClientSession | None" = None,
+        timeout: float | None = None,
+        cancel: "Event | None" = None,
+        workers: int = 0,
+    ) -> None:
+        states = states or {}
+        # least recently fetched first, so channels left unfinished by
+        # a deadline or cancellation go first on the next run
+        channels = sorted(channels, key=lambda c: last_fetch_key(states, c))
         current_done = 0
-        channels_count = len(self.config.all_channels)
+        channels_count = len(channels)
         w = len(str(channels_count))
 
         def print_progress(_):
@@ -220,69 +406,264 @@ class Feeder:
             if current_done == channels_count:
                 print()
 
+        from .pipeline import SyncPipeline
+
+        on_done = print_progress if verbose else None
+        if workers > 1:
+            from .sharding import sync_sharded
+
+            results = await sync_sharded(
+                self,
+                channels,
+                workers,
+                states=states,
+                timeout=timeout,
+                cancel=cancel,
+                on_done=on_done,
+            )
+        else:
+            pipeline = SyncPipeline(
+                self.stor,
+                skip_shorts=self.config.skip_shorts,
+                parse_workers=self.config.parse_workers,
+                on_new_entries=self.on_new_entries,
+                log=self.log,
+            )
+            async with pipeline:
+                if session is None:
+                    # kept open across syncs only if the caller opened it
+                    keep_open = self.http.is_open
+                    stats = replace(self.http.stats)
+                    try:
+                        results = await self._sync_channels(
+                            await self.http.session(),
+                            channels,
+                            pipeline,
+                            timeout,
+                            cancel,
+                            on_done,
+                            states,
+                        )
+                    finally:
+                        report.http = self.http.stats - stats
+                        if not keep_open:
+                            await self.http.close()
+                else:
+                    results = await self._sync_channels(
+                        session, channels, pipeline, timeout, cancel, on_done, states
+                    )
+
+        if self.archive is not None:
+            try:
+                _ = self.archive.prune()
+            except Exception as e:
+                self.log.error(f"can't prune feeds archive: {e!r}")
+
+        now = dt.datetime.now(dt.timezone.utc)
+        sync_states = []
+        validators = []
+        fails = []
+        for c, (result, err) in zip(channels, results):
+            report.channels.append(result)
+            if result.status == SyncStatus.CANCELLED:
+                continue
+            if err is not None:
+                fails.append((c.channel_id, now, result.error or ""))
+                st = states.get(c.channel_id)
+                if (st.fails if st else 0) + 1 >= self.scheduler.quarantine_after:
+                    self.log.warning(f"{c.title!r} ({c.channel_id}) is quarantined")
+                    result.status = SyncStatus.QUARANTINED
+                else:
+                    report.error = report.error or err
+                continue
+            sync_states.append((c.channel_id, now, now if result.new > 0 else None))
+            validators.append((c.channel_id, result.etag, result.last_modified))
+            if report_hidden or not c.hidden:
+                report.new += result.new
+        self.stor.update_channels_sync_state(sync_states)
+        self.stor.update_channels_validators(validators)
+        self.stor.update_channels_fails(fails)
+
+    async def _sync_channels(
+        self,
+        session: "ClientSession",
+        channels: list[Channel],
+        pipeline: "SyncPipeline | ShardPipeline",
+        timeout: float | None = None,
+        cancel: "Event | None" = None,
+        on_done: Callable[[Any], None] | None = None,
+        states: dict[str, ChannelSyncState] | None = None,
+    ) -> list[tuple[ChannelSyncResult, Exception | None]]:
+        import asyncio
+
+        states = states or {}
         tasks = []
-        async with ClientSession() as s:
-            for c in self.config.all_channels:
-                return_count = True
-                if not report_hidden:
-                    return_count = not c.hidden
-                t = asyncio.create_task(
-                    self._sync_channel(s, c, return_count=return_count)
-                )
-                if verbose:
-                    t.add_done_callback(print_progress)
-                tasks.append(t)
-
-            results = await asyncio.gather(*tasks)
-            sum_of_new = 0
-            for new, err in results:
-                if err is not None:
-                    raise err
-                sum_of_new += new
-            return sum_of_new
+        for c in channels:
+            t = asyncio.create_task(
+                self._sync_channel(session, c, pipeline, states.get(c.channel_id))
+            )
+            if on_done is not None:
+                t.add_done_callback(on_done)
+            tasks.append(t)
+
+        if (unfinished := await wait_tasks(tasks, timeout, cancel)) > 0:
+            reason = "cancelled" if cancel and cancel.is_set() else "timed out"
+            self.log.warning(f"sync {reason}, {unfinished} channels unfinished")
+        return [
+            (
+                (ChannelSyncResult(c.channel_id, status=SyncStatus.CANCELLED), None)
+                if t.cancelled()
+                else t.result()
+            )
+            for c, t in zip(channels, tasks)
+        ]
 
     async def _sync_channel(
         self,
-        session: ClientSession,
+        session: "ClientSession",
         channel: Channel,
-        *,
-        return_count: bool = True,
-    ) -> tuple[int, Exception | None]:
+        pipeline: "SyncPipeline | ShardPipeline",
+        state: ChannelSyncState | None = None,
+    ) -> tuple[ChannelSyncResult, Exception | None]:
+        result = ChannelSyncResult(channel.channel_id)
         try:
             self.log.debug(f"trying to sync {channel.title!r} ({channel.channel_id})")
-            count = await self._fetch_and_sync_entries(session, channel.channel_id)
+            await self._fetch_and_sync_entries(
+                session, channel.channel_id, result, pipeline, state
+            )
         except Exception as e:
             self.log.error(f"cannot sync channel ({channel.channel_id}): {e}")
-            return 0, e
-        if count > 0:
+            result.status = SyncStatus.FAILED
+            result.error = str(e) or repr(e)
+            return result, e
+        if result.new > 0:
             self.log.info(
-                f"{count} new entries for {channel.title!r} ({channel.channel_id})"
+                f"{result.new} new entries for {channel.title!r} ({channel.channel_id})"
             )
-        if return_count:
-            return count, None
-        return 0, None
+        return result, None
 
     async def _fetch_and_sync_entries(
-        self, session: ClientSession, channel_id: str
+        self,
+        session: "ClientSession",
+        channel_id: str,
+        result: ChannelSyncResult,
+        pipeline: "SyncPipeline | ShardPipeline",
+        state: ChannelSyncState | None = None,
     ) -> int:
-        url = YT_FEED_URL % channel_id
-        raw_feed = await self._fetch_feed(session, url)
-        parser = YTFeedParser(
-            raw_feed, skip_shorts=self.config.skip_shorts, log=self.log
-        )
-        if len(parser.entries) == 0 and not self.config.skip_shorts:
+        url = self.feed_url % channel_id
+        raw_feed = await self._fetch_feed(session, url, result, state)
+        if result.http_status == 304:
+            result.status = SyncStatus.NOT_MODIFIED
+            return 0
+
+        if self.archive is not None:
+            await pipeline.archive(self.archive, channel_id, raw_feed)
+        entries, result.parse_time = await pipeline.parse(raw_feed)
+        if len(entries) == 0 and not self.config.skip_shorts:
             self.log.error(f"can't parse feed for {url}\n{raw_feed[:80]!r}")
             return 0
-        return self.stor.add_entries(parser.entries)
-
-    async def _fetch_feed(self, session: ClientSession, url: str) -> str:
-        max_attempt = 2
-        for attempt in range(max_attempt):
-            async with session.get(url, timeout=ClientTimeout(total=10)) as resp:
-                self.log.debug(f"{resp.status} {resp.reason} {resp.url}")
-                if resp.status == 404 and attempt < max_attempt - 1:
-                    await asyncio.sleep(0.9)
-                    continue
-                resp.raise_for_status()
-                return await resp.text()
+
+        result.new, result.db_time = await pipeline.write(entries)
+        return result.new
+
+    async def _fetch_feed(
+        self,
+        session: "ClientSession",
+        url: str,
+        result: ChannelSyncResult | None = None,
+        state: ChannelSyncState | None = None,
+    ) -> bytes:
+        import asyncio
+        from aiohttp import ClientConnectionError
+
+        result = result or ChannelSyncResult("")
+        # conditional request, answered with an empty 304 if the feed is unchanged
+        headers = {}
+        if state is not None and state.etag:
+            headers["If-None-Match"] = state.etag
+        if state is not None and state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+        for attempt in range(FETCH_MAX_ATTEMPTS):
+            retry = attempt < FETCH_MAX_ATTEMPTS - 1
+            result.attempts = attempt + 1
+            # the latency doesn't count the wait for a free connection
+            async with self.http.slot():
+                start = time.perf_counter()
+                try:
+                    async with session.get(
+                        url, headers=headers, timeout=self.http.request_timeout()
+                    ) as resp:
+                        self.log.debug(f"{resp.status} {resp.reason} {resp.url}")
+                        result.http_status = resp.status
+                        if not (retry and resp.status in FETCH_RETRY_STATUSES):
+                            resp.raise_for_status()
+                            # a 304 may omit the validators, the sent ones still hold
+                            sent = headers if resp.status == 304 else {}
+                            result.etag = resp.headers.get(
+                                "ETag", sent.get("If-None-Match")
+                            )
+                            result.last_modified = resp.headers.get(
+                                "Last-Modified", sent.get("If-Modified-Since")
+                            )
+                            body = await resp.read()
+                            result.latency = time.perf_counter() - start
+                            result.bytes = len(body)
+                            metrics.FETCH_SECONDS.observe(
+                                result.latency, status=resp.status
+                            )
+                            metrics.FETCH_BYTES.inc(len(body))
+                            # the parser works on bytes and decodes only what it needs
+                            return body
+                    metrics.FETCH_SECONDS.observe(
+                        time.perf_counter() - start, status=resp.status
+                    )
+                except (ClientConnectionError, asyncio.TimeoutError) as e:
+                    metrics.FETCH_SECONDS.observe(
+                        time.perf_counter() - start, status=type(e).__name__
+                    )
+                    if not retry:
+                        raise
+                    self.log.debug(f"{e!r} on {url}")
+            metrics.FETCH_RETRIES.inc()
+            await asyncio.sleep(backoff_delay(attempt))
         raise Exception(f"Failed after retrying: {url}")
+
+
+async def wait_tasks(
+    tasks: "list[asyncio.Future[Any]]",
+    timeout: float | None = None,
+    cancel: "Event | None" = None,
+) -> int:
+    # waits for all the tasks, until the deadline or the cancel event, whichever
+    # comes first. Returns the count of unfinished (cancelled) tasks
+    import asyncio
+
+    if not tasks:
+        return 0
+    waiters = [asyncio.ensure_future(asyncio.wait(tasks))]
+    if cancel is not None:
+        waiters.append(asyncio.create_task(cancel.wait()))
+    try:
+        _ = await asyncio.wait(
+            waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        for t in waiters + tasks:
+            _ = t.cancel()
+        _ = await asyncio.gather(*tasks, return_exceptions=True)
+    return sum(t.cancelled() for t in tasks)
+
+
+def last_fetch_key(
+    states: dict[str, ChannelSyncState], c: Channel
+) -> tuple[bool, dt.datetime]:
+    st = states.get(c.channel_id)
+    if st is None or st.last_fetch is None:
+        return False, dt.datetime.min.replace(tzinfo=dt.timezone.utc)
+    return True, st.last_fetch
+
+
+def backoff_delay(attempt: int, base: float = FETCH_BACKOFF_SECS) -> float:
+    # exponential backoff with "equal jitter": [base*2^n/2, base*2^n)
+    delay = base * 2**attempt
+    return delay / 2 + random.uniform(0, delay / 2)
@@ -0,0 +1,207 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+import json
+import os
+from pathlib import Path
+import time
+from typing import Any, Iterator
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    pairs = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = _labels(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels: Any) -> float:
+        return self.values.get(_labels(labels), 0)
+
+    def expose(self) -> Iterator[str]:
+        for labels, v in self.values.items():
+            yield f"{self.name}{_format_labels(labels)} {v:g}"
+
+    def to_dict(self) -> list[dict[str, Any]]:
+        return [{"labels": dict(k), "value": v} for k, v in self.values.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        # per labels: [counts per bucket (last is +Inf)..., sum]
+        self.values: dict[Labels, list[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        v = self.values.get(key)
+        if v is None:
+            v = self.values[key] = [0] * (len(self.buckets) + 2)
+        v[bisect_left(self.buckets, value)] += 1
+        v[-1] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: Any) -> int:
+        v = self.values.get(_labels(labels))
+        return int(sum(v[:-1])) if v else 0
+
+    def sum(self, **labels: Any) -> float:
+        v = self.values.get(_labels(labels))
+        return v[-1] if v else 0.0
+
+    def expose(self) -> Iterator[str]:
+        for labels, v in self.values.items():
+            cumulative = 0
+            for le, n in zip((*self.buckets, "+Inf"), v[:-1]):
+                cumulative += n
+                le_label = f'le="{le}"'
+                yield f"{self.name}_bucket{_format_labels(labels, le_label)} {cumulative:g}"
+            yield f"{self.name}_sum{_format_labels(labels)} {v[-1]:g}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative:g}"
+
+    def to_dict(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "labels": dict(k),
+                "count": int(sum(v[:-1])),
+                "sum": v[-1],
+                "buckets": {str(le): n for le, n in zip((*self.buckets, "+Inf"), v)},
+            }
+            for k, v in self.values.items()
+        ]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: dict[str, Counter | Histogram] = {}
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        m = self.metrics.get(name)
+        if m is None:
+            m = self.metrics[name] = Counter(name, help)
+        assert isinstance(m, Counter), f"{name!r} is not a counter"
+        return m
+
+    def histogram(
+        self, name: str, help: str = "", buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        m = self.metrics.get(name)
+        if m is None:
+            m = self.metrics[name] = Histogram(name, help, buckets)
+        assert isinstance(m, Histogram), f"{name!r} is not a histogram"
+        return m
+
+    def reset(self) -> None:
+        for m in self.metrics.values():
+            m.values.clear()
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for m in self.metrics.values():
+            if not m.values:
+                continue
+            if m.help:
+                lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.expose())
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            m.name: {"type": m.kind, "help": m.help, "values": m.to_dict()}
+            for m in self.metrics.values()
+            if m.values
+        }
+
+    def write(self, path: Path) -> None:
+        # atomic replace, so scrapers never see a partially written file
+        if path.suffix == ".json":
+            data = json.dumps(self.to_dict(), indent=2) + "\n"
+        else:
+            data = self.to_prometheus()
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        _ = tmp.write_text(data)
+        os.replace(tmp, path)
+
+
+REGISTRY = Registry()
+
+FETCH_SECONDS = REGISTRY.histogram(
+    "pytfeeder_fetch_seconds", "Feed request latency by HTTP status"
+)
+FETCH_BYTES = REGISTRY.counter("pytfeeder_fetch_bytes_total", "Feed bytes received")
+FETCH_RETRIES = REGISTRY.counter("pytfeeder_fetch_retries_total", "Feed retries")
+PARSE_SECONDS = REGISTRY.histogram("pytfeeder_parse_seconds", "Feed parse time")
+PARSED_ENTRIES = REGISTRY.counter(
+    "pytfeeder_parsed_entries_total", "Entries parsed from feeds"
+)
+DB_WRITE_SECONDS = REGISTRY.histogram(
+    "pytfeeder_db_write_seconds", "Entries write time by operation"
+)
+DB_NEW_ENTRIES = REGISTRY.counter(
+    "pytfeeder_db_new_entries_total", "New entries stored"
+)
+SYNC_SECONDS = REGISTRY.histogram(
+    "pytfeeder_sync_seconds",
+    "Whole sync duration",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+SYNC_CHANNELS = REGISTRY.counter(
+    "pytfeeder_sync_channels_total", "Synced channels by status"
+)
+REFRESH_STATS_SECONDS = REGISTRY.histogram(
+    "pytfeeder_refresh_channels_stats_seconds", "Channels stats refresh time"
+)
+TUI_LINES_SECONDS = REGISTRY.histogram(
+    "pytfeeder_tui_get_lines_seconds", "TUI entries lines load time"
+)
+TUI_DRAW_SECONDS = REGISTRY.histogram(
+    "pytfeeder_tui_draw_seconds", "TUI screen draw time"
+)
@@ -0,0 +1,7 @@
+PRAGMA user_version=3;
+
+CREATE TABLE tb_channels_sync (
+    channel_id TEXT     NOT NULL PRIMARY KEY,
+    last_fetch DATETIME,
+    last_new   DATETIME
+);
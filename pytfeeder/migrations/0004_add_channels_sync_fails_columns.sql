@@ -0,0 +1,10 @@
+PRAGMA user_version=4;
+
+ALTER TABLE tb_channels_sync
+ADD COLUMN fails INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE tb_channels_sync
+ADD COLUMN last_fail DATETIME;
+
+ALTER TABLE tb_channels_sync
+ADD COLUMN last_error TEXT;
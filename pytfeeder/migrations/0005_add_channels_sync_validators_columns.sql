@@ -0,0 +1,7 @@
+PRAGMA user_version=5;
+
+ALTER TABLE tb_channels_sync
+ADD COLUMN etag TEXT;
+
+ALTER TABLE tb_channels_sync
+ADD COLUMN last_modified TEXT;
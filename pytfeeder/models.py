@@ -1,5 +1,6 @@
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 import datetime as dt
+from enum import Enum, auto
 from typing import Any
 
 import yaml
@@ -14,6 +15,16 @@ class Entry:
     is_viewed: bool = False
     is_deleted: bool = False
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "channel_id": self.channel_id,
+            "published": self.published.isoformat(),
+            "is_viewed": self.is_viewed,
+            "is_deleted": self.is_deleted,
+        }
+
     def __eq__(self, obj: object) -> bool:
         if not isinstance(obj, Entry):
             return False
@@ -28,8 +39,10 @@ class InvalidChannelError(ValueError):
     pass
 
 
-class ChannelDumper(yaml.SafeDumper):
-    pass
+class ChannelDumper(getattr(yaml, "CSafeDumper", yaml.SafeDumper)):
+    # no anchors for shared tags lists, every channel stays on its own line
+    def ignore_aliases(self, data: Any) -> bool:
+        return True
 
 
 @dataclass
@@ -51,6 +64,17 @@ class Channel:
                 f"Invalid channel_id {len(self.channel_id) = } ({self.channel_id!r}), should be 24)"
             )
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "channel_id": self.channel_id,
+            "title": self.title,
+            "entries_count": self.entries_count,
+            "unwatched_count": self.unwatched_count,
+            "have_updates": self.have_updates,
+            "hidden": self.hidden,
+            "tags": self.tags,
+        }
+
     @staticmethod
     def to_yaml(dumper: ChannelDumper, c: "Channel") -> yaml.MappingNode:
         d: dict[str, Any] = {"channel_id": c.channel_id, "title": c.title}
@@ -68,3 +92,161 @@ class Tag:
     entries_count: int = 0
     have_updates: bool = False
     unwatched_count: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "title": self.title,
+            "channels": [c.channel_id for c in self.channels],
+            "entries_count": self.entries_count,
+            "unwatched_count": self.unwatched_count,
+            "have_updates": self.have_updates,
+        }
+
+
+@dataclass
+class GlobalStats:
+    total: int = 0
+    count: int = 0
+    deleted: int = 0
+    unwatched: int = 0
+    feed_count: int = 0
+
+
+@dataclass
+class ChannelSyncState:
+    channel_id: str
+    entries_count: int = 0
+    first_published: dt.datetime | None = None
+    last_published: dt.datetime | None = None
+    last_fetch: dt.datetime | None = None
+    last_new: dt.datetime | None = None
+    fails: int = 0
+    last_fail: dt.datetime | None = None
+    last_error: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def upload_interval(self) -> dt.timedelta | None:
+        if (
+            self.entries_count < 2
+            or self.first_published is None
+            or self.last_published is None
+        ):
+            return None
+        return (self.last_published - self.first_published) / (self.entries_count - 1)
+
+
+class SyncStatus(Enum):
+    OK = auto()
+    NOT_MODIFIED = auto()
+    FAILED = auto()
+    SKIPPED = auto()
+    QUARANTINED = auto()
+    CANCELLED = auto()
+
+
+@dataclass
+class ChannelSyncResult:
+    channel_id: str
+    status: SyncStatus = SyncStatus.OK
+    new: int = 0
+    http_status: int | None = None
+    attempts: int = 0
+    bytes: int = 0
+    latency: float = 0.0
+    parse_time: float = 0.0
+    db_time: float = 0.0
+    error: str | None = None
+    # validators of the response, stored for the next conditional request
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "channel_id": self.channel_id,
+            "status": self.status.name.lower(),
+            "new": self.new,
+            "http_status": self.http_status,
+            "attempts": self.attempts,
+            "bytes": self.bytes,
+            "latency": round(self.latency, 6),
+            "parse_time": round(self.parse_time, 6),
+            "db_time": round(self.db_time, 6),
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "ChannelSyncResult":
+        return cls(**(d | {"status": SyncStatus[d["status"].upper()]}))
+
+
+@dataclass
+class HttpStats:
+    requests: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    queued: int = 0
+    queued_time: float = 0.0
+    dns_cache_hits: int = 0
+    dns_cache_misses: int = 0
+
+    def __sub__(self, other: "HttpStats") -> "HttpStats":
+        return HttpStats(**{k: v - getattr(other, k) for k, v in asdict(self).items()})
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self) | {"queued_time": round(self.queued_time, 6)}
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "HttpStats":
+        return cls(**d)
+
+
+@dataclass
+class SyncReport:
+    new: int = 0
+    error: Exception | None = None
+    channels: list[ChannelSyncResult] = field(default_factory=list)
+    started: dt.datetime = field(
+        default_factory=lambda: dt.datetime.now(dt.timezone.utc)
+    )
+    duration: float = 0.0
+    http: HttpStats | None = None
+
+    def with_status(self, *statuses: SyncStatus) -> list[ChannelSyncResult]:
+        return [c for c in self.channels if c.status in statuses]
+
+    @property
+    def failed(self) -> list[ChannelSyncResult]:
+        return self.with_status(SyncStatus.FAILED)
+
+    @property
+    def remaining(self) -> list[ChannelSyncResult]:
+        return self.with_status(SyncStatus.CANCELLED)
+
+    @property
+    def is_partial(self) -> bool:
+        return self.error is not None and len(self.failed) < len(
+            self.with_status(SyncStatus.OK, SyncStatus.NOT_MODIFIED, SyncStatus.FAILED)
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "new": self.new,
+            "error": str(self.error) if self.error else None,
+            "started": self.started.isoformat(),
+            "duration": round(self.duration, 6),
+            "http": self.http.to_dict() if self.http else None,
+            "channels": [c.to_dict() for c in self.channels],
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "SyncReport":
+        return cls(
+            new=d.get("new", 0),
+            error=Exception(d["error"]) if d.get("error") else None,
+            channels=[ChannelSyncResult.from_dict(c) for c in d.get("channels", [])],
+            started=dt.datetime.fromisoformat(d["started"]),
+            duration=d.get("duration", 0.0),
+            http=HttpStats.from_dict(d["http"]) if d.get("http") else None,
+        )
@@ -0,0 +1,176 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import logging
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+from .models import HttpStats
+
+if TYPE_CHECKING:
+    from asyncio import AbstractEventLoop, Semaphore
+    from aiohttp import ClientSession, ClientTimeout, TraceConfig
+
+
+@dataclass
+class NetworkConfig:
+    compression: bool = True
+    dns_cache_ttl: int = 300
+    keepalive_timeout: int = 30
+    limit: int = 100
+    limit_per_host: int = 0
+    timeout: int = 10
+
+    def update(self, kwargs: dict[str, Any]) -> None:
+        for k, v in kwargs.items():
+            if k in vars(self) and v is not None:
+                setattr(self, k, type(getattr(self, k))(v))
+
+    def __repr__(self) -> str:
+        repr_str = "network:\n"
+        for k, v in sorted(vars(self).items()):
+            repr_str += f"  {k}: {v!r}\n"
+        return repr_str
+
+
+class HttpClient:
+    # a single pooled session reused across syncs, so keep-alive connections
+    # and the DNS cache survive between them
+    def __init__(
+        self, config: NetworkConfig | None = None, log: logging.Logger | None = None
+    ) -> None:
+        self.config = config or NetworkConfig()
+        self.log = log or logging.getLogger()
+        self.stats = HttpStats()
+        self._session: "ClientSession | None" = None
+        self._loop: "AbstractEventLoop | None" = None
+        self._slots: "Semaphore | None" = None
+        self._slots_loop: "AbstractEventLoop | None" = None
+
+    @property
+    def is_open(self) -> bool:
+        import asyncio
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        return (
+            self._session is not None
+            and not self._session.closed
+            and self._loop is loop
+        )
+
+    async def session(self) -> "ClientSession":
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        # the session is bound to the loop it was created in
+        if self._session is not None and (
+            self._session.closed or self._loop is not loop
+        ):
+            self._session = None
+
+        if self._session is None:
+            self._session = self._create_session()
+            self._loop = loop
+        return self._session
+
+    async def open(self) -> None:
+        _ = await self.session()
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    async def __aenter__(self) -> "HttpClient":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        # requests wait here for a free connection instead of in the pool, so
+        # their total timeout only starts once they can actually run: with
+        # thousands of channels the wait alone can exceed it
+        import asyncio
+
+        limits = [n for n in (self.config.limit, self.config.limit_per_host) if n > 0]
+        if not limits:
+            yield
+            return
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(min(limits))
+            self._slots_loop = loop
+        async with self._slots:
+            yield
+
+    def request_timeout(self) -> "ClientTimeout":
+        from aiohttp import ClientTimeout
+
+        # total bounds a slowly trickling response too, not only the idle time
+        # between reads
+        t = self.config.timeout
+        return ClientTimeout(total=t, sock_connect=t, sock_read=t)
+
+    def _create_session(self) -> "ClientSession":
+        from aiohttp import ClientSession, TCPConnector
+
+        c = self.config
+        connector = TCPConnector(
+            limit=c.limit,
+            limit_per_host=c.limit_per_host,
+            ttl_dns_cache=c.dns_cache_ttl or None,
+            use_dns_cache=c.dns_cache_ttl > 0,
+            keepalive_timeout=c.keepalive_timeout,
+        )
+        # aiohttp asks for gzip/deflate (and br with brotli installed) by default
+        headers = {} if c.compression else {"Accept-Encoding": "identity"}
+        self.log.debug(f"new http session: {c!r}")
+        return ClientSession(
+            connector=connector,
+            headers=headers,
+            timeout=self.request_timeout(),
+            trace_configs=[self._trace_config()],
+        )
+
+    def _trace_config(self) -> "TraceConfig":
+        from aiohttp import TraceConfig
+
+        stats = self.stats
+
+        async def on_request_start(_s, _ctx, _p) -> None:
+            stats.requests += 1
+
+        async def on_connection_create_end(_s, _ctx, _p) -> None:
+            stats.connections_created += 1
+
+        async def on_connection_reuseconn(_s, _ctx, _p) -> None:
+            stats.connections_reused += 1
+
+        async def on_connection_queued_start(_s, ctx, _p) -> None:
+            stats.queued += 1
+            ctx.queued_start = time.perf_counter()
+
+        async def on_connection_queued_end(_s, ctx, _p) -> None:
+            stats.queued_time += time.perf_counter() - ctx.queued_start
+
+        async def on_dns_cache_hit(_s, _ctx, _p) -> None:
+            stats.dns_cache_hits += 1
+
+        async def on_dns_cache_miss(_s, _ctx, _p) -> None:
+            stats.dns_cache_misses += 1
+
+        tc = TraceConfig()
+        tc.on_request_start.append(on_request_start)
+        tc.on_connection_create_end.append(on_connection_create_end)
+        tc.on_connection_reuseconn.append(on_connection_reuseconn)
+        tc.on_connection_queued_start.append(on_connection_queued_start)
+        tc.on_connection_queued_end.append(on_connection_queued_end)
+        tc.on_dns_cache_hit.append(on_dns_cache_hit)
+        tc.on_dns_cache_miss.append(on_dns_cache_miss)
+        return tc
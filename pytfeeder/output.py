@@ -0,0 +1,53 @@
+from enum import Enum, auto
+import json
+import sys
+from typing import Any, Iterable, TextIO
+
+
+class OutputFormat(Enum):
+    TEXT = auto()
+    JSON = auto()
+    NDJSON = auto()
+
+
+def _text_value(v: Any) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, list):
+        return ",".join(map(str, v))
+    return str(v)
+
+
+def write_rows(
+    rows: Iterable[dict[str, Any]],
+    fmt: OutputFormat = OutputFormat.TEXT,
+    file: TextIO = sys.stdout,
+) -> int:
+    count = 0
+    if fmt is OutputFormat.JSON:
+        file.write("[")
+    for row in rows:
+        match fmt:
+            case OutputFormat.JSON:
+                file.write(
+                    (", " if count else "") + json.dumps(row, ensure_ascii=False)
+                )
+            case OutputFormat.NDJSON:
+                file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            case OutputFormat.TEXT:
+                file.write("\t".join(map(_text_value, row.values())) + "\n")
+        count += 1
+    if fmt is OutputFormat.JSON:
+        file.write("]\n")
+    return count
+
+
+def write_object(
+    obj: dict[str, Any],
+    fmt: OutputFormat = OutputFormat.TEXT,
+    file: TextIO = sys.stdout,
+) -> None:
+    if fmt is OutputFormat.TEXT:
+        file.write("\t".join(map(_text_value, obj.values())) + "\n")
+    else:
+        file.write(json.dumps(obj, ensure_ascii=False) + "\n")
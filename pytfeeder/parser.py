@@ -1,58 +1,224 @@
 import datetime as dt
+from functools import cache
+from importlib.util import find_spec
 import logging
 import re
+import time
+from typing import Any, Callable, Iterator
 from xml.etree.ElementTree import XML
 
+from . import metrics
 from .models import Entry
 
 rx_id = re.compile(r"^[A-Za-z0-9\-_]{11}$")
 rx_channel_id = re.compile(r"^[A-Za-z0-9\-_]{24}$")
 rx_datetime = re.compile(r"^\d{4}-\d{2}-\d{2}[T\s]\d{2}\:\d{2}\:\d{2}\+\d{2}\:\d{2}$")
 
-SCHEMA = "{http://www.w3.org/2005/Atom}%s"
-NAMESPACE = {"yt": "http://www.youtube.com/xml/schemas/2015"}
+ATOM_NS = "http://www.w3.org/2005/Atom"
+YT_NS = "http://www.youtube.com/xml/schemas/2015"
+SCHEMA = f"{{{ATOM_NS}}}%s"
+NAMESPACE = {"yt": YT_NS}
+
+# (id, channel_id, title, published, is_shorts)
+RawEntry = tuple[str | None, str | None, str | None, str | None, bool]
+Backend = Callable[[bytes], Iterator[RawEntry]]
+
+
+class UnsupportedLayout(Exception):
+    pass
+
+
+def etree_entries(raw: bytes) -> Iterator[RawEntry]:
+    tree = XML(raw)
+    for entry in tree.findall(SCHEMA % "entry"):
+        is_shorts = False
+        link = entry.find(SCHEMA % "link")
+        if link is not None and link.attrib.get("rel") == "alternate":
+            is_shorts = link.attrib.get("href", "").find("/shorts/") != -1
+        yield (
+            entry.findtext("yt:videoId", namespaces=NAMESPACE),
+            entry.findtext("yt:channelId", namespaces=NAMESPACE),
+            entry.findtext(SCHEMA % "title"),
+            entry.findtext(SCHEMA % "published"),
+            is_shorts,
+        )
+
+
+@cache
+def _lxml_entries_xpath() -> Any:
+    from lxml.etree import XPath
+
+    return XPath("/a:feed/a:entry", namespaces={"a": ATOM_NS})
+
+
+LXML_FIELDS = {
+    f"{{{YT_NS}}}videoId": 0,
+    f"{{{YT_NS}}}channelId": 1,
+    SCHEMA % "title": 2,
+    SCHEMA % "published": 3,
+}
+
+
+def lxml_entries(raw: bytes) -> Iterator[RawEntry]:
+    from lxml.etree import XMLParser, fromstring
+
+    tree = fromstring(raw, XMLParser(resolve_entities=False))
+    link_tag = SCHEMA % "link"
+    # a single pass over the children is much cheaper than an XPath per field
+    for entry in _lxml_entries_xpath()(tree):
+        fields: list[str | None] = [None, None, None, None]
+        link = None
+        for el in entry:
+            if (i := LXML_FIELDS.get(el.tag)) is not None:
+                if fields[i] is None:
+                    fields[i] = el.text or ""
+            elif link is None and el.tag == link_tag:
+                link = el
+        is_shorts = (
+            link is not None
+            and link.get("rel") == "alternate"
+            and "/shorts/" in link.get("href", "")
+        )
+        yield fields[0], fields[1], fields[2], fields[3], is_shorts
+
+
+rx_xml_decl_encoding = re.compile(rb"""encoding=["'](?!utf-?8["'])""", re.I)
+
+
+rx_xml_ref = re.compile(r"&(#x[0-9a-fA-F]+|#[0-9]+|lt|gt|amp|quot|apos);")
+XML_ENTITIES = {"lt": "<", "gt": ">", "amp": "&", "quot": '"', "apos": "'"}
+
+
+def _xml_ref(m: re.Match[str]) -> str:
+    ref = m[1]
+    if ref[0] != "#":
+        return XML_ENTITIES[ref]
+    return chr(int(ref[2:], 16) if ref[1] == "x" else int(ref[1:]))
+
+
+FAST_TAGS = [
+    (b"<%s>" % tag, b"</%s>" % tag)
+    for tag in (b"yt:videoId", b"yt:channelId", b"title", b"published")
+]
+
+
+def _fast_text(chunk: bytes, open_tag: bytes, close_tag: bytes) -> str | None:
+    start = chunk.find(open_tag)
+    if start == -1:
+        return None
+    start += len(open_tag)
+    end = chunk.find(close_tag, start)
+    if end == -1:
+        raise UnsupportedLayout(f"unclosed {open_tag!r}")
+    if chunk.find(b"<", start, end) != -1:
+        raise UnsupportedLayout(f"nested markup in {open_tag!r}")
+    try:
+        text = chunk[start:end].decode()
+        return rx_xml_ref.sub(_xml_ref, text) if "&" in text else text
+    except ValueError as e:
+        # invalid utf-8 or character reference
+        raise UnsupportedLayout(str(e))
+
+
+def fast_entries(raw: bytes) -> Iterator[RawEntry]:
+    # plain bytes scanning over the fixed layout of YouTube feeds, only the
+    # extracted fields are decoded. Anything unexpected is rejected so the
+    # caller can fall back to a real XML parser
+    head_end = raw.find(b"<entry>")
+    head = raw[: head_end if head_end != -1 else None]
+    if (
+        not head.lstrip().startswith((b"<?xml", b"<feed"))
+        or rx_xml_decl_encoding.search(head, 0, head.find(b">"))
+        or b'xmlns="%s"' % ATOM_NS.encode() not in head
+        or b'xmlns:yt="%s"' % YT_NS.encode() not in head
+        or b"<![CDATA[" in raw
+        or b"<!DOCTYPE" in head
+        or raw.count(b"<entry") != raw.count(b"<entry>")
+    ):
+        raise UnsupportedLayout("unexpected feed header")
+    if not raw.rstrip().endswith(b"</feed>"):
+        raise UnsupportedLayout("truncated feed")
+
+    pos = head_end
+    while pos != -1:
+        end = raw.find(b"</entry>", pos)
+        if end == -1:
+            raise UnsupportedLayout("unclosed <entry>")
+        chunk = raw[pos + 7 : end]
+        is_shorts = False
+        if (link := chunk.find(b"<link ")) != -1:
+            tag = chunk[link : chunk.find(b">", link)]
+            is_shorts = b'rel="alternate"' in tag and b"/shorts/" in tag
+        id_, channel_id, title, published = (
+            _fast_text(chunk, o, c) for o, c in FAST_TAGS
+        )
+        yield id_, channel_id, title, published, is_shorts
+        pos = raw.find(b"<entry>", end)
+
+
+def lxml_available() -> bool:
+    return find_spec("lxml") is not None
+
+
+BACKENDS: dict[str, Backend] = {
+    "fast": fast_entries,
+    "lxml": lxml_entries,
+    "etree": etree_entries,
+}
+
+
+@cache
+def fallback_backend() -> str:
+    return "lxml" if lxml_available() else "etree"
 
 
 class YTFeedParser:
     def __init__(
         self,
-        raw: str,
+        raw: bytes | str,
         *,
         skip_shorts: bool = False,
+        backend: str | None = None,
         log: logging.Logger | None = None,
     ) -> None:
         self.log = log or logging.getLogger()
         self.default_published = dt.datetime.now(dt.timezone.utc)
         self.skip_shorts = skip_shorts
-        self.__tree = XML(text=raw)
+        self.backend = backend
+        start = time.perf_counter()
         self.__entries: list[Entry] = list()
 
-        self.__parse_entries()
+        self.__parse_entries(raw.encode() if isinstance(raw, str) else raw)
+        metrics.PARSE_SECONDS.observe(time.perf_counter() - start)
+        metrics.PARSED_ENTRIES.inc(len(self.__entries))
 
     @property
     def entries(self) -> list[Entry]:
         return self.__entries
 
-    def __parse_entries(self):
-        for entry in self.__tree.findall(SCHEMA % "entry"):
-            link = entry.find(SCHEMA % "link")
-            if link is not None and link.attrib.get("rel") == "alternate":
-                is_shorts = link.attrib.get("href", "").find("/shorts/") != -1
-                if self.skip_shorts and is_shorts:
-                    continue
-            id_ = entry.findtext("yt:videoId", namespaces=NAMESPACE)
+    def __parse_entries(self, raw: bytes):
+        if self.backend is not None:
+            raw_entries = list(BACKENDS[self.backend](raw))
+        else:
+            try:
+                raw_entries = list(fast_entries(raw))
+                self.backend = "fast"
+            except UnsupportedLayout as e:
+                self.backend = fallback_backend()
+                self.log.debug(f"fast parser failed ({e}), using {self.backend}")
+                raw_entries = list(BACKENDS[self.backend](raw))
+
+        for id_, channel_id, title, published, is_shorts in raw_entries:
+            if self.skip_shorts and is_shorts:
+                continue
             if id_ is None or not rx_id.match(id_):
-                self.log.error(f"invalid id {id_!r} in entry: {entry!r}")
+                self.log.error(f"invalid id {id_!r} in entry of {channel_id!r}")
                 continue
 
-            channel_id = entry.findtext("yt:channelId", namespaces=NAMESPACE)
             if channel_id is None or not rx_channel_id.match(channel_id):
-                self.log.error(f"invalid channel_id {channel_id!r} in entry: {entry!r}")
+                self.log.error(f"invalid channel_id {channel_id!r} in entry {id_!r}")
                 continue
 
-            title = entry.findtext(SCHEMA % "title", default="Unknown")
-
-            published = entry.findtext(SCHEMA % "published")
             if published and rx_datetime.match(published):
                 published = dt.datetime.fromisoformat(published)
             else:
@@ -61,7 +227,7 @@ class YTFeedParser:
             self.__entries.append(
                 Entry(
                     id=id_,
-                    title=title,
+                    title=title if title is not None else "Unknown",
                     published=published,
                     channel_id=channel_id,
                 )
@@ -0,0 +1,170 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import logging
+import multiprocessing
+import time
+from typing import Callable
+
+from . import metrics
+from .archive import FeedArchive
+from .models import Entry
+from .parser import YTFeedParser
+from .storage import Storage
+
+WRITER_BATCH_SIZE = 500
+
+
+def parse_feed(
+    raw: bytes, skip_shorts: bool, log: logging.Logger | None = None
+) -> tuple[list[Entry], float]:
+    start = time.perf_counter()
+    parser = YTFeedParser(raw, skip_shorts=skip_shorts, log=log)
+    return parser.entries, time.perf_counter() - start
+
+
+class EntriesWriter:
+    # single writer for the whole sync: queued entries of all the channels are
+    # inserted in batches from a dedicated thread with its own connection
+    def __init__(
+        self,
+        stor: Storage,
+        on_new_entries: Callable[[list[Entry]], None] | None = None,
+        batch_size: int = WRITER_BATCH_SIZE,
+        log: logging.Logger | None = None,
+    ) -> None:
+        self.stor = stor.clone()
+        self.on_new_entries = on_new_entries
+        self.batch_size = batch_size
+        self.log = log or logging.getLogger()
+        self.batches = 0
+        self._queue: asyncio.Queue[
+            tuple[list[Entry], asyncio.Future[tuple[int, float]]]
+        ] = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="pytfeeder-writer")
+        self._task: asyncio.Task[None] | None = None
+
+    async def __aenter__(self) -> "EntriesWriter":
+        # the connection is opened in the writer thread and kept for all batches
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.stor.open)
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        if self._task is not None:
+            _ = self._task.cancel()
+            _ = await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while not self._queue.empty():
+            _ = self._queue.get_nowait()[1].cancel()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.stor.close)
+        self._executor.shutdown()
+
+    async def write(self, entries: list[Entry]) -> tuple[int, float]:
+        # returns new entries count and the write time of the batch they were in
+        if not entries:
+            return 0, 0.0
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((entries, fut))
+        try:
+            return await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            if fut.cancelled():
+                raise
+            # queued entries are stored (and reported as new) anyway, so the
+            # write is finished and accounted for instead of the caller being
+            # cancelled, e.g. by the sync deadline
+            if (task := asyncio.current_task()) is not None:
+                _ = task.uncancel()
+            return await fut
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            while size < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                size += len(batch[-1][0])
+
+            entries = [e for entries, _ in batch for e in entries]
+            start = time.perf_counter()
+            try:
+                new_entries = await loop.run_in_executor(
+                    self._executor, self.stor.insert_entries, entries
+                )
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            self.batches += 1
+            write_time = time.perf_counter() - start
+
+            new_ids = {e.id for e in new_entries}
+            for entries, fut in batch:
+                if not fut.done():
+                    fut.set_result((sum(e.id in new_ids for e in entries), write_time))
+            if new_entries and self.on_new_entries is not None:
+                self.on_new_entries(new_entries)
+
+
+class SyncPipeline:
+    # CPU bound parsing and DB writes are kept off the event loop, so it only
+    # does the network I/O
+    def __init__(
+        self,
+        stor: Storage,
+        *,
+        skip_shorts: bool = False,
+        parse_workers: int = 0,
+        on_new_entries: Callable[[list[Entry]], None] | None = None,
+        log: logging.Logger | None = None,
+    ) -> None:
+        self.skip_shorts = skip_shorts
+        self.parse_workers = parse_workers
+        self.log = log or logging.getLogger()
+        self.writer = EntriesWriter(stor, on_new_entries, log=self.log)
+        self._executor: Executor | None = None
+
+    async def __aenter__(self) -> "SyncPipeline":
+        if self.parse_workers > 0:
+            # the writer thread is already running, forking is not safe
+            self._executor = ProcessPoolExecutor(
+                self.parse_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                1, thread_name_prefix="pytfeeder-parser"
+            )
+        _ = await self.writer.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.writer.__aexit__(*exc)
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def parse(self, raw: bytes) -> tuple[list[Entry], float]:
+        assert self._executor is not None
+        entries, parse_time = await asyncio.get_running_loop().run_in_executor(
+            self._executor, parse_feed, raw, self.skip_shorts, self.log
+        )
+        if self.parse_workers > 0:
+            # metrics of the worker processes are lost with them
+            metrics.PARSE_SECONDS.observe(parse_time)
+            metrics.PARSED_ENTRIES.inc(len(entries))
+        return entries, parse_time
+
+    async def write(self, entries: list[Entry]) -> tuple[int, float]:
+        return await self.writer.write(entries)
+
+    async def archive(self, archive: FeedArchive, channel_id: str, raw: bytes) -> None:
+        try:
+            _ = await asyncio.get_running_loop().run_in_executor(
+                None, archive.add, channel_id, raw
+            )
+        except Exception as e:
+            self.log.error(f"can't archive feed of {channel_id}: {e!r}")
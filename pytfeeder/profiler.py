@@ -0,0 +1,183 @@
+import atexit
+from dataclasses import dataclass
+import logging
+import re
+import sqlite3
+import sys
+import time
+from typing import TYPE_CHECKING, Any, Iterable, TextIO
+
+if TYPE_CHECKING:
+    from .storage import Storage
+
+DEFAULT_SLOW_QUERY_MS = 100.0
+
+rx_whitespace = re.compile(r"\s+")
+rx_named_param = re.compile(r":\w+")
+rx_string = re.compile(r"'(?:[^']|'')*'")
+rx_number = re.compile(r"\b\d+(?:\.\d+)?\b")
+rx_params_list = re.compile(r"\?(?:\s*,\s*\?)+")
+rx_rows_list = re.compile(r"\(\?(?:\.\.\.)?\)(?:\s*,\s*\(\?(?:\.\.\.)?\))+")
+
+
+def normalize_query(query: str) -> str:
+    query = rx_whitespace.sub(" ", query).strip().rstrip(";")
+    query = rx_string.sub("?", query)
+    query = rx_named_param.sub("?", query)
+    query = rx_number.sub("?", query)
+    query = rx_params_list.sub("?...", query)
+    return rx_rows_list.sub("(?...), ...", query)
+
+
+@dataclass
+class QueryStats:
+    query: str
+    calls: int = 0
+    rows: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+
+class QueryProfiler:
+    def __init__(
+        self,
+        slow_threshold_ms: float | None = DEFAULT_SLOW_QUERY_MS,
+        log: logging.Logger | None = None,
+    ) -> None:
+        self.slow_threshold = (
+            None if slow_threshold_ms is None else slow_threshold_ms / 1000
+        )
+        self.log = log or logging.getLogger()
+        self.stats: dict[str, QueryStats] = {}
+
+    def wrap(self, cursor: sqlite3.Cursor) -> "ProfiledCursor":
+        return ProfiledCursor(cursor, self)
+
+    def record(self, query: str, elapsed: float, rows: int) -> None:
+        shape = normalize_query(query)
+        st = self.stats.get(shape)
+        if st is None:
+            st = self.stats[shape] = QueryStats(shape)
+        st.calls += 1
+        st.rows += rows
+        st.total_time += elapsed
+        st.max_time = max(st.max_time, elapsed)
+        if self.slow_threshold is not None and elapsed >= self.slow_threshold:
+            self.log.warning(
+                f"slow query {elapsed * 1000:.3f}ms, {rows} rows: {rx_whitespace.sub(' ', query).strip()}"
+            )
+
+    def summary(self, limit: int | None = 20) -> str:
+        stats = sorted(self.stats.values(), key=lambda s: s.total_time, reverse=True)
+        header = f"{'total ms':>10} {'calls':>6} {'mean ms':>9} {'max ms':>9} {'rows':>8}  query"
+        lines = [header, "-" * len(header)]
+        for st in stats[:limit]:
+            lines.append(
+                f"{st.total_time * 1000:10.3f} {st.calls:6d} {st.mean_time * 1000:9.3f} "
+                f"{st.max_time * 1000:9.3f} {st.rows:8d}  {st.query}"
+            )
+        total = sum(s.total_time for s in stats)
+        calls = sum(s.calls for s in stats)
+        lines.append(
+            f"{total * 1000:10.3f} {calls:6d}  total for {len(stats)} query shapes"
+        )
+        return "\n".join(lines) + "\n"
+
+
+class ProfiledCursor:
+    # times only the work done by sqlite: execute and fetching of rows,
+    # the statement is recorded on the next execute or on close
+    def __init__(self, cursor: sqlite3.Cursor, profiler: QueryProfiler) -> None:
+        self._cursor = cursor
+        self._profiler = profiler
+        self._query: str | None = None
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def _start(self, query: str) -> None:
+        self._finish()
+        self._query = query
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def _finish(self) -> None:
+        if self._query is None:
+            return
+        rows = self._rows or max(self._cursor.rowcount, 0)
+        self._profiler.record(self._query, self._elapsed, rows)
+        self._query = None
+
+    def execute(self, query: str, params: Any = ()) -> "ProfiledCursor":
+        self._start(query)
+        start = time.perf_counter()
+        try:
+            _ = self._cursor.execute(query, params)
+        finally:
+            self._elapsed += time.perf_counter() - start
+        return self
+
+    def executemany(self, query: str, params: Iterable[Any]) -> "ProfiledCursor":
+        self._start(query)
+        start = time.perf_counter()
+        try:
+            _ = self._cursor.executemany(query, params)
+        finally:
+            self._elapsed += time.perf_counter() - start
+        return self
+
+    def executescript(self, script: str) -> "ProfiledCursor":
+        self._start(script)
+        start = time.perf_counter()
+        try:
+            _ = self._cursor.executescript(script)
+        finally:
+            self._elapsed += time.perf_counter() - start
+        return self
+
+    def __iter__(self) -> "ProfiledCursor":
+        return self
+
+    def __next__(self) -> Any:
+        start = time.perf_counter()
+        try:
+            row = next(self._cursor)
+        finally:
+            self._elapsed += time.perf_counter() - start
+        self._rows += 1
+        return row
+
+    def fetchone(self) -> Any:
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._elapsed += time.perf_counter() - start
+        self._rows += row is not None
+        return row
+
+    def fetchall(self) -> list[Any]:
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._elapsed += time.perf_counter() - start
+        self._rows += len(rows)
+        return rows
+
+    def close(self) -> None:
+        self._finish()
+        self._cursor.close()
+
+
+def profile_storage(
+    storage: "Storage",
+    slow_threshold_ms: float | None = DEFAULT_SLOW_QUERY_MS,
+    file: TextIO = sys.stderr,
+) -> QueryProfiler:
+    profiler = QueryProfiler(slow_threshold_ms, log=storage.log)
+    storage.profiler = profiler
+    atexit.register(lambda: file.write(profiler.summary()))
+    return profiler
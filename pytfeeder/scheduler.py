@@ -0,0 +1,69 @@
+import datetime as dt
+
+from .models import Channel, ChannelSyncState
+
+MAX_POLL_INTERVAL_MINS = 3 * 24 * 60
+POLLS_PER_UPLOAD = 2
+QUARANTINE_AFTER_FAILS = 5
+
+
+class Scheduler:
+    def __init__(
+        self,
+        min_interval: int,
+        max_interval: int = MAX_POLL_INTERVAL_MINS,
+        quarantine_after: int = QUARANTINE_AFTER_FAILS,
+    ) -> None:
+        self.min_interval = dt.timedelta(minutes=min_interval)
+        self.max_interval = dt.timedelta(minutes=max(min_interval, max_interval))
+        self.quarantine_after = quarantine_after
+
+    def poll_interval(
+        self, state: ChannelSyncState | None, now: dt.datetime
+    ) -> dt.timedelta:
+        if state is None or state.last_published is None:
+            return self.max_interval
+        # dormant channels are stretched by the time since the last upload
+        upload_interval = max(
+            state.upload_interval or self.max_interval,
+            now - state.last_published,
+        )
+        return min(
+            max(upload_interval / POLLS_PER_UPLOAD, self.min_interval),
+            self.max_interval,
+        )
+
+    def is_quarantined(self, state: ChannelSyncState | None) -> bool:
+        return state is not None and state.fails >= self.quarantine_after
+
+    def is_active(self, state: ChannelSyncState | None, now: dt.datetime) -> bool:
+        if not self.is_quarantined(state):
+            return True
+        # quarantined channels are probed once per max interval
+        assert state is not None
+        return state.last_fail is None or now - state.last_fail >= self.max_interval
+
+    def is_due(self, state: ChannelSyncState | None, now: dt.datetime) -> bool:
+        if self.is_quarantined(state):
+            return self.is_active(state, now)
+        if state is None or state.last_fetch is None:
+            return True
+        return now - state.last_fetch >= self.poll_interval(state, now)
+
+    def due_channels(
+        self,
+        channels: list[Channel],
+        states: dict[str, ChannelSyncState],
+        now: dt.datetime | None = None,
+    ) -> list[Channel]:
+        now = now or dt.datetime.now(dt.timezone.utc)
+        return [c for c in channels if self.is_due(states.get(c.channel_id), now)]
+
+    def active_channels(
+        self,
+        channels: list[Channel],
+        states: dict[str, ChannelSyncState],
+        now: dt.datetime | None = None,
+    ) -> list[Channel]:
+        now = now or dt.datetime.now(dt.timezone.utc)
+        return [c for c in channels if self.is_active(states.get(c.channel_id), now)]
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Coroutine
+
+from . import metrics
+from .feeder import Feeder
+from .models import SyncReport
+
+MAX_LINE_SIZE = 64 * 1024
+
+
+class ServerError(Exception):
+    pass
+
+
+def parse_request(line: str) -> tuple[str, dict[str, Any]]:
+    # accepts both `{"cmd": "feed", "limit": 10}` and `feed limit=10`
+    line = line.strip()
+    if line.startswith("{"):
+        req = json.loads(line)
+        if not isinstance(req, dict):
+            raise ServerError(f"Unexpected request type {type(req)}, should be dict")
+        cmd = req.pop("cmd", "")
+        return str(cmd), req
+
+    cmd, *args = line.split()
+    params: dict[str, Any] = {}
+    for arg in args:
+        k, sep, v = arg.partition("=")
+        if not sep:
+            raise ServerError(f"Invalid argument {arg!r}, should be key=value")
+        params[k] = json.loads(v) if v[:1].isdigit() or v in ("true", "false") else v
+    return cmd, params
+
+
+class Server:
+    def __init__(
+        self,
+        feeder: Feeder,
+        socket_path: Path,
+        log: logging.Logger | None = None,
+    ) -> None:
+        self.feeder = feeder
+        self.socket_path = socket_path
+        self.log = log or logging.getLogger()
+        self.commands: dict[str, Callable[..., Coroutine[Any, Any, Any]]] = {
+            "ping": self.cmd_ping,
+            "stats": self.cmd_stats,
+            "channels": self.cmd_channels,
+            "feed": self.cmd_feed,
+            "mark_watched": self.cmd_mark_watched,
+            "mark_entries": self.cmd_mark_entries,
+            "sync": self.cmd_sync,
+            "metrics": self.cmd_metrics,
+        }
+        self.subscribers: set[asyncio.StreamWriter] = set()
+        self._server: asyncio.Server | None = None
+        self._sync_task: asyncio.Task[SyncReport] | None = None
+
+    async def start(self) -> None:
+        if self.socket_path.exists():
+            try:
+                _, w = await asyncio.open_unix_connection(self.socket_path)
+            except OSError:
+                self.log.warning(f"removing stale socket {self.socket_path}")
+                self.socket_path.unlink()
+            else:
+                w.close()
+                raise ServerError(f"Server already running on {self.socket_path}")
+
+        self._server = await asyncio.start_unix_server(
+            self.handle_client, path=self.socket_path, limit=MAX_LINE_SIZE
+        )
+        self.socket_path.chmod(0o600)
+        self.log.info(f"listening on {self.socket_path}")
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self.socket_path.unlink(missing_ok=True)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        assert self._server is not None
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                writer.write(await self.handle_line(line.decode(), writer))
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            self.log.warning(f"client connection error: {e!r}")
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    async def handle_line(
+        self, line: str, writer: asyncio.StreamWriter | None = None
+    ) -> bytes:
+        try:
+            cmd, params = parse_request(line)
+            self.log.debug(f"{cmd = !r}, {params = !r}")
+            if cmd == "subscribe" and writer is not None:
+                self.subscribers.add(writer)
+                resp = {"ok": True, "result": "subscribed"}
+            elif handler := self.commands.get(cmd):
+                resp = {"ok": True, "result": await handler(**params)}
+            else:
+                raise ServerError(f"Unknown command {cmd!r}")
+        except Exception as e:
+            self.log.error(f"failed request {line.strip()!r}: {e!r}")
+            resp = {"ok": False, "error": str(e)}
+        return json.dumps(resp, ensure_ascii=False).encode() + b"\n"
+
+    async def broadcast(self, event: dict[str, Any]) -> None:
+        line = json.dumps(event, ensure_ascii=False).encode() + b"\n"
+        for w in list(self.subscribers):
+            try:
+                w.write(line)
+                await w.drain()
+            except ConnectionError as e:
+                self.log.warning(f"dropping subscriber: {e!r}")
+                self.subscribers.discard(w)
+                w.close()
+
+    async def sync(self, **kwargs: Any) -> SyncReport:
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self.feeder.sync_entries(**kwargs))
+        return await asyncio.shield(self._sync_task)
+
+    async def cmd_ping(self) -> str:
+        return "pong"
+
+    async def cmd_stats(self) -> dict[str, Any]:
+        self.feeder.refresh_channels_stats()
+        stats = self.feeder.global_stats()
+        lu = self.feeder.updater.last_update
+        return {
+            "count": stats.count,
+            "total": stats.total,
+            "unwatched": stats.unwatched,
+            "deleted": stats.deleted,
+            "last_update": lu.isoformat() if lu else None,
+            "channels_with_updates": [
+                c.title for c in self.feeder.channels if c.have_updates
+            ],
+        }
+
+    async def cmd_channels(self) -> list[dict[str, Any]]:
+        self.feeder.refresh_channels_stats()
+        return [c.to_dict() for c in self.feeder.channels]
+
+    async def cmd_feed(
+        self,
+        channel_id: str | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        unwatched_first: bool | None = None,
+    ) -> list[dict[str, Any]]:
+        if channel_id:
+            entries = self.feeder.channel_feed(
+                channel_id,
+                limit=limit,
+                unwatched_first=unwatched_first,
+                offset=offset,
+            )
+        else:
+            entries = self.feeder.feed(
+                limit=limit, unwatched_first=unwatched_first, offset=offset
+            )
+        return [e.to_dict() for e in entries]
+
+    async def cmd_mark_watched(
+        self,
+        id: str | None = None,
+        channel_id: str | None = None,
+        unwatched: bool = False,
+        all: bool = False,
+    ) -> None:
+        if not id and not channel_id and not all:
+            raise ServerError("Missing id or channel_id, pass all=true to mark all")
+        self.feeder.mark_as_watched(id=id, channel_id=channel_id, unwatched=unwatched)
+
+    async def cmd_mark_entries(
+        self,
+        ids: list[str],
+        watched: bool | None = None,
+        deleted: bool | None = None,
+    ) -> int:
+        return self.feeder.mark_entries(ids, watched=watched, deleted=deleted)
+
+    async def cmd_metrics(self) -> dict[str, Any]:
+        return metrics.REGISTRY.to_dict()
+
+    async def cmd_sync(
+        self, report_hidden: bool = True, only_due: bool = False
+    ) -> dict[str, Any]:
+        report = await self.sync(report_hidden=report_hidden, only_due=only_due)
+        return report.to_dict()
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+from .archive import FeedArchive
+from .config import Config
+from .models import Channel, ChannelSyncResult, ChannelSyncState, Entry, SyncStatus
+from .parser import YTFeedParser
+from .pipeline import EntriesWriter
+from .storage import Storage
+
+if TYPE_CHECKING:
+    from .feeder import Feeder
+
+# time for the shards to report back after the deadline
+SHARD_GRACE_SECS = 5.0
+
+ShardResult = list[tuple[ChannelSyncResult, list[Entry]]]
+
+
+def shard_channels(channels: list[Channel], n: int) -> list[list[Channel]]:
+    # round robin keeps the least recently fetched channels spread over the shards
+    return [shard for i in range(n) if (shard := channels[i::n])]
+
+
+class ShardPipeline:
+    # used inside the shard processes: parses in place and collects the entries
+    # for the parent's writer instead of writing them
+    def __init__(self, skip_shorts: bool, log: logging.Logger | None = None) -> None:
+        self.skip_shorts = skip_shorts
+        self.log = log or logging.getLogger()
+        self.entries: dict[str, list[Entry]] = {}
+
+    async def parse(self, raw: bytes) -> tuple[list[Entry], float]:
+        start = time.perf_counter()
+        parser = YTFeedParser(raw, skip_shorts=self.skip_shorts, log=self.log)
+        return parser.entries, time.perf_counter() - start
+
+    async def write(self, entries: list[Entry]) -> tuple[int, float]:
+        for e in entries:
+            self.entries.setdefault(e.channel_id, []).append(e)
+        return len(entries), 0.0
+
+    async def archive(self, archive: FeedArchive, channel_id: str, raw: bytes) -> None:
+        try:
+            _ = archive.add(channel_id, raw)
+        except Exception as e:
+            self.log.error(f"can't archive feed of {channel_id}: {e!r}")
+
+
+def sync_shard(
+    config: Config,
+    feed_url: str,
+    channels: list[Channel],
+    states: dict[str, ChannelSyncState],
+    deadline: float | None,
+) -> ShardResult:
+    return asyncio.run(_sync_shard(config, feed_url, channels, states, deadline))
+
+
+async def _sync_shard(
+    config: Config,
+    feed_url: str,
+    channels: list[Channel],
+    states: dict[str, ChannelSyncState],
+    deadline: float | None,
+) -> ShardResult:
+    from .feeder import Feeder
+
+    feeder = Feeder(config, Storage(config.storage_path))
+    feeder.feed_url = feed_url
+    pipeline = ShardPipeline(config.skip_shorts, feeder.log)
+    timeout = max(0.0, deadline - time.time()) if deadline is not None else None
+    async with feeder.http:
+        session = await feeder.http.session()
+        results = await feeder._sync_channels(
+            session, channels, pipeline, timeout, states=states
+        )
+    return [(r, pipeline.entries.get(r.channel_id, [])) for r, _ in results]
+
+
+async def sync_sharded(
+    feeder: "Feeder",
+    channels: list[Channel],
+    workers: int,
+    *,
+    states: dict[str, ChannelSyncState] | None = None,
+    timeout: float | None = None,
+    cancel: asyncio.Event | None = None,
+    on_done: Callable[[Any], None] | None = None,
+) -> list[tuple[ChannelSyncResult, Exception | None]]:
+    from .feeder import wait_tasks
+
+    loop = asyncio.get_running_loop()
+    states = states or {}
+    deadline = time.time() + timeout if timeout else None
+    shards = shard_channels(channels, workers)
+    results: dict[str, tuple[ChannelSyncResult, Exception | None]] = {}
+
+    def set_result(fut: asyncio.Future[Any], value: Any, error: bool = False) -> None:
+        if fut.done():
+            return
+        if error:
+            fut.set_exception(value)
+        else:
+            fut.set_result(value)
+
+    async def run_shard(pool: Any, writer: EntriesWriter, shard: list[Channel]) -> None:
+        fut: asyncio.Future[ShardResult] = loop.create_future()
+        _ = pool.apply_async(
+            sync_shard,
+            (
+                feeder.config,
+                feeder.feed_url,
+                shard,
+                {
+                    c.channel_id: states[c.channel_id]
+                    for c in shard
+                    if c.channel_id in states
+                },
+                deadline,
+            ),
+            callback=lambda v: loop.call_soon_threadsafe(set_result, fut, v),
+            error_callback=lambda e: loop.call_soon_threadsafe(
+                set_result, fut, e, True
+            ),
+        )
+        try:
+            shard_results = await fut
+        except Exception as e:
+            feeder.log.error(f"shard of {len(shard)} channels failed: {e!r}")
+            for c in shard:
+                r = ChannelSyncResult(c.channel_id, SyncStatus.FAILED, error=repr(e))
+                results[c.channel_id] = (r, e)
+            return
+
+        for r, entries in shard_results:
+            # new entries are only known once written
+            r.new, r.db_time = await writer.write(entries)
+            err = None
+            if r.status == SyncStatus.FAILED:
+                feeder.log.error(f"cannot sync channel ({r.channel_id}): {r.error}")
+                err = Exception(r.error)
+            results[r.channel_id] = (r, err)
+            if on_done is not None:
+                on_done(r)
+
+    # spawn, as forking a process with a running event loop is not safe
+    pool = multiprocessing.get_context("spawn").Pool(len(shards) or 1)
+    try:
+        async with EntriesWriter(
+            feeder.stor, feeder.on_new_entries, log=feeder.log
+        ) as writer:
+            tasks = [
+                asyncio.create_task(run_shard(pool, writer, shard)) for shard in shards
+            ]
+            wait_timeout = timeout + SHARD_GRACE_SECS if timeout else None
+            if (unfinished := await wait_tasks(tasks, wait_timeout, cancel)) > 0:
+                reason = "cancelled" if cancel and cancel.is_set() else "timed out"
+                feeder.log.warning(f"sync {reason}, {unfinished} shards unfinished")
+    finally:
+        pool.terminate()
+
+    return [
+        results.get(
+            c.channel_id,
+            (ChannelSyncResult(c.channel_id, status=SyncStatus.CANCELLED), None),
+        )
+        for c in channels
+    ]
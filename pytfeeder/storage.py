@@ -1,15 +1,24 @@
 from contextlib import contextmanager
+import copy
 import datetime as dt
 from importlib import resources
+import json
 import logging
 from pathlib import Path
 import sqlite3
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterator
 
-from .models import Channel, Entry
+from . import metrics
+from .models import Channel, ChannelSyncState, Entry, GlobalStats
 import pytfeeder.migrations as migrations_dir
 
+if TYPE_CHECKING:
+    from .profiler import QueryProfiler
+
 TB_ENTRIES = "tb_entries"
+TB_CHANNELS_SYNC = "tb_channels_sync"
+# bigger id sets are passed as a single json array param
+BULK_MAX_MARKERS = 500
 
 
 class StorageError(Exception):
@@ -20,6 +29,8 @@ class Storage:
     def __init__(self, db_file: Path, log: logging.Logger | None = None) -> None:
         self.db_file = db_file
         self.log = log or logging.getLogger()
+        self._conn: sqlite3.Connection | None = None
+        self.profiler: "QueryProfiler | None" = None
         sqlite3.register_adapter(dt.datetime, lambda v: v.isoformat())
         self.__init_db()
 
@@ -32,7 +43,9 @@ class Storage:
         (current_version,) = next(conn.cursor().execute("PRAGMA user_version"), (0,))
         self.log.debug(f"{current_version = }")
 
-        migrations = list(resources.files(migrations_dir).iterdir())
+        migrations = sorted(
+            resources.files(migrations_dir).iterdir(), key=lambda m: m.name
+        )
         self.log.debug(f"migrations = [{', '.join(f'{m.name!r}' for m in migrations)}]")
 
         if len(migrations) == 0:
@@ -59,20 +72,45 @@ class Storage:
                 cur.execute("COMMIT")
         conn.close()
 
-    @contextmanager
-    def get_cursor(self):
+    def _connect(self) -> sqlite3.Connection:
         conn = sqlite3.connect(self.db_file, detect_types=sqlite3.PARSE_DECLTYPES)
         if self.log.level == logging.DEBUG:
             conn.set_trace_callback(self.log.debug)
+        return conn
+
+    def open(self) -> None:
+        if self._conn is None:
+            self._conn = self._connect()
 
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def clone(self) -> "Storage":
+        # same database without the shared connection, to be used from another thread
+        stor = copy.copy(self)
+        stor._conn = None
+        return stor
+
+    @contextmanager
+    def get_cursor(self):
+        conn = self._conn or self._connect()
+        cursor = conn.cursor()
+        if self.profiler is not None:
+            cursor = self.profiler.wrap(cursor)
         try:
-            yield conn.cursor()
+            yield cursor
         except Exception as e:
             self.log.error(e)
+            conn.rollback()
         else:
             conn.commit()
         finally:
-            conn.close()
+            if self.profiler is not None:
+                cursor.close()
+            if conn is not self._conn:
+                conn.close()
 
     def add_entries(self, entries: list[Entry]) -> int:
         if not entries:
@@ -83,11 +121,39 @@ class Storage:
         params = tuple(
             v for e in entries for v in (e.id, e.title, e.published, e.channel_id)
         )
-        with self.get_cursor() as cursor:
+        with (
+            metrics.DB_WRITE_SECONDS.time(op="add_entries"),
+            self.get_cursor() as cursor,
+        ):
             rowcount = cursor.execute(query, params).rowcount
             self.log.debug(f"{rowcount = }")
+            metrics.DB_NEW_ENTRIES.inc(rowcount)
             return rowcount
 
+    def insert_entries(self, entries: list[Entry]) -> list[Entry]:
+        if not entries:
+            return []
+
+        markers = ",".join("?" * len(entries))
+        select_query = f"SELECT id FROM {TB_ENTRIES} WHERE id IN ({markers})"
+        insert_query = f"INSERT OR IGNORE INTO {TB_ENTRIES} (id, title, published, channel_id) VALUES (?, ?, ?, ?)"
+        with (
+            metrics.DB_WRITE_SECONDS.time(op="insert_entries"),
+            self.get_cursor() as cursor,
+        ):
+            known = {
+                id for (id,) in cursor.execute(select_query, [e.id for e in entries])
+            }
+            new_entries = [e for e in entries if e.id not in known]
+            _ = cursor.executemany(
+                insert_query,
+                [(e.id, e.title, e.published, e.channel_id) for e in new_entries],
+            )
+            self.log.debug(f"{len(new_entries) = }")
+            metrics.DB_NEW_ENTRIES.inc(len(new_entries))
+            return new_entries
+        return []
+
     def fetchall_rows(
         self,
         query: str,
@@ -102,6 +168,18 @@ class Storage:
             self.log.debug(f"{len(rows) = }")
             return rows
 
+    def iter_rows(
+        self,
+        query: str,
+        params: tuple[Any, ...] | dict[str, Any] | None = None,
+    ) -> Iterator[tuple]:
+        with self.get_cursor() as cursor:
+            self.log.debug(f"{params = !r}")
+            if params:
+                yield from cursor.execute(query, params)
+            else:
+                yield from cursor.execute(query)
+
     def select_entries(
         self,
         channel_id: str | None = None,
@@ -109,8 +187,28 @@ class Storage:
         timedelta: str | None = None,
         unwatched_first: bool | None = None,
         in_channels: list[Channel] | None = None,
+        offset: int | None = None,
     ) -> list[Entry]:
-        entries: list[Entry] = []
+        return list(
+            self.iter_entries(
+                channel_id=channel_id,
+                limit=limit,
+                timedelta=timedelta,
+                unwatched_first=unwatched_first,
+                in_channels=in_channels,
+                offset=offset,
+            )
+        )
+
+    def iter_entries(
+        self,
+        channel_id: str | None = None,
+        limit: int | None = None,
+        timedelta: str | None = None,
+        unwatched_first: bool | None = None,
+        in_channels: list[Channel] | None = None,
+        offset: int | None = None,
+    ) -> Iterator[Entry]:
         params: dict[str, Any] = {}
 
         and_channel_id = ""
@@ -138,6 +236,9 @@ class Storage:
         if limit:
             params["limit"] = limit
             and_limit = "LIMIT :limit"
+        if offset:
+            params["offset"] = offset
+            and_limit = f"{and_limit or 'LIMIT -1'} OFFSET :offset"
 
         query = f"""
         SELECT id, title, published, channel_id, is_viewed, is_deleted
@@ -145,22 +246,17 @@ class Storage:
         WHERE is_deleted = 0 {and_channel_id} {and_timedelta} {and_in_channels}
         ORDER BY {and_unwatched_first} published DESC {and_limit}"""
 
-        rows = self.fetchall_rows(query, params=params)
-        if rows is None:
-            return entries
-
-        for id, title, published, c_id, is_viewed, is_deleted in rows:
-            entries.append(
-                Entry(
-                    id=id,
-                    title=title,
-                    published=dt.datetime.fromisoformat(published),
-                    channel_id=c_id,
-                    is_viewed=bool(is_viewed),
-                    is_deleted=bool(is_deleted),
-                )
+        for id, title, published, c_id, is_viewed, is_deleted in self.iter_rows(
+            query, params=params
+        ):
+            yield Entry(
+                id=id,
+                title=title,
+                published=dt.datetime.fromisoformat(published),
+                channel_id=c_id,
+                is_viewed=bool(is_viewed),
+                is_deleted=bool(is_deleted),
             )
-        return entries
 
     def select_channels_stats(self) -> dict[str, tuple[int, int]]:
         query = f"""
@@ -171,6 +267,9 @@ class Storage:
         return {c_id: (count, unwatched) for c_id, count, unwatched in rows}
 
     def select_stats(self) -> list[tuple[str, int, int, int, int]]:
+        return list(self.iter_stats())
+
+    def iter_stats(self) -> Iterator[tuple[str, int, int, int, int]]:
         query = f"""
         SELECT channel_id, COUNT(channel_id) AS c1,
         SUM(is_deleted = 0),
@@ -178,7 +277,131 @@ class Storage:
         SUM(is_deleted = 1)
         FROM {TB_ENTRIES} 
         GROUP BY channel_id ORDER BY c1 DESC;"""
-        return self.fetchall_rows(query)
+        return self.iter_rows(query)
+
+    def select_global_stats(
+        self, in_channels: list[Channel] | None = None
+    ) -> GlobalStats:
+        # the channel ids are bound once, as a json array
+        params: tuple[str, ...] = ()
+        with_feed = ""
+        and_in_channels = ""
+        if in_channels is not None and len(in_channels):
+            params = (json.dumps([c.channel_id for c in in_channels]),)
+            with_feed = "WITH feed(channel_id) AS (SELECT value FROM json_each(?))"
+            and_in_channels = "AND channel_id IN feed"
+
+        query = f"""
+        {with_feed}
+        SELECT COUNT(*),
+        COALESCE(SUM(is_deleted = 0), 0),
+        COALESCE(SUM(is_deleted = 1), 0),
+        COALESCE(SUM(is_viewed = 0 AND is_deleted = 0 {and_in_channels}), 0),
+        COALESCE(SUM(is_deleted = 0 {and_in_channels}), 0)
+        FROM {TB_ENTRIES};"""
+        rows = self.fetchall_rows(query, params)
+        if not rows:
+            return GlobalStats()
+        total, count, deleted, unwatched, feed_count = rows[0]
+        return GlobalStats(
+            total=total,
+            count=count,
+            deleted=deleted,
+            unwatched=unwatched,
+            feed_count=feed_count,
+        )
+
+    def select_channels_sync_state(self) -> dict[str, ChannelSyncState]:
+        query = f"""
+        SELECT e.channel_id, COUNT(*), MIN(e.published), MAX(e.published),
+        s.last_fetch, s.last_new, COALESCE(s.fails, 0), s.last_fail, s.last_error,
+        s.etag, s.last_modified
+        FROM {TB_ENTRIES} AS e
+        LEFT JOIN {TB_CHANNELS_SYNC} AS s ON s.channel_id = e.channel_id
+        GROUP BY e.channel_id
+        UNION ALL
+        SELECT s.channel_id, 0, NULL, NULL, s.last_fetch, s.last_new,
+        s.fails, s.last_fail, s.last_error, s.etag, s.last_modified
+        FROM {TB_CHANNELS_SYNC} AS s
+        WHERE s.channel_id NOT IN (SELECT DISTINCT channel_id FROM {TB_ENTRIES});"""
+
+        def parse_dt(v: str | None) -> dt.datetime | None:
+            return dt.datetime.fromisoformat(v) if v else None
+
+        states: dict[str, ChannelSyncState] = {}
+        for row in self.iter_rows(query):
+            c_id, count, first, last, last_fetch, last_new = row[:6]
+            fails, last_fail, err, etag, last_modified = row[6:]
+            states[c_id] = ChannelSyncState(
+                channel_id=c_id,
+                entries_count=count,
+                first_published=parse_dt(first),
+                last_published=parse_dt(last),
+                last_fetch=parse_dt(last_fetch),
+                last_new=parse_dt(last_new),
+                fails=fails,
+                last_fail=parse_dt(last_fail),
+                last_error=err,
+                etag=etag,
+                last_modified=last_modified,
+            )
+        return states
+
+    def update_channels_sync_state(
+        self, states: list[tuple[str, dt.datetime, dt.datetime | None]]
+    ) -> None:
+        if not states:
+            return
+        query = f"""
+        INSERT INTO {TB_CHANNELS_SYNC} (channel_id, last_fetch, last_new)
+        VALUES (?, ?, ?)
+        ON CONFLICT(channel_id) DO UPDATE SET
+        last_fetch = excluded.last_fetch,
+        last_new = COALESCE(excluded.last_new, last_new),
+        fails = 0,
+        last_error = NULL"""
+        with self.get_cursor() as cursor:
+            rowcount = cursor.executemany(query, states).rowcount
+            self.log.debug(f"{rowcount = }")
+
+    def update_channels_validators(
+        self, validators: list[tuple[str, str | None, str | None]]
+    ) -> None:
+        # ETag and Last-Modified of the last feed responses, for conditional requests
+        if not validators:
+            return
+        query = f"""
+        INSERT INTO {TB_CHANNELS_SYNC} (channel_id, etag, last_modified)
+        VALUES (?, ?, ?)
+        ON CONFLICT(channel_id) DO UPDATE SET
+        etag = excluded.etag,
+        last_modified = excluded.last_modified"""
+        with self.get_cursor() as cursor:
+            rowcount = cursor.executemany(query, validators).rowcount
+            self.log.debug(f"{rowcount = }")
+
+    def update_channels_fails(self, fails: list[tuple[str, dt.datetime, str]]) -> None:
+        if not fails:
+            return
+        query = f"""
+        INSERT INTO {TB_CHANNELS_SYNC} (channel_id, fails, last_fail, last_error)
+        VALUES (?, 1, ?, ?)
+        ON CONFLICT(channel_id) DO UPDATE SET
+        fails = fails + 1,
+        last_fail = excluded.last_fail,
+        last_error = excluded.last_error"""
+        with self.get_cursor() as cursor:
+            rowcount = cursor.executemany(query, fails).rowcount
+            self.log.debug(f"{rowcount = }")
+
+    def reset_channels_fails(self, channel_ids: list[str] | None = None) -> int:
+        query = f"UPDATE {TB_CHANNELS_SYNC} SET fails = 0, last_error = NULL WHERE fails > 0"
+        if channel_ids is None:
+            return self.update_rows(query)
+        markers = ",".join("?" * len(channel_ids))
+        return self.update_rows(
+            f"{query} AND channel_id IN ({markers})", tuple(channel_ids)
+        )
 
     def select_channels_with_deleted(self) -> list[tuple[str, int]]:
         query = f"""
@@ -296,6 +519,38 @@ class Storage:
             self.log.warning(f"{rowcount = } for mark_entry_as_deleted({id = !r})")
         return rowcount == 1
 
+    def mark_entries(
+        self,
+        ids: list[str],
+        *,
+        watched: bool | None = None,
+        deleted: bool | None = None,
+    ) -> int:
+        # a single statement (and transaction) for any number of entries
+        set_columns = []
+        params: list[Any] = []
+        if watched is not None:
+            set_columns.append("is_viewed = ?")
+            params.append(int(watched))
+        if deleted is not None:
+            set_columns.append("is_deleted = ?")
+            params.append(int(deleted))
+        if not ids or not set_columns:
+            return 0
+
+        ids = list(dict.fromkeys(ids))
+        if len(ids) <= BULK_MAX_MARKERS:
+            where_ids = f"id IN ({','.join('?' * len(ids))})"
+            params.extend(ids)
+        else:
+            where_ids = "id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(ids))
+        query = f"UPDATE {TB_ENTRIES} SET {', '.join(set_columns)} WHERE {where_ids}"
+        rowcount = self.update_rows(query, params=tuple(params))
+        if rowcount != len(ids):
+            self.log.warning(f"{rowcount = } for mark_entries({len(ids)} ids)")
+        return rowcount
+
     def mark_channel_entries_as_deleted(self, channel_id: str) -> int:
         query = f"UPDATE {TB_ENTRIES} SET is_deleted = 1 WHERE channel_id = ? AND is_deleted != 1"
         return self.update_rows(query, params=(channel_id,))
@@ -1,12 +1,14 @@
 from dataclasses import dataclass
 import asyncio
 from enum import Enum, auto
+import signal
 import time
 import sys
-from typing import Callable
+from typing import Any, Callable, Coroutine, TypeVar
 
 from pytfeeder import Feeder, __version__  # FIXME: circular import
-from pytfeeder.models import Channel, Entry, Tag
+from pytfeeder import metrics
+from pytfeeder.models import Channel, Entry, SyncReport, Tag
 from .cmd import Cmd
 from .consts import (
     DEFAULT_KEYBINDS,
@@ -16,6 +18,8 @@ from .consts import (
     format_keybindings,
 )
 
+T = TypeVar("T")
+
 
 class PageState(Enum):
     CHANNELS = auto()
@@ -72,6 +76,7 @@ class TuiApp:
         )
         self.index = 0
         self.is_filtered = False
+        self.selected_ids: set[str] = set()
         self._is_feed_opened = False
         self.max_len_chan_title = max(len(c.title) for c in self.channels)
         self.new_marks = {0: " " * len(self.c.new_mark), 1: self.c.new_mark}
@@ -83,6 +88,8 @@ class TuiApp:
         self.status_msg_lifetime = 3
         self._status_msg_creation_time = 0.0
         self._status_msg_text = ""
+        self._sync_cancel: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
         if self.is_update_needed:
             self.initial_update()
         self.lines = list(map(Line, self.channels))
@@ -144,25 +151,71 @@ class TuiApp:
         return f"{s:>{w}}"
 
     def get_lines_by_id(self, channel_id: str) -> list[Line]:
-        if channel_id == "feed":
-            self._is_feed_opened = True
-            return list(map(Line, self.feed()))
-        self._is_feed_opened = False
-        return list(map(Line, self.channel_feed(channel_id)))
+        self.selected_ids.clear()
+        with metrics.TUI_LINES_SECONDS.time():
+            if channel_id == "feed":
+                self._is_feed_opened = True
+                return list(map(Line, self.feed()))
+            self._is_feed_opened = False
+            return list(map(Line, self.channel_feed(channel_id)))
 
     def initial_update(self) -> None:
-        print("updating...")
-        new, err = asyncio.run(
-            self.feeder.sync_entries(verbose=True, report_hidden=False)
-        )
-        if err:
-            self.status_msg = f"Error: {err}"
-            return
-        if new > 0:
-            self.status_msg = f"{new} new entries"
+        print("updating... (C-c to cancel)")
+        report = self.run_async(self.sync(verbose=True))
+        self.status_msg = self.sync_status_msg(report)
+        if report.new > 0:
             self.update_channels()
-        else:
-            self.status_msg = "no updates"
+
+    def run_async(self, coro: Coroutine[Any, Any, T]) -> T:
+        # a single loop for the app lifetime, so the http session and its
+        # connections are reused by the following syncs
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+
+    def close(self) -> None:
+        if self._loop is None:
+            return
+        self._loop.run_until_complete(self.feeder.http.close())
+        self._loop.close()
+        self._loop = None
+
+    async def sync(self, verbose: bool = False) -> SyncReport:
+        await self.feeder.http.open()
+        self._sync_cancel = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        sigint_handled = False
+        try:
+            loop.add_signal_handler(signal.SIGINT, self.cancel_sync)
+            sigint_handled = True
+        except (NotImplementedError, RuntimeError):
+            pass
+        try:
+            return await self.feeder.sync_entries(
+                verbose=verbose, report_hidden=False, cancel=self._sync_cancel
+            )
+        finally:
+            if sigint_handled:
+                _ = loop.remove_signal_handler(signal.SIGINT)
+            self._sync_cancel = None
+
+    @property
+    def is_syncing(self) -> bool:
+        return self._sync_cancel is not None
+
+    def cancel_sync(self) -> None:
+        if self._sync_cancel is not None:
+            self._sync_cancel.set()
+
+    def sync_status_msg(self, report: SyncReport) -> str:
+        if report.error and not report.is_partial:
+            return f"Error: {report.error}"
+        msg = f"{report.new} new entries" if report.new > 0 else "no updates"
+        if failed := report.failed:
+            msg += f" ({len(failed)} channels failed: {report.error})"
+        if remaining := report.remaining:
+            msg += f" (sync interrupted, {len(remaining)} channels left)"
+        return msg
 
     @property
     def is_update_needed(self) -> bool:
@@ -197,13 +250,37 @@ class TuiApp:
         self.index = 0
         return True
 
+    def toggle_selected(self) -> None:
+        if len(self.lines) == 0:
+            return
+        selected_data = self.lines[self.index].data
+        if self.page_state != PageState.ENTRIES or not isinstance(selected_data, Entry):
+            return
+        self.selected_ids ^= {selected_data.id}
+        self.status_msg = f"{len(self.selected_ids)} selected"
+        self.index = (self.index + 1) % len(self.lines)
+
+    @property
+    def selected_entries(self) -> list[Entry]:
+        return [
+            l.data
+            for l in self.lines
+            if isinstance(l.data, Entry) and l.data.id in self.selected_ids
+        ]
+
     def mark_as_deleted(self) -> bool:
         if len(self.lines) == 0:
             return False
         selected_data = self.lines[self.index].data
         if self.page_state != PageState.ENTRIES or not isinstance(selected_data, Entry):
             return False
-        if not self.feeder.mark_entry_as_deleted(selected_data.id):
+        if entries := self.selected_entries:
+            c = self.feeder.mark_entries([e.id for e in entries], deleted=True)
+            if c <= 0:
+                self.status_msg = "Something went wrong"
+                return False
+            self.status_msg = f"{c} entries were deleted"
+        elif not self.feeder.mark_entry_as_deleted(selected_data.id):
             self.status_msg = "Something went wrong"
             return False
         self.is_channels_outdated = True
@@ -242,6 +319,15 @@ class TuiApp:
             self.update_channels()
             if not self.c.hide_feed:
                 self.reload_lines()
+        elif self.page_state == PageState.ENTRIES and (
+            entries := self.selected_entries
+        ):
+            unwatched = all(e.is_viewed for e in entries)
+            _ = self.feeder.mark_entries([e.id for e in entries], watched=not unwatched)
+            self.is_channels_outdated = True
+            for e in entries:
+                e.is_viewed = not unwatched
+            self.selected_ids.clear()
         elif self.page_state == PageState.ENTRIES:
             if not isinstance(selected_data, Entry):
                 raise Exception(f"Unexpected entry type {type(selected_data)!r}")
@@ -501,8 +587,9 @@ class TuiApp:
                 len(str(c.entries_count)) for c in self.channels
             )
         else:
-            unwatched_count = self.feeder.unwatched_count()
-            total_entries_count = self.feeder.total_entries_count(exclude_hidden=True)
+            stats = self.feeder.global_stats()
+            unwatched_count = stats.unwatched
+            total_entries_count = stats.feed_count
             self.__max_unwatched_num_len = len(str(unwatched_count))
             self.__max_total_num_len = len(str(total_entries_count))
             feed_channel = Channel(
@@ -583,16 +670,13 @@ class TuiApp:
         if self.page_state == PageState.ENTRIES:
             channel_id = self.channels[self.parent_index].channel_id
 
-        new, err = await self.feeder.sync_entries(report_hidden=False)
-        if err:
-            self.status_msg = f"Error: {err}"
+        report = await self.sync()
+        self.status_msg = self.sync_status_msg(report)
+        if report.error and not report.is_partial:
             return
-        if new > 0:
+        if report.new > 0:
             self.update_channels()
             self.reload_lines(channel_id)
-            self.status_msg = f"{new} new updates"
-        else:
-            self.status_msg = "no updates"
 
         self.refresh_last_update()
 
@@ -622,7 +706,9 @@ class TuiApp:
         if self.page_state != PageState.ENTRIES or not isinstance(selected_data, Entry):
             return
 
-        entries = [l.data for l in self.lines if l.data.is_viewed is False]  # type: ignore
+        entries = self.selected_entries or [
+            l.data for l in self.lines if l.data.is_viewed is False  # type: ignore
+        ]
         if len(entries) == 0:
             return
 
@@ -630,7 +716,12 @@ class TuiApp:
             return
 
         self.cmd.download_all(entries=entries)  # type: ignore
-        self.mark_as_watched_all()
+        # only the downloaded entries, in a single transaction
+        _ = self.feeder.mark_entries([e.id for e in entries], watched=True)  # type: ignore
+        self.is_channels_outdated = True
+        for e in entries:
+            e.is_viewed = True  # type: ignore
+        self.selected_ids.clear()
 
     def play(self, entry: Entry) -> None:
         self.cmd.play_video(entry)
@@ -3,6 +3,7 @@ from pathlib import Path
 
 from pytfeeder.config import DEFAULT_UPDATE_INTERVAL_MINS
 from pytfeeder.defaults import default_config_path, default_channels_filepath
+from pytfeeder.profiler import DEFAULT_SLOW_QUERY_MS
 from . import consts
 
 
@@ -95,6 +96,12 @@ def create_parser() -> argparse.ArgumentParser:
         "--last-update-fmt",
         help=f"{{last_update}} status key datetime format (default: {consts.DEFAULT_LAST_UPDATE_FMT.replace('%', '%%')!r})",
     )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        type=Path,
+        help="Write metrics to PATH on exit, json if PATH ends with .json, otherwise prometheus text format",
+    )
     parser.add_argument(
         "--new-mark",
         metavar="STR",
@@ -112,6 +119,14 @@ def create_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Prioritize unwatched entries over watched",
     )
+    parser.add_argument(
+        "--profile-sql",
+        nargs="?",
+        const=DEFAULT_SLOW_QUERY_MS,
+        type=float,
+        metavar="MS",
+        help="Log queries slower than MS (default: %(const)s) and print queries stats on exit",
+    )
     parser.add_argument(
         "--status-fmt",
         metavar="STR",
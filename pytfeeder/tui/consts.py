@@ -74,9 +74,10 @@ HELP_KEYBINDINGS = {
     "0-9": "Jump to line {index}",
     "J": "Move to next feed",
     "K": "Move to previous feed",
+    "x": "Select entry, [a], [D], [C-x, Del] then act on selected entries",
     "a": "Mark entry/feed as watched",
     "A": "Mark all entries/feeds as watched",
-    "r": "Reload/sync feeds",
+    "r": "Reload/sync feeds (Esc or C-c to cancel)",
     "d": "Download entry",
     "D": "Download all unwatched from current feed",
     "C-x, Del": "Mark entry as deleted",
@@ -1,22 +1,40 @@
+import json
+import logging
+import os
 from pathlib import Path
 import datetime as dt
+import time
+from typing import IO, Any
+
+LOCK_POLL_INTERVAL_SECS = 0.2
 
 
 class Updater:
-    def __init__(self, lock_file: Path, update_interval: int) -> None:
+    def __init__(
+        self,
+        lock_file: Path,
+        update_interval: int,
+        log: logging.Logger | None = None,
+    ) -> None:
         self.fails = 0
         self.last_update = dt.datetime.now() - dt.timedelta(minutes=update_interval + 1)
         self.lock_file = lock_file
+        self.sync_state_file = lock_file.with_name(f"{lock_file.name}.json")
+        self.log = log or logging.getLogger()
         self.max_retries = 5
         self.update_interval = update_interval
         self._state_from_file = False
+        self._lock: IO[str] | None = None
 
         if self.lock_file.exists():
             self._read_state()
 
     def _read_state(self) -> None:
         try:
-            fails, lu = self.lock_file.read_text().split(":", maxsplit=1)
+            state = self.lock_file.read_text()
+            if not state:
+                return
+            fails, lu = state.split(":", maxsplit=1)
             self.fails = int(fails)
             self.last_update = dt.datetime.fromtimestamp(float(lu))
             self._state_from_file = True
@@ -42,3 +60,96 @@ class Updater:
             self.lock_file.write_text(f"{self.fails}:{self.last_update.strftime('%s')}")
         except Exception as e:
             raise Exception(f"Can't update lock file: {e}")
+
+    def lock(self) -> bool:
+        if not self._try_lock():
+            return False
+        self._write_sync_state({"pid": os.getpid(), "started": time.time()})
+        return True
+
+    def unlock(self, result: dict[str, Any] | None = None) -> None:
+        if self._lock is None:
+            return
+        state = self._read_sync_state()
+        state.update(finished=time.time(), result=result)
+        self._write_sync_state(state)
+        self._release_lock()
+
+    async def wait_for_result(self) -> dict[str, Any] | None:
+        # returns the result of the sync that finished while waiting, or None
+        # once the lock is taken over to sync instead. A held flock always
+        # means a live holder, so there is no timeout
+        import asyncio
+
+        wait_start = time.time()
+        while not self._try_lock():
+            await asyncio.sleep(LOCK_POLL_INTERVAL_SECS)
+
+        state = self._read_sync_state()
+        if state.get("finished", 0) < wait_start:
+            self._write_sync_state({"pid": os.getpid(), "started": time.time()})
+            return None
+
+        self._release_lock()
+        self._read_state()
+        return state.get("result")
+
+    def _try_lock(self) -> bool:
+        if self._lock is not None:
+            return True
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None  # type: ignore
+
+        f = self.lock_file.open("a")
+        if fcntl is None:
+            # without flock, the sync state of a live process is the lock
+            if is_running(self._read_sync_state()):
+                f.close()
+                return False
+        else:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+        self._lock = f
+        return True
+
+    def _release_lock(self) -> None:
+        if self._lock is None:
+            return
+        try:
+            import fcntl
+
+            fcntl.flock(self._lock, fcntl.LOCK_UN)
+        except ImportError:
+            pass
+        self._lock.close()
+        self._lock = None
+
+    def _read_sync_state(self) -> dict[str, Any]:
+        try:
+            return json.loads(self.sync_state_file.read_text())
+        except Exception:
+            return {}
+
+    def _write_sync_state(self, state: dict[str, Any]) -> None:
+        try:
+            self.sync_state_file.write_text(json.dumps(state))
+        except Exception as e:
+            self.log.error(f"Can't write sync state: {e}")
+
+
+def is_running(state: dict[str, Any]) -> bool:
+    # states of finished syncs and of dead processes don't hold the lock
+    if "finished" in state or "pid" not in state:
+        return False
+    try:
+        os.kill(state["pid"], 0)
+    except PermissionError:
+        pass
+    except OSError:
+        return False
+    return True
@@ -1,59 +1,172 @@
+import html
+import json
 import logging
+import os
 from os.path import expandvars
 from pathlib import Path
 import re
-from urllib.request import urlopen
+import time
+from typing import TYPE_CHECKING
 from urllib.parse import urlparse
-from xml.etree.ElementTree import XML
-
 
 from .models import Channel
 
+if TYPE_CHECKING:
+    from .network import HttpClient
+
 
 def expand_path(path: Path) -> Path:
     return Path(expandvars(path)).expanduser()
 
 
+CHANNEL_INFO_CACHE_FILENAME = "channel_info_cache.json"
+CHANNEL_INFO_CACHE_TTL = 30 * 24 * 3600
+CHANNEL_INFO_CHUNK_SIZE = 4096
+YT_FEEDS_URL = "https://www.youtube.com/feeds/videos.xml"
+
+# the feed's own channelId may lack the UC prefix
+rx_feed_header_channel_id = re.compile(
+    rb"<yt:channelId>(?:UC)?([-_0-9a-zA-Z]{22})</yt:channelId>"
+)
+rx_feed_header_title = re.compile(rb"<title>([^<]*)</title>")
+
+
+class ChannelInfoCache:
+    # resolved channels by the url key (@handle or channel id), persisted as json
+    def __init__(self, path: Path, ttl: float = CHANNEL_INFO_CACHE_TTL) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._items: dict[str, tuple[str, str, float]] | None = None
+        self._dirty = False
+
+    @property
+    def items(self) -> dict[str, tuple[str, str, float]]:
+        if self._items is None:
+            try:
+                self._items = {
+                    k: tuple(v) for k, v in json.loads(self.path.read_text()).items()
+                }
+            except (OSError, ValueError):
+                self._items = {}
+        return self._items
+
+    def get(self, key: str) -> Channel | None:
+        item = self.items.get(key.lower())
+        if item is None or time.time() - item[2] > self.ttl:
+            return None
+        channel_id, title, _ = item
+        return Channel(title=title, channel_id=channel_id)
+
+    def set(self, key: str, channel: Channel) -> None:
+        self.items[key.lower()] = (channel.channel_id, channel.title, time.time())
+        self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        now = time.time()
+        items = {k: v for k, v in self.items.items() if now - v[2] <= self.ttl}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        _ = tmp.write_text(json.dumps(items))
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+
+def channel_feed_url(
+    url: str, feeds_url: str = YT_FEEDS_URL
+) -> tuple[str, str, str | None] | None:
+    # feed url, cache key and the channel id if it's in the url
+    u = urlparse(url)
+    if m := re.match(r"/channel/(UC[-_0-9a-zA-Z]{22})", u.path):
+        (cid,) = m.groups()
+        return f"{feeds_url}?channel_id={cid}", cid, cid
+    elif m := re.match(r"/@([^/]+)", u.path):
+        (username,) = m.groups()
+        feed_url = f"{feeds_url}?user={username}"
+        return feed_url, f"@{username}", None
+    return None
+
+
+def parse_feed_header(raw: bytes, cid: str | None) -> Channel | None:
+    # channel id and title of the feed itself, found before the first entry
+    head = raw[: raw.find(b"<entry>")] if b"<entry>" in raw else raw
+    title = rx_feed_header_title.search(head)
+    if m := rx_feed_header_channel_id.search(head):
+        cid = f"UC{m[1].decode()}"
+    if title is None or not title[1] or cid is None:
+        return None
+    return Channel(channel_id=cid, title=html.unescape(title[1].decode()))
+
+
+def is_feed_header_read(raw: bytes) -> bool:
+    return b"<entry>" in raw or (
+        b"</yt:channelId>" in raw and rx_feed_header_title.search(raw) is not None
+    )
+
+
 def fetch_channel_info(url: str) -> Channel:
     return _try_fetch_channel_info(url) or _fetch_channel_info_fallback(url)
 
 
-def _parse_channel_info(
-    raw: str, cid: str | None, username: str | None
-) -> Channel | None:
-    t = XML(raw)
-    title = t.findtext("{http://www.w3.org/2005/Atom}title") or username
-    channel_id = t.findtext(
-        "yt:channelId",
-        namespaces={"yt": "http://www.youtube.com/xml/schemas/2015"},
-    )
-    if channel_id:
-        channel_id = f"UC{channel_id}"
-    else:
-        channel_id = cid
-    if not title or not channel_id:
-        return None
-    return Channel(channel_id=channel_id, title=title)
+async def resolve_channel_info(
+    http: "HttpClient",
+    url: str,
+    cache: ChannelInfoCache | None = None,
+    feeds_url: str = YT_FEEDS_URL,
+) -> Channel:
+    # like fetch_channel_info, over the pooled session and reading only the
+    # head of the feed
+    import asyncio
+
+    if (feed := channel_feed_url(url, feeds_url)) is None:
+        return await asyncio.to_thread(_fetch_channel_info_fallback, url)
+
+    feed_url, key, cid = feed
+    if cache is not None and (channel := cache.get(key)):
+        return channel
+
+    channel = None
+    try:
+        session = await http.session()
+        async with (
+            http.slot(),
+            session.get(feed_url, timeout=http.request_timeout()) as resp,
+        ):
+            if resp.status == 200:
+                raw = b""
+                async for chunk in resp.content.iter_chunked(CHANNEL_INFO_CHUNK_SIZE):
+                    raw += chunk
+                    if is_feed_header_read(raw):
+                        break
+                channel = parse_feed_header(raw, cid)
+    except Exception as e:
+        http.log.debug(f"can't fetch channel info from {feed_url}: {e!r}")
+
+    if channel is None:
+        channel = await asyncio.to_thread(_fetch_channel_info_fallback, url)
+    if cache is not None:
+        cache.set(key, channel)
+    return channel
 
 
 def _try_fetch_channel_info(url: str) -> Channel | None:
-    u = urlparse(url)
-    feed_url = ""
-    cid = username = None
-    if m := re.match(r"/channel/(UC[-_0-9a-zA-Z]{22})", u.path):
-        (cid,) = m.groups()
-        feed_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={cid}"
-    elif m := re.match(r"/@([^/]+)", u.path):
-        (username,) = m.groups()
-        feed_url = f"https://www.youtube.com/feeds/videos.xml?user={username}"
-    else:
+    if (feed := channel_feed_url(url)) is None:
         return None
+    feed_url, _, cid = feed
+
+    from urllib.request import urlopen
+
     try:
         with urlopen(feed_url, timeout=10) as resp:
-            # print(f"{resp.status} {resp.reason} {feed_url}")
             if resp.status != 200:
                 return None
-            return _parse_channel_info(resp.read(), cid, username)
+            raw = b""
+            while chunk := resp.read(CHANNEL_INFO_CHUNK_SIZE):
+                raw += chunk
+                if is_feed_header_read(raw):
+                    break
+            return parse_feed_header(raw, cid)
     except:
         return None
 
@@ -0,0 +1,214 @@
+import os
+from pathlib import Path
+import stat
+import tempfile
+import unittest
+
+import yaml
+
+from pytfeeder.channels_file import (
+    _channel_fields,
+    _load_lines,
+    append_channels,
+    dump_channels,
+    dump_channels_yaml,
+    load_channels,
+    update_channels,
+)
+from pytfeeder.config import Config
+from pytfeeder.models import Channel
+
+from .config_mocks import raw_channels_yaml_mock, channels_mock
+
+TITLES = [
+    "Channel",
+    "Bob's channel",
+    "'quoted'",
+    "with: colon",
+    "with #hash",
+    "trailing:",
+    "- dash",
+    "[brackets]",
+    "{braces}",
+    "a, b",
+    "true",
+    "null",
+    "123",
+    "1.5",
+    "Юникод ü 漢字",
+    'double "quotes"',
+    "back\\slash",
+    "tab\tinside",
+    " leading space",
+    "trailing space ",
+    "@at",
+    "!bang",
+    "%percent",
+    "&amp",
+    "*star",
+]
+TAGS = [[], ["foo"], ["foo", "bar-baz"], ["true"], ["1"], ["with space"], ["a,b"]]
+# hand written lines, loaded by the fast path only if yaml gives the same
+CHANNEL_LINES = [
+    "- {channel_id: UC0000000000000000000000, title: trailing spaces  }",
+    "- {channel_id: UC0000000000000000000001, title: ~}",
+    "- {channel_id: UC0000000000000000000002, title: yes}",
+    "- {channel_id: UC0000000000000000000003, title: 0x1F}",
+    "- {channel_id: UC0000000000000000000004, title: 2024-01-01}",
+    "- {channel_id: UC0000000000000000000005, title: .inf}",
+    "- {channel_id: UC0000000000000000000006, tags: [yes, on], title: Channel}",
+    "- {channel_id: UC0000000000000000000007, tags: [null], title: Channel}",
+]
+
+
+class TestChannelsFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "channels.yaml"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_dumped(self):
+        channels = [
+            Channel(
+                title=title,
+                channel_id=f"UC{i:022d}",
+                hidden=i % 3 == 0,
+                tags=TAGS[i % len(TAGS)],
+            )
+            for i, title in enumerate(TITLES)
+        ]
+        raw = dump_channels_yaml(channels)
+        self.assertListEqual(_load_lines(raw) or [], yaml.safe_load(raw))
+        _ = self.path.write_text(raw)
+        self.assertListEqual(load_channels(self.path), channels)
+
+    def test_load_lines_as_yaml(self):
+        for line in CHANNEL_LINES:
+            with self.subTest(line=line):
+                self.assertListEqual(_load_lines(line) or [], yaml.safe_load(line))
+
+        # the same, whether or not another line needs the whole document loaded
+        for extra in ("", "- channel_id: UC0000000000000000000009\n  title: x\n"):
+            raw = "\n".join(CHANNEL_LINES) + "\n" + extra
+            with self.subTest(extra=extra):
+                _ = self.path.write_text(raw)
+                self.assertListEqual(
+                    load_channels(self.path),
+                    [Channel(**c) for c in yaml.safe_load(raw)],
+                )
+
+        # an error for the python loader, left to yaml
+        tab = "- {channel_id: UC0000000000000000000000, title: a\tb}"
+        self.assertIsNone(_channel_fields(tab))
+
+    def test_load_other_formats(self):
+        for raw in (
+            "",
+            "[]\n",
+            raw_channels_yaml_mock,
+            # hand written
+            "- channel_id: abcdefghijklmnopqrstuvw0\n  title: Channel 1\n",
+            "# comment\n- {title: Channel 1, channel_id: abcdefghijklmnopqrstuvw0}\n",
+            "- {channel_id: abcdefghijklmnopqrstuvw0, title: Channel 1, hidden: false}\n",
+        ):
+            with self.subTest(raw=raw):
+                _ = self.path.write_text(raw)
+                expected = [Channel(**c) for c in yaml.safe_load(raw) or []]
+                self.assertListEqual(load_channels(self.path), expected)
+
+        _ = self.path.write_text("channel_id: abcdefghijklmnopqrstuvw0\n")
+        self.assertRaises(ValueError, load_channels, self.path)
+
+    def test_append(self):
+        new = [Channel(title="Channel 3", channel_id="abcdefghijklmnopqrstuvw2")]
+        _ = self.path.write_text(raw_channels_yaml_mock)
+        self.assertTrue(append_channels(self.path, new))
+        self.assertListEqual(load_channels(self.path), channels_mock + new)
+
+        _ = self.path.write_text("")
+        self.assertTrue(append_channels(self.path, new))
+        self.assertListEqual(load_channels(self.path), new)
+
+        for raw in ("[]\n", raw_channels_yaml_mock.rstrip()):
+            with self.subTest(raw=raw):
+                _ = self.path.write_text(raw)
+                self.assertFalse(append_channels(self.path, new))
+                self.assertEqual(self.path.read_text(), raw)
+
+        # failed append leaves the file as it was
+        _ = self.path.write_text(raw_channels_yaml_mock)
+        broken = Channel(title="Channel 4", channel_id="abcdefghijklmnopqrstuvw3")
+        broken.tags = [object()]  # type: ignore
+        self.assertRaises(Exception, append_channels, self.path, [broken])
+        self.assertEqual(self.path.read_text(), raw_channels_yaml_mock)
+        self.assertListEqual(
+            [p.name for p in self.path.parent.iterdir()], ["channels.yaml"]
+        )
+
+    def test_config_add_channels(self):
+        _ = self.path.write_text("[]\n")
+        config = Config(channels_filepath=self.path)
+        config.add_channels(channels_mock)
+        self.assertEqual(self.path.read_text(), raw_channels_yaml_mock)
+        self.assertListEqual(config.channels, channels_mock[:1])
+
+        new = Channel(title="Channel 3", channel_id="abcdefghijklmnopqrstuvw2")
+        config.add_channels([new])
+        self.assertListEqual(config.all_channels, [*channels_mock, new])
+        self.assertListEqual(
+            Config(channels_filepath=self.path).all_channels, [*channels_mock, new]
+        )
+
+    def test_dump_atomic(self):
+        _ = self.path.write_text(raw_channels_yaml_mock)
+        os.chmod(self.path, 0o600)
+        link = self.path.with_name("link.yaml")
+        link.symlink_to(self.path)
+
+        dump_channels(link, channels_mock[:1])
+        self.assertTrue(link.is_symlink())
+        self.assertEqual(stat.S_IMODE(self.path.stat().st_mode), 0o600)
+        self.assertListEqual(load_channels(self.path), channels_mock[:1])
+
+        # failed dump leaves the file as it was
+        broken = Channel(title="Channel 3", channel_id="abcdefghijklmnopqrstuvw2")
+        broken.tags = [object()]  # type: ignore
+        self.assertRaises(Exception, dump_channels, self.path, [broken])
+        self.assertListEqual(load_channels(self.path), channels_mock[:1])
+        self.assertListEqual(
+            sorted(p.name for p in self.path.parent.iterdir()),
+            ["channels.yaml", "link.yaml"],
+        )
+
+    def test_update(self):
+        _ = self.path.write_text(raw_channels_yaml_mock)
+        c1, c2 = (
+            Channel(title=c.title, channel_id=c.channel_id, tags=c.tags.copy())
+            for c in channels_mock
+        )
+        c1.hidden = True
+        c1.tags = ["new"]
+        c2.title = "Renamed: 'two'"
+        self.assertTrue(update_channels(self.path, [c2, c1]))
+        self.assertEqual(self.path.read_text(), dump_channels_yaml([c1, c2]))
+
+        missing = Channel(title="Channel 3", channel_id="abcdefghijklmnopqrstuvw2")
+        self.assertFalse(update_channels(self.path, [c1, missing]))
+        self.assertTrue(update_channels(self.path, []))
+
+    def test_config_update_channels(self):
+        _ = self.path.write_text(raw_channels_yaml_mock)
+        config = Config(channels_filepath=self.path)
+        config.all_channels[0].hidden = True
+        config.update_channels(config.all_channels[:1])
+        self.assertListEqual(config.channels, [])
+        self.assertTrue(
+            all(c.hidden for c in Config(channels_filepath=self.path).all_channels)
+        )
+
+        # not in the file, the whole file is dumped
+        _ = self.path.write_text("[]\n")
+        config.update_channels(config.all_channels[:1])
+        self.assertEqual(self.path.read_text(), dump_channels_yaml(config.all_channels))
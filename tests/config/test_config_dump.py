@@ -15,7 +15,20 @@ logger:
   fmt: null
   level: notset
   stream: false
+network:
+  compression: true
+  dns_cache_ttl: 300
+  keepalive_timeout: 30
+  limit: 100
+  limit_per_host: 0
+  timeout: 10
+parse_workers: 0
+raw_archive:
+  enabled: false
+  keep: 3
+  max_size_mb: 100
 skip_shorts: false
+sync_timeout: 0
 tui:
   alphabetic_sort: false
   always_update: false
@@ -0,0 +1,157 @@
+import asyncio
+from contextlib import contextmanager
+from functools import lru_cache
+import random
+import threading
+from typing import Iterator
+
+from aiohttp import web
+
+from . import mocks
+
+FEED_PATH = "/feeds/videos.xml"
+
+
+def fake_channel_id(n: int) -> str:
+    return f"UC{n:022d}"
+
+
+class FakeFeedServer:
+    def __init__(
+        self,
+        channels_count: int,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        not_modified_rate: float = 0.0,
+        trickle_interval: float = 0.0,
+        entries_count: int = 15,
+        title_size: int = 40,
+        seed: int = 0,
+    ) -> None:
+        self.channel_ids = [fake_channel_id(n) for n in range(channels_count)]
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.not_modified_rate = not_modified_rate
+        # sends the feed a byte at a time, each after this many seconds
+        self.trickle_interval = trickle_interval
+        self.entries_count = entries_count
+        self.title_size = title_size
+        self.seed = seed
+        self.requests: dict[str, int] = {}
+        self.versions: dict[str, int] = {}
+        self.statuses: dict[int, int] = {}
+        self.url = ""
+        self._known = set(self.channel_ids)
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def feed_url(self) -> str:
+        return f"{self.url}{FEED_PATH}?channel_id=%s"
+
+    @lru_cache(maxsize=1024)
+    def feed(self, channel_id: str) -> bytes:
+        n = int(channel_id[2:])
+        title = f"{channel_id} ".ljust(self.title_size, "x")
+        return mocks.feed_fmt.format(
+            channel_title=channel_id,
+            channel_id=channel_id,
+            entries="".join(
+                mocks.entry_fmt.format(
+                    id=f"{n:08d}{i:03d}",
+                    title=f"{title} {i}",
+                    published=f"2025-01-{1 + i % 28:02d}T12:00:00+00:00",
+                    channel_id=channel_id,
+                )
+                for i in range(self.entries_count)
+            ),
+        ).encode()
+
+    async def handle_feed(self, request: web.Request) -> web.StreamResponse:
+        channel_id = request.query.get("channel_id", "")
+        if channel_id not in self._known:
+            return self._response(404)
+
+        n = self.requests[channel_id] = self.requests.get(channel_id, 0) + 1
+        # deterministic per request, regardless of the order of concurrent requests
+        rnd = random.Random(f"{self.seed}:{channel_id}:{n}")
+        delay = self.latency + rnd.random() * self.jitter
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if rnd.random() < self.error_rate:
+            return self._response(500)
+        # the feed is unchanged since the previous request at not_modified_rate,
+        # only a conditional request with the current ETag gets a 304 then
+        version = self.versions.get(channel_id, 0)
+        if channel_id in self.versions and rnd.random() >= self.not_modified_rate:
+            version += 1
+        self.versions[channel_id] = version
+        etag = f'"{channel_id}.{version}"'
+        if request.headers.get("If-None-Match") == etag:
+            return self._response(304, etag=etag)
+        if self.trickle_interval > 0:
+            return await self._trickle(request, self.feed(channel_id))
+        return self._response(200, self.feed(channel_id), etag=etag)
+
+    async def _trickle(self, request: web.Request, body: bytes) -> web.StreamResponse:
+        self.statuses[200] = self.statuses.get(200, 0) + 1
+        resp = web.StreamResponse(headers={"Content-Type": "application/atom+xml"})
+        resp.content_length = len(body)
+        _ = await resp.prepare(request)
+        for i in range(len(body)):
+            await asyncio.sleep(self.trickle_interval)
+            await resp.write(body[i : i + 1])
+        await resp.write_eof()
+        return resp
+
+    def _response(
+        self, status: int, body: bytes | None = None, etag: str | None = None
+    ) -> web.Response:
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        return web.Response(
+            status=status,
+            body=body,
+            headers={"ETag": etag} if etag else None,
+            content_type="application/atom+xml",
+        )
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get(FEED_PATH, self.handle_feed)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0, backlog=4096)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeFeedServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    @contextmanager
+    def serve_in_thread(self) -> Iterator["FakeFeedServer"]:
+        # separate loop, so the server doesn't compete with the measured client
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self.start(), loop).result()
+            yield self
+        finally:
+            asyncio.run_coroutine_threadsafe(self.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
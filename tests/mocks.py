@@ -47,3 +47,75 @@ raw_feed = feed_fmt.format(
         for e in sample_entries
     ),
 ).strip()
+
+# full layout of the feeds served by youtube.com/feeds/videos.xml
+yt_entry_fmt = """ <entry>
+  <id>yt:video:{id}</id>
+  <yt:videoId>{id}</yt:videoId>
+  <yt:channelId>{channel_id}</yt:channelId>
+  <title>{title}</title>
+  <link rel="alternate" href="https://www.youtube.com/{path}"/>
+  <author>
+   <name>{channel_title}</name>
+   <uri>https://www.youtube.com/channel/{channel_id}</uri>
+  </author>
+  <published>{published}</published>
+  <updated>{published}</updated>
+  <media:group>
+   <media:title>{title}</media:title>
+   <media:content url="https://www.youtube.com/v/{id}?version=3" type="application/x-shockwave-flash" width="640" height="390"/>
+   <media:thumbnail url="https://i1.ytimg.com/vi/{id}/hqdefault.jpg" width="480" height="360"/>
+   <media:description>{description}</media:description>
+   <media:community>
+    <media:starRating count="1234" average="5.00" min="1" max="5"/>
+    <media:statistics views="56789"/>
+   </media:community>
+  </media:group>
+ </entry>
+"""
+
+yt_feed_fmt = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns:media="http://search.yahoo.com/mrss/" xmlns="http://www.w3.org/2005/Atom">
+ <link rel="self" href="http://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"/>
+ <id>yt:channel:{channel_id}</id>
+ <yt:channelId>{channel_id}</yt:channelId>
+ <title>{channel_title}</title>
+ <link rel="alternate" href="https://www.youtube.com/channel/{channel_id}"/>
+ <author>
+  <name>{channel_title}</name>
+  <uri>https://www.youtube.com/channel/{channel_id}</uri>
+ </author>
+ <published>2015-01-01T00:00:00+00:00</published>
+{entries}</feed>
+"""
+
+
+def yt_feed(
+    channel_id: str,
+    entries_count: int = 15,
+    *,
+    channel_title: str = "Sample &amp; Channel",
+    shorts_every: int = 0,
+    description_size: int = 500,
+) -> str:
+    n = int.from_bytes(channel_id.encode()[-4:], "big")
+    return yt_feed_fmt.format(
+        channel_id=channel_id,
+        channel_title=channel_title,
+        entries="".join(
+            yt_entry_fmt.format(
+                id=f"{n % 10**8:08d}{i:03d}",
+                channel_id=channel_id,
+                channel_title=channel_title,
+                title=f"Video #{i} &lt;part {i}&gt; &amp; &quot;more&quot; &#8212; ok",
+                path=(
+                    f"shorts/{n % 10**8:08d}{i:03d}"
+                    if shorts_every and i % shorts_every == 0
+                    else f"watch?v={n % 10**8:08d}{i:03d}"
+                ),
+                published=f"2025-01-{1 + i % 28:02d}T12:{i % 60:02d}:00+00:00",
+                description="Lorem ipsum dolor sit amet. " * (description_size // 28),
+            )
+            for i in range(entries_count)
+        ),
+    )
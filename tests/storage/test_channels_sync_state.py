@@ -0,0 +1,80 @@
+import datetime as dt
+from pathlib import Path
+import unittest
+
+from pytfeeder.storage import Storage
+from .. import mocks, utils
+
+
+class TestChannelsSyncState(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        utils.setup_logging(filename=f"{Path(__file__).name}.log")
+        cls.db_file = utils.temp_storage_path()
+        cls.stor = Storage(cls.db_file)
+        assert cls.stor.add_entries(mocks.sample_entries) == len(mocks.sample_entries)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.db_file.exists():
+            cls.db_file.unlink()
+
+    def test_sync_state(self):
+        channel_id = mocks.sample_channel.channel_id
+        empty_channel_id = "empty_channel_id12345678"
+        states = self.stor.select_channels_sync_state()
+        self.assertIn(channel_id, states)
+        st = states[channel_id]
+        self.assertEqual(st.entries_count, len(mocks.sample_entries))
+        self.assertEqual(st.last_published, mocks.sample_entries[0].published)
+        self.assertEqual(st.first_published, mocks.sample_entries[-1].published)
+        self.assertIsNone(st.last_fetch)
+
+        t1 = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+        t2 = t1 + dt.timedelta(hours=1)
+        self.stor.update_channels_sync_state(
+            [(channel_id, t1, t1), (empty_channel_id, t1, None)]
+        )
+        self.stor.update_channels_sync_state([(channel_id, t2, None)])
+
+        states = self.stor.select_channels_sync_state()
+        self.assertEqual(states[channel_id].last_fetch, t2)
+        self.assertEqual(states[channel_id].last_new, t1)
+        self.assertEqual(states[empty_channel_id].entries_count, 0)
+        self.assertEqual(states[empty_channel_id].last_fetch, t1)
+        self.assertIsNone(states[empty_channel_id].last_new)
+
+    def test_fails(self):
+        channel_id = "failing_channel_id123456"
+        t1 = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+        t2 = t1 + dt.timedelta(hours=1)
+        self.stor.update_channels_fails([(channel_id, t1, "404, Not Found")])
+        self.stor.update_channels_fails([(channel_id, t2, "timeout")])
+
+        st = self.stor.select_channels_sync_state()[channel_id]
+        self.assertEqual(st.fails, 2)
+        self.assertEqual(st.last_fail, t2)
+        self.assertEqual(st.last_error, "timeout")
+        self.assertIsNone(st.last_fetch)
+
+        self.assertEqual(self.stor.reset_channels_fails([channel_id]), 1)
+        self.stor.update_channels_fails([(channel_id, t2, "timeout")])
+        self.stor.update_channels_sync_state([(channel_id, t2, None)])
+        st = self.stor.select_channels_sync_state()[channel_id]
+        self.assertEqual(st.fails, 0)
+        self.assertIsNone(st.last_error)
+        self.assertEqual(st.last_fetch, t2)
+
+    def test_validators(self):
+        channel_id = "validators_channel_id123"
+        t1 = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+        self.stor.update_channels_sync_state([(channel_id, t1, None)])
+        etag, last_modified = '"v1"', "Wed, 01 Jan 2025 00:00:00 GMT"
+        self.stor.update_channels_validators([(channel_id, etag, last_modified)])
+        st = self.stor.select_channels_sync_state()[channel_id]
+        self.assertEqual((st.etag, st.last_modified), (etag, last_modified))
+        self.assertEqual(st.last_fetch, t1)
+
+        self.stor.update_channels_validators([(channel_id, None, None)])
+        st = self.stor.select_channels_sync_state()[channel_id]
+        self.assertEqual((st.etag, st.last_modified), (None, None))
@@ -0,0 +1,40 @@
+from pathlib import Path
+import unittest
+
+from benchmarks.gen_db import generate_db
+from pytfeeder.storage import Storage
+from .. import utils
+
+
+class TestGenDb(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        utils.setup_logging(filename=f"{Path(__file__).name}.log")
+        cls.db_file = utils.temp_storage_path()
+        cls.channels = generate_db(
+            cls.db_file,
+            channels_count=10,
+            entries_per_channel=20,
+            watched_ratio=0.5,
+            deleted_ratio=0.2,
+        )
+        cls.stor = Storage(cls.db_file)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db_file.unlink(missing_ok=True)
+
+    def test_generated_db(self):
+        stats = self.stor.select_global_stats()
+        self.assertEqual(stats.total, 10 * 20)
+        self.assertTrue(0 < stats.deleted < stats.total)
+        self.assertTrue(0 < stats.unwatched < stats.count)
+        self.assertSetEqual(
+            set(self.stor.select_channels_stats()),
+            {c.channel_id for c in self.channels},
+        )
+
+        entries = self.stor.select_entries(channel_id=self.channels[0].channel_id)
+        self.assertListEqual(
+            entries, sorted(entries, key=lambda e: e.published, reverse=True)
+        )
@@ -0,0 +1,67 @@
+from pathlib import Path
+import unittest
+
+from pytfeeder.models import Channel, GlobalStats
+from pytfeeder.storage import Storage
+from .. import mocks, utils
+
+
+class TestGlobalStats(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        utils.setup_logging(filename=f"{Path(__file__).name}.log")
+        cls.db_file = utils.temp_storage_path()
+        cls.stor = Storage(cls.db_file)
+
+        cls.sample_entries = mocks.sample_entries
+        cls.another_entry = mocks.another_sample_entries[0]
+        cls.entries = cls.sample_entries + [cls.another_entry]
+
+        assert cls.stor.add_entries(cls.entries) == len(cls.entries)
+        cls.stor.mark_entry_as_watched(id=cls.sample_entries[0].id)
+        cls.stor.mark_entry_as_deleted(id=cls.sample_entries[1].id)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.db_file.exists():
+            cls.db_file.unlink()
+
+    def test_select_global_stats(self):
+        self.assertEqual(
+            self.stor.select_global_stats(),
+            GlobalStats(total=4, count=3, deleted=1, unwatched=2, feed_count=3),
+        )
+        self.assertEqual(
+            self.stor.select_global_stats(in_channels=[mocks.sample_channel]),
+            GlobalStats(total=4, count=3, deleted=1, unwatched=1, feed_count=2),
+        )
+
+    def test_counts_match(self):
+        stats = self.stor.select_global_stats(in_channels=[mocks.sample_channel])
+        self.assertEqual(stats.total, self.stor.select_entries_count())
+        self.assertEqual(stats.count, self.stor.select_entries_count(is_deleted=False))
+        self.assertEqual(stats.deleted, self.stor.select_entries_count(is_deleted=True))
+        self.assertEqual(
+            stats.unwatched,
+            self.stor.select_entries_count(
+                is_deleted=False, is_watched=False, in_channels=[mocks.sample_channel]
+            ),
+        )
+
+    def test_many_channels(self):
+        # twice as many markers would exceed SQLITE_MAX_VARIABLE_NUMBER (250000)
+        channels = [
+            Channel(channel_id=f"channel_id{i:014d}", title=f"Channel {i}")
+            for i in range(130000)
+        ] + [mocks.sample_channel]
+        self.assertEqual(
+            self.stor.select_global_stats(in_channels=channels),
+            self.stor.select_global_stats(in_channels=[mocks.sample_channel]),
+        )
+
+    def test_empty_storage(self):
+        db_file = utils.temp_storage_path()
+        try:
+            self.assertEqual(Storage(db_file).select_global_stats(), GlobalStats())
+        finally:
+            db_file.unlink(missing_ok=True)
@@ -0,0 +1,59 @@
+import datetime as dt
+from pathlib import Path
+import unittest
+
+from pytfeeder.models import Entry
+from pytfeeder.storage import BULK_MAX_MARKERS, Storage
+from .. import utils
+
+
+class TestMarkEntries(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        utils.setup_logging(filename=f"{Path(__file__).name}.log")
+
+    def setUp(self):
+        self.db_file = utils.temp_storage_path()
+        self.stor = Storage(self.db_file)
+        published = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+        self.entries = [
+            Entry(
+                id=f"{i:011d}",
+                title=f"Video #{i}",
+                published=published,
+                channel_id="c" * 24,
+            )
+            for i in range(BULK_MAX_MARKERS * 2)
+        ]
+        assert self.stor.add_entries(self.entries) == len(self.entries)
+
+    def tearDown(self):
+        self.db_file.unlink(missing_ok=True)
+
+    def test_mark_watched(self):
+        ids = [e.id for e in self.entries[:10]]
+        self.assertEqual(self.stor.mark_entries(ids + ids[:3], watched=True), 10)
+        self.assertEqual(self.stor.select_entries_count(is_watched=True), 10)
+        self.assertEqual(self.stor.mark_entries(ids[:5], watched=False), 5)
+        self.assertEqual(self.stor.select_entries_count(is_watched=True), 5)
+
+    def test_mark_many(self):
+        # over the markers limit the ids go as a json array
+        ids = [e.id for e in self.entries[: BULK_MAX_MARKERS + 1]] + ["unknown"]
+        self.assertEqual(
+            self.stor.mark_entries(ids, watched=True, deleted=True),
+            BULK_MAX_MARKERS + 1,
+        )
+        self.assertEqual(
+            self.stor.select_entries_count(is_deleted=True, is_watched=True),
+            BULK_MAX_MARKERS + 1,
+        )
+        self.assertEqual(
+            self.stor.select_entries_count(is_deleted=False),
+            len(self.entries) - BULK_MAX_MARKERS - 1,
+        )
+
+    def test_noop(self):
+        self.assertEqual(self.stor.mark_entries([], watched=True), 0)
+        self.assertEqual(self.stor.mark_entries([self.entries[0].id]), 0)
+        self.assertEqual(self.stor.select_entries_count(is_watched=True), 0)
@@ -0,0 +1,104 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+from pytfeeder.archive import FeedArchive
+from pytfeeder.config import Config
+from pytfeeder.feeder import Feeder
+from pytfeeder.models import Channel, SyncStatus
+from pytfeeder.storage import Storage
+from .fake_server import FakeFeedServer
+from .mocks import yt_feed
+from .utils import setup_logging
+
+
+class TestFeedArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_rotate(self):
+        archive = FeedArchive(self.path, keep=2)
+        raws = [f"feed {i}".encode() for i in range(4)]
+        for raw in raws:
+            _ = archive.add("c1", raw)
+        _ = archive.add("c2", b"other")
+
+        self.assertListEqual(archive.channel_ids(), ["c1", "c2"])
+        files = archive.channel_files("c1")
+        self.assertEqual(len(files), 2)
+        self.assertListEqual([archive.read(f) for f in files], raws[-2:])
+        self.assertListEqual(
+            [(c, archive.read(f)) for c, f in archive.iter_files()],
+            [("c1", raws[-1]), ("c2", b"other")],
+        )
+        self.assertEqual(len(list(archive.iter_files(latest_only=False))), 3)
+
+    def test_prune(self):
+        archive = FeedArchive(self.path, keep=10, max_bytes=0)
+        for i in range(3):
+            _ = archive.add("c1", f"feed {i}".encode())
+        size = archive.channel_files("c1")[-1].stat().st_size
+        archive.max_bytes = size
+        self.assertEqual(archive.prune(), 2)
+        self.assertListEqual(
+            [archive.read(f) for f in archive.channel_files("c1")], [b"feed 2"]
+        )
+
+
+class TestArchiveReplay(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        setup_logging(filename=f"{Path(__file__).name}.log")
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def feeder(self, channel_ids: list[str], db_name: str) -> Feeder:
+        config = Config(
+            channels=[Channel(title=c_id, channel_id=c_id) for c_id in channel_ids],
+            data_dir=self.path,
+            storage_path=self.path / db_name,
+            lock_file=self.path / "pytfeeder_update.lock",
+        )
+        config.raw_archive.enabled = True
+        return Feeder(config, Storage(config.storage_path))
+
+    async def test_sync_and_replay(self):
+        async with FakeFeedServer(10, entries_count=5) as server:
+            feeder = self.feeder(server.channel_ids, "sync.db")
+            feeder.feed_url = server.feed_url
+            report = await feeder.sync_entries()
+            self.assertIsNone(report.error)
+            self.assertEqual(report.new, 50)
+
+        assert feeder.archive is not None
+        self.assertListEqual(feeder.archive.channel_ids(), sorted(server.channel_ids))
+
+        replay = self.feeder(server.channel_ids, "replay.db").replay_archive()
+        self.assertIsNone(replay.error)
+        self.assertEqual(replay.new, 50)
+        self.assertEqual(len(replay.channels), 10)
+        self.assertTrue(all(r.parse_time > 0 for r in replay.channels))
+
+    def test_replay_unknown_and_broken(self):
+        archive = FeedArchive(self.path / "raw_feeds")
+        c1, c2, c3 = "UC" + "a" * 22, "UC" + "b" * 22, "UC" + "c" * 22
+        _ = archive.add(c1, yt_feed(c1, 3).encode())
+        _ = archive.add(c2, b"<feed>")
+        _ = archive.add(c3, yt_feed(c3, 3).encode())
+
+        report = self.feeder([c1, c2], "replay.db").replay_archive()
+        self.assertEqual(report.new, 3)
+        self.assertIsNotNone(report.error)
+        self.assertListEqual(
+            [(r.channel_id, r.status) for r in report.channels],
+            [(c1, SyncStatus.OK), (c2, SyncStatus.FAILED)],
+        )
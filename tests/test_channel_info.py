@@ -0,0 +1,80 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+from pytfeeder.models import Channel
+from pytfeeder.network import HttpClient
+from pytfeeder.utils import (
+    ChannelInfoCache,
+    channel_feed_url,
+    is_feed_header_read,
+    parse_feed_header,
+    resolve_channel_info,
+)
+from . import mocks
+from .fake_server import FEED_PATH, FakeFeedServer
+from .utils import setup_logging
+
+CID = "UC" + "a" * 22
+
+
+class TestChannelInfo(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        setup_logging(filename=f"{Path(__file__).name}.log")
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.tmp_dir.name) / "cache.json"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_channel_feed_url(self):
+        self.assertEqual(
+            channel_feed_url(f"https://www.youtube.com/channel/{CID}/videos"),
+            (f"https://www.youtube.com/feeds/videos.xml?channel_id={CID}", CID, CID),
+        )
+        self.assertEqual(
+            channel_feed_url("https://www.youtube.com/@Handle", "http://x/feeds"),
+            ("http://x/feeds?user=Handle", "@Handle", None),
+        )
+        self.assertIsNone(channel_feed_url("https://www.youtube.com/watch?v=x"))
+
+    def test_parse_feed_header(self):
+        raw = mocks.yt_feed(CID, 3).encode()
+        head = raw[: raw.find(b"<author>")]
+        self.assertTrue(is_feed_header_read(head))
+        self.assertFalse(is_feed_header_read(raw[: raw.find(b"<title>")]))
+        channel = Channel(title="Sample & Channel", channel_id=CID)
+        self.assertEqual(parse_feed_header(head, None), channel)
+        self.assertEqual(parse_feed_header(raw, None), channel)
+        # channel id without UC prefix
+        raw = raw.replace(
+            f">{CID}</yt:channelId>".encode(), f">{CID[2:]}</yt:channelId>".encode()
+        )
+        self.assertEqual(parse_feed_header(raw, None), channel)
+        self.assertIsNone(parse_feed_header(b"<feed><entry>", None))
+
+    def test_cache(self):
+        cache = ChannelInfoCache(self.cache_path, ttl=60)
+        self.assertIsNone(cache.get("@handle"))
+        cache.set("@Handle", Channel(title="Title", channel_id=CID))
+        cache.save()
+
+        cache = ChannelInfoCache(self.cache_path, ttl=60)
+        self.assertEqual(cache.get("@handle"), Channel(title="Title", channel_id=CID))
+        cache.ttl = -1
+        self.assertIsNone(cache.get("@handle"))
+
+    async def test_resolve(self):
+        async with FakeFeedServer(3, entries_count=50) as server:
+            feeds_url = server.url + FEED_PATH
+            cache = ChannelInfoCache(self.cache_path)
+            cid = server.channel_ids[1]
+            url = f"https://www.youtube.com/channel/{cid}"
+            async with HttpClient() as http:
+                for _ in range(2):
+                    channel = await resolve_channel_info(http, url, cache, feeds_url)
+                    self.assertEqual(channel, Channel(title=cid, channel_id=cid))
+            self.assertEqual(server.requests, {cid: 1})
@@ -0,0 +1,122 @@
+import asyncio
+from pathlib import Path
+import tempfile
+import unittest
+
+from pytfeeder.channels_import import (
+    import_channels,
+    parse_csv,
+    parse_import_file,
+    parse_opml,
+    parse_urls,
+)
+from pytfeeder.models import Channel
+from .utils import setup_logging
+
+CID1 = "UC" + "a" * 22
+CID2 = "UC" + "b" * 22
+CID3 = "UC" + "c" * 22
+
+OPML = f"""<?xml version="1.0"?>
+<opml version="1.1">
+  <body>
+    <outline text="YouTube Subscriptions" title="YouTube Subscriptions">
+      <outline text="Channel 1" title="Channel 1" type="rss" xmlUrl="https://www.youtube.com/feeds/videos.xml?channel_id={CID1}" />
+      <outline text="Channel 2" type="rss" xmlUrl="https://www.youtube.com/feeds/videos.xml?user=channel2" />
+    </outline>
+  </body>
+</opml>
+"""
+
+CSV = f"""Channel Id,Channel Url,Channel Title
+{CID1},http://www.youtube.com/channel/{CID1},Channel 1
+{CID2},http://www.youtube.com/channel/{CID2},"Channel, 2"
+
+"""
+
+URLS = f"""# subscriptions
+https://www.youtube.com/@channel1
+
+{CID3}
+"""
+
+
+class TestChannelsImport(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        setup_logging(filename=f"{Path(__file__).name}.log")
+
+    def test_parse(self):
+        self.assertListEqual(
+            parse_opml(OPML),
+            [
+                Channel(title="Channel 1", channel_id=CID1),
+                "https://www.youtube.com/feeds/videos.xml?user=channel2",
+            ],
+        )
+        self.assertListEqual(
+            parse_csv(CSV),
+            [
+                Channel(title="Channel 1", channel_id=CID1),
+                Channel(title="Channel, 2", channel_id=CID2),
+            ],
+        )
+        self.assertListEqual(
+            parse_urls(URLS),
+            [
+                "https://www.youtube.com/@channel1",
+                f"https://www.youtube.com/channel/{CID3}",
+            ],
+        )
+
+    def test_parse_import_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name, raw, parse in (
+                ("subscriptions.opml", OPML, parse_opml),
+                ("subscriptions.csv", CSV, parse_csv),
+                ("subscriptions.txt", URLS, parse_urls),
+            ):
+                path = Path(tmp_dir) / name
+                _ = path.write_text(raw)
+                self.assertListEqual(parse_import_file(path), parse(raw))
+
+    async def test_import(self):
+        known = [Channel(title="Channel 1", channel_id=CID1)]
+        ids = {"@c1": CID1, "@c2": CID2, "@c3": CID3}
+        calls = []
+        active = max_active = 0
+
+        async def resolve(url: str) -> Channel:
+            nonlocal active, max_active
+            calls.append(url)
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            if url not in ids:
+                raise Exception("not found")
+            return Channel(title=url, channel_id=ids[url])
+
+        items = [
+            "@c1",
+            "@c2",
+            f"https://www.youtube.com/channel/{CID1}",
+            Channel(title="Channel 2", channel_id=CID2),
+            "@c2",
+            "@unknown",
+            Channel(title="Channel 3", channel_id=CID3),
+            "@c3",
+        ]
+        report = await import_channels(items, known, resolve=resolve, concurrency=2)
+
+        self.assertListEqual(sorted(calls), ["@c1", "@c2", "@c3", "@unknown"])
+        self.assertEqual(max_active, 2)
+        self.assertListEqual(
+            report.added,
+            [
+                Channel(title="@c2", channel_id=CID2),
+                Channel(title="Channel 3", channel_id=CID3),
+            ],
+        )
+        self.assertListEqual(report.existing, known * 2)
+        self.assertListEqual(report.failed, [("@unknown", "not found")])
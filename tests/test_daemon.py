@@ -0,0 +1,128 @@
+import asyncio
+import json
+from pathlib import Path
+import tempfile
+import unittest
+
+from pytfeeder.client import subscribe
+from pytfeeder.config import Config
+from pytfeeder.daemon import Daemon
+from pytfeeder.feeder import Feeder
+from pytfeeder.models import Channel
+from pytfeeder.storage import Storage
+from . import mocks
+from .fake_server import FakeFeedServer
+from .utils import temp_storage_path
+
+
+class TestDaemon(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.db_file = temp_storage_path()
+        config = Config(
+            channels=[mocks.sample_channel],
+            storage_path=self.db_file,
+            lock_file=self.tmp_path / "pytfeeder_update.lock",
+        )
+        self.daemon = Daemon(
+            Feeder(config, Storage(self.db_file)),
+            self.tmp_path / "pytfeeder.sock",
+            hook_cmd=f"cat > {self.tmp_path}/hook_{{count}}.ndjson",
+        )
+        await self.daemon.start()
+
+    async def asyncTearDown(self):
+        await self.daemon.close()
+        self.db_file.unlink(missing_ok=True)
+        self.tmp_dir.cleanup()
+
+    async def test_new_entries_events(self):
+        events = subscribe(self.daemon.socket_path)
+        first_event = asyncio.create_task(asyncio.to_thread(next, events))
+        while not self.daemon.subscribers:
+            await asyncio.sleep(0.01)
+
+        new_entries = self.daemon.feeder.stor.insert_entries(mocks.sample_entries)
+        self.assertListEqual(new_entries, mocks.sample_entries)
+        self.assertListEqual(
+            self.daemon.feeder.stor.insert_entries(mocks.sample_entries), []
+        )
+        self.daemon.feeder.on_new_entries(new_entries)  # type: ignore
+        await self.daemon.emit(self.daemon._new_entries)
+
+        event = await asyncio.wait_for(first_event, timeout=5)
+        events.close()
+        self.assertEqual(event["event"], "new_entries")
+        self.assertListEqual(
+            [e["id"] for e in event["entries"]], [e.id for e in mocks.sample_entries]
+        )
+        self.assertEqual(
+            event["entries"][0]["channel_title"], mocks.sample_channel.title
+        )
+
+        hook_output = self.tmp_path / f"hook_{len(mocks.sample_entries)}.ndjson"
+        rows = list(map(json.loads, hook_output.read_text().splitlines()))
+        self.assertListEqual(rows, event["entries"])
+
+    async def test_hook_with_braces(self):
+        entries = mocks.sample_entries
+        self.daemon.hook_cmd = (
+            f"awk 'END {{ print NR }}' > {self.tmp_path}/count_{{count}}.txt"
+        )
+        await self.daemon.emit(entries)
+        count_file = self.tmp_path / f"count_{len(entries)}.txt"
+        self.assertEqual(count_file.read_text().strip(), str(len(entries)))
+
+        # failing hooks are logged, the daemon goes on
+        self.daemon.hook_cmd = "exit 3 # {0} {"
+        with self.assertLogs(level="ERROR") as logs:
+            await self.daemon.emit(entries)
+        self.assertIn("exited with 3", logs.output[0])
+
+
+class TestDaemonRun(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.db_file = temp_storage_path()
+
+    def tearDown(self):
+        self.db_file.unlink(missing_ok=True)
+        self.tmp_dir.cleanup()
+
+    async def test_sync_cycle(self):
+        async with FakeFeedServer(5, entries_count=3) as server:
+            config = Config(
+                channels=[Channel(title=c, channel_id=c) for c in server.channel_ids],
+                storage_path=self.db_file,
+                lock_file=self.tmp_path / "pytfeeder_update.lock",
+            )
+            feeder = Feeder(config, Storage(self.db_file))
+            feeder.feed_url = server.feed_url
+            metrics_file = self.tmp_path / "metrics.prom"
+            daemon = Daemon(
+                feeder,
+                self.tmp_path / "pytfeeder.sock",
+                hook_cmd=f"cat > {self.tmp_path}/hook_{{count}}.ndjson",
+                metrics_file=metrics_file,
+            )
+            task = asyncio.create_task(daemon.run())
+            while not metrics_file.exists():
+                self.assertFalse(task.done())
+                await asyncio.sleep(0.01)
+
+            # the cycle is done, the daemon sleeps until the next one
+            self.assertIsNotNone(feeder.stor._conn)
+            self.assertTrue(feeder.http.is_open)
+            self.assertTrue(daemon.socket_path.exists())
+            _ = task.cancel()
+            await asyncio.wait_for(task, timeout=5)
+
+        self.assertIsNone(feeder.stor._conn)
+        self.assertFalse(feeder.http.is_open)
+        self.assertEqual(server.statuses, {200: 5})
+        self.assertEqual(feeder.global_stats().count, 5 * 3)
+        self.assertIn("pytfeeder_sync_seconds", metrics_file.read_text())
+        hook_output = self.tmp_path / f"hook_{5 * 3}.ndjson"
+        self.assertEqual(len(hook_output.read_text().splitlines()), 5 * 3)
@@ -0,0 +1,136 @@
+import asyncio
+from pathlib import Path
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from pytfeeder.config import Config
+from pytfeeder.feeder import FETCH_MAX_ATTEMPTS, Feeder
+from pytfeeder.models import Channel, SyncReport, SyncStatus
+from pytfeeder.storage import Storage
+from .fake_server import FakeFeedServer
+from .utils import setup_logging, temp_storage_path
+
+
+class TestFakeServerSync(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        setup_logging(filename=f"{Path(__file__).name}.log")
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_file = temp_storage_path()
+
+    def tearDown(self):
+        self.db_file.unlink(missing_ok=True)
+        self.tmp_dir.cleanup()
+
+    def feeder(self, server: FakeFeedServer) -> Feeder:
+        channels = [Channel(title=c_id, channel_id=c_id) for c_id in server.channel_ids]
+        feeder = Feeder(
+            Config(
+                channels=channels,
+                storage_path=self.db_file,
+                lock_file=Path(self.tmp_dir.name) / "pytfeeder_update.lock",
+            ),
+            Storage(self.db_file),
+        )
+        feeder.feed_url = server.feed_url
+        return feeder
+
+    async def test_sync(self):
+        async with FakeFeedServer(50, entries_count=5, jitter=0.05) as server:
+            feeder = self.feeder(server)
+            report = await feeder.sync_entries()
+            self.assertIsNone(report.error)
+            self.assertEqual(report.new, 50 * 5)
+            self.assertTrue(all(r.status == SyncStatus.OK for r in report.channels))
+            self.assertTrue(all(r.bytes > 0 for r in report.channels))
+            self.assertEqual(feeder.global_stats().count, 50 * 5)
+
+            report = await feeder.sync_entries()
+            self.assertEqual(report.new, 0)
+            self.assertEqual(server.statuses, {200: 100})
+
+    async def test_not_modified(self):
+        async with FakeFeedServer(10, not_modified_rate=1.0) as server:
+            feeder = self.feeder(server)
+            report = await feeder.sync_entries()
+            self.assertEqual(report.new, 10 * 15)
+            self.assertEqual(server.statuses, {200: 10})
+
+            report = await feeder.sync_entries()
+            self.assertIsNone(report.error)
+            self.assertEqual(report.new, 0)
+            self.assertListEqual(
+                [r.status for r in report.channels], [SyncStatus.NOT_MODIFIED] * 10
+            )
+            self.assertEqual(server.statuses, {200: 10, 304: 10})
+
+            # the validators are kept for the next conditional request
+            states = feeder.stor.select_channels_sync_state()
+            self.assertListEqual(
+                [states[c_id].etag for c_id in server.channel_ids],
+                [f'"{c_id}.0"' for c_id in server.channel_ids],
+            )
+
+    async def test_trickle_timeout(self):
+        async with FakeFeedServer(1, trickle_interval=0.2) as server:
+            feeder = self.feeder(server)
+            feeder.config.network.timeout = 1
+            start = time.perf_counter()
+            with patch("pytfeeder.feeder.FETCH_MAX_ATTEMPTS", 1):
+                report = await asyncio.wait_for(feeder.sync_entries(), timeout=5)
+            self.assertLess(time.perf_counter() - start, 2)
+            self.assertEqual(len(report.failed), 1)
+            self.assertEqual(report.failed[0].http_status, 200)
+
+    async def test_errors(self):
+        async with FakeFeedServer(3, error_rate=1.0) as server:
+            report = await self.feeder(server).sync_entries()
+            self.assertIsNotNone(report.error)
+            self.assertEqual(len(report.failed), 3)
+            self.assertTrue(all(r.http_status == 500 for r in report.failed))
+            self.assertTrue(
+                all(r.attempts == FETCH_MAX_ATTEMPTS for r in report.failed)
+            )
+            self.assertEqual(server.statuses, {500: 3 * FETCH_MAX_ATTEMPTS})
+
+    async def test_sharded_sync(self):
+        async with FakeFeedServer(30, entries_count=5, error_rate=0.1) as server:
+            feeder = self.feeder(server)
+            new_entries = []
+            feeder.on_new_entries = new_entries.extend
+            report = await feeder.sync_entries(workers=3)
+            self.assertEqual(len(report.channels), 30)
+            ok = report.with_status(SyncStatus.OK)
+            self.assertEqual(report.new, len(ok) * 5)
+            self.assertEqual(len(new_entries), report.new)
+            self.assertEqual(feeder.global_stats().count, report.new)
+            self.assertEqual(len(ok) + len(report.failed), 30)
+            self.assertSetEqual(set(server.requests), set(server.channel_ids))
+
+    async def test_http_reuse(self):
+        async with FakeFeedServer(20, entries_count=1) as server:
+            feeder = self.feeder(server)
+            feeder.config.network.limit = 5
+            report = await feeder.sync_entries()
+            self.assertFalse(feeder.http.is_open)
+            assert report.http is not None
+            self.assertEqual(report.http.requests, 20)
+            self.assertLessEqual(report.http.connections_created, 5)
+            self.assertEqual(
+                report.http.connections_created + report.http.connections_reused, 20
+            )
+
+            async with feeder.http:
+                _ = await feeder.sync_entries()
+                report = await feeder.sync_entries()
+                self.assertTrue(feeder.http.is_open)
+            assert report.http is not None
+            self.assertEqual(report.http.connections_created, 0)
+            self.assertEqual(report.http.connections_reused, 20)
+            self.assertDictEqual(
+                SyncReport.from_dict(report.to_dict()).to_dict(), report.to_dict()
+            )
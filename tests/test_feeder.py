@@ -1,10 +1,15 @@
 from pathlib import Path
+import tempfile
 import unittest
 
+from aiohttp import ClientResponseError
+
 from pytfeeder.config import Config
-from pytfeeder.feeder import Feeder
+from pytfeeder.feeder import FETCH_MAX_ATTEMPTS, Feeder
+from pytfeeder.models import ChannelSyncResult
 from pytfeeder.storage import Storage
 from . import mocks
+from .fake_server import FakeFeedServer
 from .utils import temp_storage_path
 
 
@@ -28,3 +33,42 @@ class FeederTest(unittest.TestCase):
         self.feeder.refresh_channels_stats()
         after = self.feeder.channels[0].have_updates
         self.assertNotEqual(before, after)
+
+
+class FetchFeedTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_file = temp_storage_path()
+        self.feeder = Feeder(
+            Config(
+                channels=[],
+                storage_path=self.db_file,
+                lock_file=Path(self.tmp_dir.name) / "pytfeeder_update.lock",
+            ),
+            Storage(self.db_file),
+        )
+
+    def tearDown(self):
+        self.db_file.unlink(missing_ok=True)
+        self.tmp_dir.cleanup()
+
+    async def test_fetch_feed(self):
+        async with FakeFeedServer(1) as server, self.feeder.http:
+            session = await self.feeder.http.session()
+            channel_id = server.channel_ids[0]
+            result = ChannelSyncResult(channel_id)
+            raw = await self.feeder._fetch_feed(
+                session, server.feed_url % channel_id, result
+            )
+            self.assertEqual(raw, server.feed(channel_id))
+            self.assertEqual(result.http_status, 200)
+            self.assertEqual(result.attempts, 1)
+            self.assertEqual(result.bytes, len(raw))
+
+            result = ChannelSyncResult("unknown")
+            with self.assertRaises(ClientResponseError):
+                _ = await self.feeder._fetch_feed(
+                    session, server.feed_url % "unknown", result
+                )
+            self.assertEqual(result.http_status, 404)
+            self.assertEqual(result.attempts, FETCH_MAX_ATTEMPTS)
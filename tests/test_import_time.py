@@ -0,0 +1,44 @@
+import subprocess as sp
+import sys
+import unittest
+
+IMPORT_TIME_BUDGET_US = 250_000
+
+ENTRY_POINTS = {
+    "pytfeeder.entry_points.run_pytfeeder": ("aiohttp", "asyncio", "curses"),
+    "pytfeeder.entry_points.run_pytfeeder_client": ("aiohttp", "asyncio", "yaml"),
+    "pytfeeder.entry_points.run_pytfeeder_curses": ("aiohttp",),
+}
+
+
+def import_times(module: str) -> dict[str, int]:
+    p = sp.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in p.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # warm up bytecode cache, so compilation is not measured
+        for module in ENTRY_POINTS:
+            _ = import_times(module)
+
+    def test_entry_points(self):
+        for module, forbidden in ENTRY_POINTS.items():
+            with self.subTest(module=module):
+                times = import_times(module)
+                self.assertIn(module, times)
+                for name in forbidden:
+                    self.assertNotIn(name, times)
+                self.assertLess(times[module], IMPORT_TIME_BUDGET_US)
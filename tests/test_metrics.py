@@ -0,0 +1,83 @@
+import json
+from pathlib import Path
+import tempfile
+import unittest
+
+from pytfeeder import metrics
+from pytfeeder.parser import YTFeedParser
+from . import mocks
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_counter(self):
+        c = self.registry.counter("test_total", "Test counter")
+        c.inc()
+        c.inc(2, status="ok")
+        c.inc(status="ok")
+        self.assertEqual(c.get(), 1)
+        self.assertEqual(c.get(status="ok"), 3)
+        self.assertIs(self.registry.counter("test_total"), c)
+        self.assertEqual(
+            self.registry.to_prometheus(),
+            "# HELP test_total Test counter\n"
+            "# TYPE test_total counter\n"
+            "test_total 1\n"
+            'test_total{status="ok"} 3\n',
+        )
+
+    def test_histogram(self):
+        h = self.registry.histogram("test_seconds", buckets=(0.1, 1.0))
+        for v in (0.05, 0.1, 0.5, 5.0):
+            h.observe(v, op="a")
+        with h.time(op="b"):
+            pass
+        self.assertEqual(h.count(op="a"), 4)
+        self.assertAlmostEqual(h.sum(op="a"), 5.65)
+        self.assertEqual(h.count(op="b"), 1)
+        lines = self.registry.to_prometheus().splitlines()
+        self.assertListEqual(
+            lines[:6],
+            [
+                "# TYPE test_seconds histogram",
+                'test_seconds_bucket{op="a",le="0.1"} 2',
+                'test_seconds_bucket{op="a",le="1.0"} 3',
+                'test_seconds_bucket{op="a",le="+Inf"} 4',
+                'test_seconds_sum{op="a"} 5.65',
+                'test_seconds_count{op="a"} 4',
+            ],
+        )
+
+    def test_write(self):
+        self.registry.counter("test_total").inc(status=200)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            prom_file = Path(tmp_dir) / "pytfeeder.prom"
+            json_file = Path(tmp_dir) / "pytfeeder.json"
+            self.registry.write(prom_file)
+            self.registry.write(json_file)
+            self.assertIn('test_total{status="200"} 1', prom_file.read_text())
+            self.assertDictEqual(
+                json.loads(json_file.read_text()),
+                {
+                    "test_total": {
+                        "type": "counter",
+                        "help": "",
+                        "values": [{"labels": {"status": "200"}, "value": 1}],
+                    }
+                },
+            )
+            self.assertListEqual(
+                sorted(p.name for p in Path(tmp_dir).iterdir()),
+                ["pytfeeder.json", "pytfeeder.prom"],
+            )
+
+    def test_parser_instrumented(self):
+        before = metrics.PARSE_SECONDS.count()
+        entries_before = metrics.PARSED_ENTRIES.get()
+        _ = YTFeedParser(mocks.raw_feed)
+        self.assertEqual(metrics.PARSE_SECONDS.count(), before + 1)
+        self.assertEqual(
+            metrics.PARSED_ENTRIES.get(), entries_before + len(mocks.sample_entries)
+        )
@@ -0,0 +1,67 @@
+from io import StringIO
+import json
+import unittest
+
+from pytfeeder.config import Config
+from pytfeeder.entry_points.run_pytfeeder import channels_rows, feed_rows
+from pytfeeder.feeder import Feeder
+from pytfeeder.output import OutputFormat, write_object, write_rows
+from pytfeeder.storage import Storage
+from . import mocks
+from .utils import temp_storage_path
+
+
+class TestOutput(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.db_file = temp_storage_path()
+        cls.stor = Storage(cls.db_file)
+        _ = cls.stor.add_entries(mocks.sample_entries + mocks.another_sample_entries)
+        cls.config = Config(channels=[mocks.sample_channel], storage_path=cls.db_file)
+        cls.feeder = Feeder(config=cls.config, storage=cls.stor)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.db_file.exists():
+            cls.db_file.unlink()
+
+    def test_write_rows(self):
+        rows = [{"a": 1, "b": ["x", "y"]}, {"a": 2, "b": None}]
+        for fmt, expected in [
+            (OutputFormat.TEXT, "1\tx,y\n2\t\n"),
+            (OutputFormat.JSON, json.dumps(rows) + "\n"),
+            (OutputFormat.NDJSON, "".join(json.dumps(r) + "\n" for r in rows)),
+        ]:
+            with self.subTest(fmt=fmt):
+                f = StringIO()
+                self.assertEqual(write_rows(iter(rows), fmt, file=f), len(rows))
+                self.assertEqual(f.getvalue(), expected)
+
+        f = StringIO()
+        self.assertEqual(write_rows(iter([]), OutputFormat.JSON, file=f), 0)
+        self.assertEqual(json.loads(f.getvalue()), [])
+
+    def test_write_object(self):
+        f = StringIO()
+        write_object({"new": 0, "error": None}, OutputFormat.JSON, file=f)
+        self.assertEqual(json.loads(f.getvalue()), {"new": 0, "error": None})
+
+    def test_feed_rows(self):
+        f = StringIO()
+        _ = write_rows(feed_rows(self.feeder), OutputFormat.NDJSON, file=f)
+        rows = list(map(json.loads, f.getvalue().splitlines()))
+        self.assertListEqual(
+            [r["id"] for r in rows], [e.id for e in mocks.sample_entries]
+        )
+        self.assertTrue(
+            all(r["channel_title"] == mocks.sample_channel.title for r in rows)
+        )
+        self.assertEqual(len(list(feed_rows(self.feeder, limit=1))), 1)
+
+    def test_channels_rows(self):
+        rows = {r["channel_id"]: r for r in channels_rows(self.feeder)}
+        self.assertEqual(len(rows), 1 + len(mocks.another_sample_entries))
+        row = rows[mocks.sample_channel.channel_id]
+        self.assertEqual(row["title"], mocks.sample_channel.title)
+        self.assertEqual(row["new"], len(mocks.sample_entries))
+        self.assertIsNone(rows[mocks.another_sample_entries[0].channel_id]["title"])
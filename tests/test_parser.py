@@ -1,10 +1,64 @@
 import unittest
 
-from pytfeeder.parser import YTFeedParser
+from pytfeeder.parser import (
+    BACKENDS,
+    UnsupportedLayout,
+    YTFeedParser,
+    fast_entries,
+    lxml_available,
+)
 from . import mocks
 
 
 class ParserTest(unittest.TestCase):
     def test_parser(self):
         parser = YTFeedParser(mocks.raw_feed)
+        self.assertEqual(parser.backend, "fast")
         self.assertEqual(parser.entries, mocks.sample_entries)
+
+    def test_backends(self):
+        raw = mocks.yt_feed("UC" + "x" * 22, shorts_every=3)
+        backends = [b for b in BACKENDS if b != "lxml" or lxml_available()]
+        expected = YTFeedParser(raw, backend="etree").entries
+        self.assertEqual(len(expected), 15)
+        self.assertEqual(expected[0].title, 'Video #0 <part 0> & "more" \N{EM DASH} ok')
+        for backend in backends:
+            with self.subTest(backend=backend):
+                for skip_shorts in (False, True):
+                    entries = YTFeedParser(
+                        raw, backend=backend, skip_shorts=skip_shorts
+                    ).entries
+                    self.assertEqual(len(entries), 10 if skip_shorts else 15)
+                    for e in entries:
+                        self.assertEqual(
+                            e.to_dict(), expected[int(e.id[-3:])].to_dict()
+                        )
+
+    def test_fallback(self):
+        raw = mocks.raw_feed.replace("<title>Video #1", "<title><![CDATA[Video #1]]>")
+        with self.assertRaises(UnsupportedLayout):
+            _ = list(fast_entries(raw.encode()))
+        parser = YTFeedParser(raw)
+        self.assertIn(parser.backend, ("lxml", "etree"))
+        self.assertEqual(parser.entries, mocks.sample_entries)
+        with self.assertRaises(Exception):
+            _ = YTFeedParser(mocks.raw_feed[:-20])
+
+    def test_bytes(self):
+        raw = mocks.yt_feed(
+            "UC" + "x" * 22, channel_title="Caf\N{LATIN SMALL LETTER E WITH ACUTE}"
+        )
+        raw = raw.replace("Video #", "Vid\N{LATIN SMALL LETTER E WITH ACUTE}o #")
+        expected = YTFeedParser(raw, backend="etree").entries
+        self.assertTrue(
+            expected[0].title.startswith("Vid\N{LATIN SMALL LETTER E WITH ACUTE}o #0")
+        )
+
+        parser = YTFeedParser(raw.encode())
+        self.assertEqual(parser.backend, "fast")
+        self.assertEqual([e.title for e in parser.entries], [e.title for e in expected])
+
+        latin1 = raw.replace('encoding="UTF-8"', 'encoding="ISO-8859-1"')
+        parser = YTFeedParser(latin1.encode("latin-1"))
+        self.assertIn(parser.backend, ("lxml", "etree"))
+        self.assertEqual([e.title for e in parser.entries], [e.title for e in expected])
@@ -0,0 +1,44 @@
+import asyncio
+import unittest
+
+from pytfeeder.models import Entry
+from pytfeeder.pipeline import SyncPipeline
+from pytfeeder.storage import Storage
+from . import mocks
+from .fake_server import fake_channel_id
+from .utils import temp_storage_path
+
+
+class TestSyncPipeline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.db_file = temp_storage_path()
+        self.stor = Storage(self.db_file)
+
+    def tearDown(self):
+        self.db_file.unlink(missing_ok=True)
+
+    async def test_writer_batches(self):
+        new_entries: list[Entry] = []
+        feeds = [mocks.yt_feed(fake_channel_id(n), 10).encode() for n in range(20)]
+        async with SyncPipeline(self.stor, on_new_entries=new_entries.extend) as p:
+            # a single writer connection for all the batches
+            conn = p.writer.stor._conn
+            self.assertIsNotNone(conn)
+            parsed = await asyncio.gather(*(p.parse(raw) for raw in feeds))
+            written = await asyncio.gather(*(p.write(e) for e, _ in parsed))
+            self.assertListEqual([new for new, _ in written], [10] * 20)
+            self.assertLess(p.writer.batches, 20)
+            self.assertEqual((await p.write(parsed[0][0]))[0], 0)
+            self.assertIs(p.writer.stor._conn, conn)
+
+        self.assertIsNone(p.writer.stor._conn)
+        self.assertEqual(len(new_entries), 200)
+        self.assertEqual(len(self.stor.select_entries()), 200)
+
+    async def test_process_pool(self):
+        raw = mocks.yt_feed(fake_channel_id(1), shorts_every=3).encode()
+        async with SyncPipeline(self.stor, parse_workers=2, skip_shorts=True) as p:
+            entries, parse_time = await p.parse(raw)
+        self.assertEqual(len(entries), 10)
+        self.assertGreater(parse_time, 0)
+        self.assertEqual(entries[0].channel_id, fake_channel_id(1))
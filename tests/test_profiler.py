@@ -0,0 +1,57 @@
+import logging
+import unittest
+
+from pytfeeder.profiler import QueryProfiler, normalize_query
+from pytfeeder.storage import Storage
+from . import mocks
+from .utils import temp_storage_path
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.db_file = temp_storage_path()
+        self.stor = Storage(self.db_file)
+        _ = self.stor.add_entries(mocks.sample_entries)
+
+    def tearDown(self):
+        self.db_file.unlink(missing_ok=True)
+
+    def test_normalize_query(self):
+        self.assertEqual(
+            normalize_query(
+                """
+                SELECT id FROM tb_entries
+                WHERE channel_id IN (:cid0,:cid1, :cid2) AND title = 'it''s' LIMIT 10;"""
+            ),
+            "SELECT id FROM tb_entries WHERE channel_id IN (?...) AND title = ? LIMIT ?",
+        )
+        self.assertEqual(
+            normalize_query("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)"),
+            "INSERT INTO t (a, b) VALUES (?...), ...",
+        )
+        self.assertEqual(
+            normalize_query("SELECT * FROM t WHERE id IN (?)"),
+            normalize_query("SELECT * FROM t WHERE id IN (?)"),
+        )
+
+    def test_profile_storage(self):
+        log = logging.getLogger("test_profiler")
+        profiler = self.stor.profiler = QueryProfiler(slow_threshold_ms=0, log=log)
+
+        with self.assertLogs(log, logging.WARNING) as cm:
+            for limit in (1, 2):
+                self.assertEqual(len(self.stor.select_entries(limit=limit)), limit)
+            self.stor.mark_all_entries_as_watched()
+            entries = self.stor.iter_entries()
+            _ = next(entries)
+            entries.close()
+        self.assertTrue(all("slow query" in line for line in cm.output))
+
+        self.assertEqual(len(profiler.stats), 3)
+        # the unlimited select is recorded when the generator is closed
+        select_limit, update, select = profiler.stats.values()
+        self.assertTrue(select_limit.query.endswith("LIMIT ?"))
+        self.assertEqual((select_limit.calls, select_limit.rows), (2, 1 + 2))
+        self.assertEqual((select.calls, select.rows), (1, 1))
+        self.assertEqual((update.calls, update.rows), (1, len(mocks.sample_entries)))
+        self.assertIn("UPDATE tb_entries SET is_viewed = ?", profiler.summary())
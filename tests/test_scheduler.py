@@ -0,0 +1,96 @@
+import datetime as dt
+import unittest
+
+from pytfeeder.models import Channel, ChannelSyncState
+from pytfeeder.scheduler import Scheduler
+
+NOW = dt.datetime(2025, 1, 10, tzinfo=dt.timezone.utc)
+HOUR = dt.timedelta(hours=1)
+DAY = dt.timedelta(days=1)
+
+
+def state(
+    channel_id: str,
+    entries_count: int,
+    upload_interval: dt.timedelta,
+    last_published: dt.datetime,
+    last_fetch: dt.datetime | None,
+) -> ChannelSyncState:
+    return ChannelSyncState(
+        channel_id=channel_id,
+        entries_count=entries_count,
+        first_published=last_published - upload_interval * (entries_count - 1),
+        last_published=last_published,
+        last_fetch=last_fetch,
+    )
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.s = Scheduler(min_interval=30, max_interval=3 * 24 * 60)
+
+    def test_upload_interval(self):
+        st = state("a" * 24, 15, 2 * HOUR, NOW, NOW)
+        self.assertEqual(st.upload_interval, 2 * HOUR)
+        self.assertIsNone(ChannelSyncState(channel_id="a" * 24).upload_interval)
+
+    def test_poll_interval(self):
+        active = state("a" * 24, 15, 2 * HOUR, NOW - HOUR, NOW)
+        self.assertEqual(self.s.poll_interval(active, NOW), HOUR)
+
+        very_active = state("a" * 24, 15, dt.timedelta(minutes=10), NOW, NOW)
+        self.assertEqual(self.s.poll_interval(very_active, NOW), self.s.min_interval)
+
+        dormant = state("a" * 24, 15, DAY, NOW - 100 * DAY, NOW)
+        self.assertEqual(self.s.poll_interval(dormant, NOW), self.s.max_interval)
+
+        self.assertEqual(self.s.poll_interval(None, NOW), self.s.max_interval)
+
+    def test_due_channels(self):
+        channels = [
+            Channel(title=f"Channel {i}", channel_id=f"{i}" * 24) for i in range(4)
+        ]
+        states = {
+            # never fetched
+            channels[0].channel_id: state(channels[0].channel_id, 3, DAY, NOW, None),
+            # active, fetched long ago
+            channels[1].channel_id: state(
+                channels[1].channel_id, 15, 2 * HOUR, NOW - HOUR, NOW - 2 * HOUR
+            ),
+            # dormant, fetched recently
+            channels[2].channel_id: state(
+                channels[2].channel_id, 15, DAY, NOW - 100 * DAY, NOW - DAY
+            ),
+        }
+        # channels[3] has no state at all
+        self.assertListEqual(
+            self.s.due_channels(channels, states, now=NOW),
+            [channels[0], channels[1], channels[3]],
+        )
+
+    def test_quarantine(self):
+        channels = [
+            Channel(title=f"Channel {i}", channel_id=f"{i}" * 24) for i in range(3)
+        ]
+        states = {
+            c.channel_id: state(c.channel_id, 15, 2 * HOUR, NOW - HOUR, None)
+            for c in channels
+        }
+        states[channels[0].channel_id].fails = self.s.quarantine_after - 1
+        # quarantined recently
+        states[channels[1].channel_id].fails = self.s.quarantine_after
+        states[channels[1].channel_id].last_fail = NOW - HOUR
+        # quarantined long ago, should be probed again
+        states[channels[2].channel_id].fails = self.s.quarantine_after + 3
+        states[channels[2].channel_id].last_fail = NOW - self.s.max_interval
+
+        self.assertFalse(self.s.is_quarantined(states[channels[0].channel_id]))
+        self.assertTrue(self.s.is_quarantined(states[channels[1].channel_id]))
+        self.assertListEqual(
+            self.s.active_channels(channels, states, now=NOW),
+            [channels[0], channels[2]],
+        )
+        self.assertListEqual(
+            self.s.due_channels(channels, states, now=NOW),
+            [channels[0], channels[2]],
+        )
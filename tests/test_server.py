@@ -0,0 +1,90 @@
+import asyncio
+from pathlib import Path
+import tempfile
+import unittest
+
+from pytfeeder.client import ClientError, request
+from pytfeeder.config import Config
+from pytfeeder.feeder import Feeder
+from pytfeeder.server import Server, parse_request
+from pytfeeder.storage import Storage
+from . import mocks
+from .utils import temp_storage_path
+
+
+class TestServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = Path(self.tmp_dir.name) / "pytfeeder.sock"
+        self.db_file = temp_storage_path()
+        self.stor = Storage(self.db_file)
+        _ = self.stor.add_entries(mocks.sample_entries)
+        config = Config(
+            channels=[mocks.sample_channel],
+            storage_path=self.db_file,
+            lock_file=Path(self.tmp_dir.name) / "pytfeeder_update.lock",
+        )
+        self.server = Server(Feeder(config, self.stor), self.socket_path)
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+        self.db_file.unlink(missing_ok=True)
+        self.tmp_dir.cleanup()
+
+    async def request(self, cmd: str, **params):
+        return await asyncio.to_thread(request, self.socket_path, cmd, **params)
+
+    def test_parse_request(self):
+        self.assertEqual(
+            parse_request('{"cmd": "feed", "limit": 2}\n'), ("feed", {"limit": 2})
+        )
+        self.assertEqual(
+            parse_request("feed limit=2 unwatched_first=true channel_id=abc\n"),
+            ("feed", {"limit": 2, "unwatched_first": True, "channel_id": "abc"}),
+        )
+
+    async def test_stats(self):
+        self.assertEqual(await self.request("ping"), "pong")
+        stats = await self.request("stats")
+        self.assertEqual(stats["count"], len(mocks.sample_entries))
+        self.assertEqual(stats["unwatched"], len(mocks.sample_entries))
+        self.assertListEqual(
+            stats["channels_with_updates"], [mocks.sample_channel.title]
+        )
+
+    async def test_feed_pages(self):
+        page1 = await self.request("feed", limit=2)
+        page2 = await self.request("feed", limit=2, offset=2)
+        self.assertEqual(
+            [e["id"] for e in page1 + page2], [e.id for e in mocks.sample_entries]
+        )
+
+    async def test_mark_watched(self):
+        entry_id = mocks.sample_entries[0].id
+        self.assertIsNone(await self.request("mark_watched", id=entry_id))
+        feed = await self.request("feed")
+        self.assertTrue(next(e for e in feed if e["id"] == entry_id)["is_viewed"])
+        await self.request("mark_watched", id=entry_id, unwatched=True)
+
+    async def test_mark_watched_all(self):
+        with self.assertRaises(ClientError):
+            await self.request("mark_watched")
+        self.assertEqual(
+            (await self.request("stats"))["unwatched"], len(mocks.sample_entries)
+        )
+        self.assertIsNone(await self.request("mark_watched", all=True))
+        self.assertEqual((await self.request("stats"))["unwatched"], 0)
+
+    async def test_errors(self):
+        with self.assertRaises(ClientError):
+            await self.request("unknown")
+        with self.assertRaises(ClientError):
+            await self.request("feed", unknown_param=1)
+
+    async def test_metrics(self):
+        _ = await self.request("stats")
+        result = await self.request("metrics")
+        stats_seconds = result["pytfeeder_refresh_channels_stats_seconds"]
+        self.assertEqual(stats_seconds["type"], "histogram")
+        self.assertGreaterEqual(stats_seconds["values"][0]["count"], 1)
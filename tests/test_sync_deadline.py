@@ -0,0 +1,132 @@
+import asyncio
+from pathlib import Path
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from pytfeeder.config import Config
+from pytfeeder.feeder import Feeder
+from pytfeeder.models import Channel, SyncStatus
+from pytfeeder.storage import Storage
+from pytfeeder.updater import Updater
+from . import mocks
+from .utils import temp_storage_path
+
+SLOW_CHANNEL_ID = "slow_channel_id123456789"
+
+
+def channel_feed(channel_id: str) -> bytes:
+    return mocks.feed_fmt.format(
+        channel_title=channel_id,
+        channel_id=channel_id,
+        entries="".join(
+            mocks.entry_fmt.format(
+                id=f"{channel_id[-8:]}{i:03d}",
+                title=f"{channel_id} {i}",
+                published="",
+                channel_id=channel_id,
+            )
+            for i in range(3)
+        ),
+    ).encode()
+
+
+class FakeResponse:
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.status = 200
+        self.reason = "OK"
+        self.headers = {}
+        self.channel_id = url.rsplit("=", 1)[-1]
+
+    async def __aenter__(self):
+        if self.channel_id == SLOW_CHANNEL_ID:
+            await asyncio.sleep(60)
+        return self
+
+    async def __aexit__(self, *_):
+        pass
+
+    def raise_for_status(self) -> None:
+        pass
+
+    async def read(self) -> bytes:
+        return channel_feed(self.channel_id)
+
+
+class FakeSession:
+    def get(self, url: str, **_) -> FakeResponse:
+        return FakeResponse(url)
+
+
+class TestSyncDeadline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_file = temp_storage_path()
+        self.channels = [
+            Channel(title="Fast 1", channel_id="fast_channel_id123456781"),
+            Channel(title="Slow", channel_id=SLOW_CHANNEL_ID),
+            Channel(title="Fast 2", channel_id="fast_channel_id123456782"),
+        ]
+        self.feeder = Feeder(
+            Config(
+                channels=self.channels,
+                storage_path=self.db_file,
+                lock_file=Path(self.tmp_dir.name) / "pytfeeder_update.lock",
+            ),
+            Storage(self.db_file),
+        )
+
+    def tearDown(self):
+        self.db_file.unlink(missing_ok=True)
+        self.tmp_dir.cleanup()
+
+    def assert_partial(self, report):
+        self.assertIsNone(report.error)
+        self.assertEqual(report.new, 6)
+        self.assertListEqual(
+            [r.status for r in report.channels],
+            [SyncStatus.OK, SyncStatus.CANCELLED, SyncStatus.OK],
+        )
+        self.assertListEqual(
+            [r.channel_id for r in report.remaining], [SLOW_CHANNEL_ID]
+        )
+        self.assertLess(report.duration, 5)
+
+        states = self.feeder.stor.select_channels_sync_state()
+        self.assertIsNotNone(states[self.channels[0].channel_id].last_fetch)
+        self.assertNotIn(SLOW_CHANNEL_ID, states)
+        # carried over to the next regular update, not counted as a failure
+        for u in (self.feeder.updater, Updater(self.feeder.config.lock_file, 30)):
+            self.assertEqual(u.fails, 0)
+            self.assertFalse(u.is_update_expired)
+        # fails:timestamp, as read by examples/i3block/pytfeeder.sh
+        self.assertRegex(self.feeder.config.lock_file.read_text(), r"^0:\d{10}$")
+
+    async def test_timeout(self):
+        report = await self.feeder.sync_entries(session=FakeSession(), timeout=0.3)  # type: ignore
+        self.assert_partial(report)
+
+    async def test_timeout_during_write(self):
+        # the fast channels are cut by the deadline while their entries are
+        # being written, they are stored and reported anyway
+        insert_entries = Storage.insert_entries
+
+        def slow_insert_entries(stor, entries):
+            time.sleep(0.5)
+            return insert_entries(stor, entries)
+
+        new_entries = []
+        self.feeder.on_new_entries = new_entries.extend
+        with patch.object(Storage, "insert_entries", slow_insert_entries):
+            report = await self.feeder.sync_entries(session=FakeSession(), timeout=0.3)  # type: ignore
+        self.assert_partial(report)
+        self.assertEqual(report.new, self.feeder.global_stats().count)
+        self.assertEqual(report.new, len(new_entries))
+
+    async def test_cancel(self):
+        cancel = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.3, cancel.set)
+        report = await self.feeder.sync_entries(session=FakeSession(), cancel=cancel)  # type: ignore
+        self.assert_partial(report)
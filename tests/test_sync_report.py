@@ -0,0 +1,71 @@
+import datetime as dt
+import unittest
+
+from pytfeeder.models import ChannelSyncResult, HttpStats, SyncReport, SyncStatus
+
+
+class TestSyncReport(unittest.TestCase):
+    def report(self) -> SyncReport:
+        return SyncReport(
+            new=5,
+            error=Exception("500, message='Internal Server Error'"),
+            started=dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc),
+            duration=1.5,
+            http=HttpStats(requests=4, connections_created=2, connections_reused=2),
+            channels=[
+                ChannelSyncResult("a" * 24, new=5, http_status=200, bytes=2048),
+                ChannelSyncResult(
+                    "b" * 24, status=SyncStatus.NOT_MODIFIED, http_status=304
+                ),
+                ChannelSyncResult(
+                    "c" * 24,
+                    status=SyncStatus.FAILED,
+                    http_status=500,
+                    attempts=3,
+                    error="500, message='Internal Server Error'",
+                ),
+                ChannelSyncResult("d" * 24, status=SyncStatus.CANCELLED),
+                ChannelSyncResult("e" * 24, status=SyncStatus.QUARANTINED),
+            ],
+        )
+
+    def test_statuses(self):
+        report = self.report()
+        self.assertListEqual([r.channel_id for r in report.failed], ["c" * 24])
+        self.assertListEqual([r.channel_id for r in report.remaining], ["d" * 24])
+        self.assertEqual(
+            len(report.with_status(SyncStatus.OK, SyncStatus.NOT_MODIFIED)), 2
+        )
+        self.assertTrue(report.is_partial)
+
+        report.channels = report.failed
+        self.assertFalse(report.is_partial)
+        report.error = None
+        self.assertFalse(report.is_partial)
+
+    def test_dict(self):
+        report = self.report()
+        d = report.to_dict()
+        self.assertEqual(d["error"], str(report.error))
+        self.assertEqual(d["started"], "2025-01-01T00:00:00+00:00")
+        self.assertDictEqual(
+            d["channels"][2],
+            {
+                "channel_id": "c" * 24,
+                "status": "failed",
+                "new": 0,
+                "http_status": 500,
+                "attempts": 3,
+                "bytes": 0,
+                "latency": 0.0,
+                "parse_time": 0.0,
+                "db_time": 0.0,
+                "error": "500, message='Internal Server Error'",
+            },
+        )
+
+        restored = SyncReport.from_dict(d)
+        self.assertListEqual(restored.channels, report.channels)
+        self.assertEqual(restored.http, report.http)
+        self.assertEqual(restored.started, report.started)
+        self.assertDictEqual(restored.to_dict(), d)
@@ -0,0 +1,124 @@
+import asyncio
+from pathlib import Path
+import tempfile
+import subprocess
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+from pytfeeder import updater
+from pytfeeder.config import Config
+from pytfeeder.feeder import Feeder
+from pytfeeder.models import ChannelSyncResult, SyncReport, SyncStatus
+from pytfeeder.storage import Storage
+from .utils import temp_storage_path
+
+
+def dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", ""])
+    _ = proc.wait()
+    return proc.pid
+
+
+class TestUpdaterLock(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.lock_file = Path(self.tmp_dir.name) / "pytfeeder_update.lock"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def updater(self) -> updater.Updater:
+        return updater.Updater(lock_file=self.lock_file, update_interval=30)
+
+    async def test_lock(self):
+        u1, u2 = self.updater(), self.updater()
+        self.assertTrue(u1.lock())
+        self.assertFalse(u2.lock())
+        u1.unlock()
+        self.assertTrue(u2.lock())
+        u2.unlock()
+
+    async def test_attach_to_running_sync(self):
+        u1 = self.updater()
+        self.assertTrue(u1.lock())
+
+        db_file = temp_storage_path()
+        try:
+            feeder = Feeder(
+                Config(channels=[], storage_path=db_file, lock_file=self.lock_file),
+                Storage(db_file),
+            )
+            waiter = asyncio.create_task(feeder.sync_entries())
+            await asyncio.sleep(updater.LOCK_POLL_INTERVAL_SECS)
+            self.assertFalse(waiter.done())
+
+            expected = SyncReport(
+                new=7,
+                error=Exception("404, message='Not Found'"),
+                channels=[
+                    ChannelSyncResult("a" * 24, new=7, http_status=200, bytes=1024),
+                    ChannelSyncResult(
+                        "b" * 24,
+                        status=SyncStatus.FAILED,
+                        http_status=404,
+                        attempts=3,
+                        error="404, message='Not Found'",
+                    ),
+                    ChannelSyncResult("c" * 24, status=SyncStatus.SKIPPED),
+                ],
+            )
+            u1.update_lock_file(failed=True)
+            u1.unlock(expected.to_dict())
+            report = await asyncio.wait_for(waiter, timeout=5)
+        finally:
+            db_file.unlink(missing_ok=True)
+
+        self.assertEqual(report.new, 7)
+        self.assertEqual(str(report.error), str(expected.error))
+        self.assertListEqual(report.channels, expected.channels)
+        self.assertTrue(report.is_partial)
+        self.assertEqual(len(report.failed), 1)
+        self.assertEqual(feeder.updater.last_update, self.updater().last_update)
+        self.assertTrue(feeder.updater.lock())
+        feeder.updater.unlock()
+
+    async def test_long_running_sync(self):
+        u1, u2 = self.updater(), self.updater()
+        self.assertTrue(u1.lock())
+        u1._write_sync_state({"pid": dead_pid(), "started": time.time() - 3600})
+        waiter = asyncio.create_task(u2.wait_for_result())
+        await asyncio.sleep(updater.LOCK_POLL_INTERVAL_SECS * 3)
+        self.assertFalse(waiter.done())
+        u1.unlock(SyncReport(new=3).to_dict())
+        result = await asyncio.wait_for(waiter, timeout=5)
+        self.assertEqual(SyncReport.from_dict(result or {}).new, 3)
+
+    async def test_crashed_sync(self):
+        u1, u2 = self.updater(), self.updater()
+        u1._write_sync_state({"pid": dead_pid(), "started": time.time()})
+        self.assertTrue(u2.lock())
+        u2.unlock()
+
+    async def test_without_fcntl(self):
+        with patch.dict(sys.modules, {"fcntl": None}):
+            u1, u2 = self.updater(), self.updater()
+            self.assertTrue(u1.lock())
+            self.assertFalse(u2.lock())
+            waiter = asyncio.create_task(u2.wait_for_result())
+            await asyncio.sleep(updater.LOCK_POLL_INTERVAL_SECS)
+            u1.unlock(SyncReport(new=3).to_dict())
+            result = await asyncio.wait_for(waiter, timeout=5)
+            self.assertEqual(SyncReport.from_dict(result or {}).new, 3)
+
+            u1._write_sync_state({"pid": dead_pid(), "started": time.time()})
+            self.assertTrue(u2.lock())
+            u2.unlock()
+
+    async def test_previous_result_is_not_reused(self):
+        u1, u2 = self.updater(), self.updater()
+        self.assertTrue(u1.lock())
+        u1.unlock(SyncReport(new=3).to_dict())
+        self.assertIsNone(await u2.wait_for_result())
+        u2.unlock()